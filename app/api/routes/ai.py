@@ -2,24 +2,26 @@
 API routes for AI alerts and advisory system.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, datetime, timezone
-from app.database import get_db
-from app.auth.middleware import get_current_user
+from app.database import get_async_db
+from app.auth.middleware import get_current_budget_user, get_current_principal, Principal
 from app.models.student import Student
 from app.models.ai_alert import AIAlert
 from app.schemas.ai_alert import AIAlertResponse, AIAlertUpdate
-from app.services.ai_service import AIService
+from app.services.ai_service import AsyncAIService
+from app.services.post_write import AsyncPostWriteUpdates
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 
 @router.post("/evaluate", response_model=List[AIAlertResponse])
-def evaluate_ai_rules(
+async def evaluate_ai_rules(
     current_date: Optional[date] = Query(None, description="Date for evaluation (defaults to today)"),
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Trigger AI rule evaluation and generate alerts.
@@ -32,62 +34,68 @@ def evaluate_ai_rules(
     
     ⚠️ The AI only creates alerts - it never modifies financial data.
     """
-    alerts = AIService.evaluate_all_rules(db, student, current_date)
+    alerts = await AsyncAIService.evaluate_all_rules(db, student, current_date)
+    await AsyncPostWriteUpdates.after_dashboard_change(student.id)
     return alerts
 
 
 @router.get("/alerts", response_model=List[AIAlertResponse])
-def get_ai_alerts(
+async def get_ai_alerts(
     is_read: Optional[bool] = Query(None, description="Filter by read status"),
     is_resolved: Optional[bool] = Query(None, description="Filter by resolved status"),
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-generated alerts for current student.
     """
-    query = db.query(AIAlert).filter(AIAlert.student_id == student.id)
+    query = select(AIAlert).where(AIAlert.student_id == student.id)
     
     if is_read is not None:
-        query = query.filter(AIAlert.is_read == is_read)
+        query = query.where(AIAlert.is_read == is_read)
     
     if is_resolved is not None:
-        query = query.filter(AIAlert.is_resolved == is_resolved)
+        query = query.where(AIAlert.is_resolved == is_resolved)
     
-    alerts = query.order_by(AIAlert.created_at.desc()).all()
-    return alerts
+    result = await db.execute(query.order_by(AIAlert.created_at.desc()))
+    return result.scalars().all()
 
 
 @router.get("/alerts/unread", response_model=List[AIAlertResponse])
-def get_unread_alerts(
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_unread_alerts(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get unread AI alerts for current student.
     """
-    alerts = db.query(AIAlert).filter(
-        AIAlert.student_id == student.id,
-        AIAlert.is_read == False
-    ).order_by(AIAlert.created_at.desc()).all()
+    result = await db.execute(
+        select(AIAlert).where(
+            AIAlert.student_id == student.id,
+            AIAlert.is_read == False
+        ).order_by(AIAlert.created_at.desc())
+    )
     
-    return alerts
+    return result.scalars().all()
 
 
 @router.put("/alerts/{alert_id}", response_model=AIAlertResponse)
-def update_alert(
+async def update_alert(
     alert_id: int,
     alert_data: AIAlertUpdate,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update alert status (mark as read/resolved).
     """
-    alert = db.query(AIAlert).filter(
-        AIAlert.id == alert_id,
-        AIAlert.student_id == student.id
-    ).first()
+    result = await db.execute(
+        select(AIAlert).where(
+            AIAlert.id == alert_id,
+            AIAlert.student_id == student.id
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(
@@ -105,25 +113,29 @@ def update_alert(
         if alert_data.is_resolved and not alert.resolved_at:
             alert.resolved_at = datetime.now(timezone.utc)
     
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    await db.refresh(alert)
+    await AsyncPostWriteUpdates.after_dashboard_change(student.id)
     
     return alert
 
 
 @router.delete("/alerts/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_alert(
+async def delete_alert(
     alert_id: int,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete an AI alert.
     """
-    alert = db.query(AIAlert).filter(
-        AIAlert.id == alert_id,
-        AIAlert.student_id == student.id
-    ).first()
+    result = await db.execute(
+        select(AIAlert).where(
+            AIAlert.id == alert_id,
+            AIAlert.student_id == student.id
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(
@@ -131,7 +143,8 @@ def delete_alert(
             detail="Alert not found"
         )
     
-    db.delete(alert)
-    db.commit()
+    await db.delete(alert)
+    await db.commit()
+    await AsyncPostWriteUpdates.after_dashboard_change(student.id)
     
     return None
@@ -1,22 +1,35 @@
 """
 Authentication routes for local JWT-based auth.
-Handles user registration, login, and profile retrieval.
+Handles user registration, login, token refresh/revocation, and profile retrieval.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field
 from datetime import date, datetime, timedelta, timezone
+from typing import Optional
 from jose import jwt
-from passlib.context import CryptContext
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, AsyncSessionLocal
 from app.models.student import Student
-from app.auth.middleware import get_current_user
+from app.auth.middleware import get_current_user, verify_token, decode_token, is_token_revoked, revocation_list
+from app.auth.passwords import password_hasher, PasswordHasherBusy
+from app.auth.throttle import SlidingWindowLimiter
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Sliding-window throttles (per worker process)
+ip_limiter = SlidingWindowLimiter(
+    limit=settings.AUTH_IP_ATTEMPTS,
+    window_seconds=settings.AUTH_IP_WINDOW_SECONDS,
+)
+login_email_limiter = SlidingWindowLimiter(
+    limit=settings.LOGIN_EMAIL_FAILURES,
+    window_seconds=settings.LOGIN_EMAIL_WINDOW_SECONDS,
+)
 
 
 # --- Schemas ---
@@ -35,11 +48,28 @@ class LoginRequest(BaseModel):
 
 
 class AuthResponse(BaseModel):
-    """Schema for auth response with JWT token."""
+    """Schema for auth response with JWT access and refresh tokens."""
     token: str
+    refresh_token: str
     student: dict
 
 
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token for new tokens."""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Schema for logout (refresh token is revoked too when given)."""
+    refresh_token: Optional[str] = None
+
+
+class ChangePasswordRequest(BaseModel):
+    """Schema for changing the account password."""
+    current_password: str = Field(..., min_length=1)
+    new_password: str = Field(..., min_length=6, max_length=100)
+
+
 class StudentProfile(BaseModel):
     """Schema for student profile response."""
     id: int
@@ -54,17 +84,42 @@ class StudentProfile(BaseModel):
 
 # --- Helpers ---
 
-def create_access_token(student_id: int) -> str:
-    """Create a JWT access token for the given student."""
-    expire = datetime.now(timezone.utc) + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
+def _create_token(student_id: int, token_type: str, lifetime: timedelta) -> str:
+    now = datetime.now(timezone.utc)
     payload = {
         "sub": str(student_id),
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "typ": token_type,
+        "jti": uuid.uuid4().hex,
+        "exp": now + lifetime,
+        # Fractional so revocation cut-offs separate tokens issued in the same second
+        "iat": now.timestamp(),
     }
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 
+def create_access_token(student_id: int) -> str:
+    """Create a short-lived JWT access token for the given student."""
+    return _create_token(student_id, "access", timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+def create_refresh_token(student_id: int) -> str:
+    """Create a long-lived JWT refresh token for the given student."""
+    return _create_token(student_id, "refresh", timedelta(hours=settings.JWT_EXPIRATION_HOURS))
+
+
+def _token_expiry(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+
+
+def issue_tokens(student: Student) -> AuthResponse:
+    """Build an auth response with a fresh access/refresh token pair."""
+    return AuthResponse(
+        token=create_access_token(student.id),
+        refresh_token=create_refresh_token(student.id),
+        student=student_to_dict(student)
+    )
+
+
 def student_to_dict(student: Student) -> dict:
     """Convert a Student model to a dict for the response."""
     return {
@@ -79,19 +134,79 @@ def student_to_dict(student: Student) -> dict:
     }
 
 
+def _client_ip(request: Request) -> str:
+    """Return the client address used for per-IP throttling."""
+    return request.client.host if request.client else "unknown"
+
+
+def _enforce_throttle(limiter: SlidingWindowLimiter, key: str) -> None:
+    """Raise 429 if ``key`` has exhausted its attempts in the current window."""
+    retry_after = limiter.retry_after(key)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+def _hasher_busy() -> HTTPException:
+    """Response for when the password hashing queue is full."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy. Please try again shortly.",
+        headers={"Retry-After": "1"}
+    )
+
+
+async def _find_student(*criteria) -> Optional[Student]:
+    # Runs on a short session of its own so the pooled connection is back
+    # before the slow hashing step; the request's session is untouched and
+    # the returned student is a detached, fully loaded object.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Student).where(*criteria))
+        return result.scalars().first()
+
+
+def _set_password(db: Session, student_id: int, password_hash: str) -> Student:
+    """Store a new password hash and revoke every token issued before now."""
+    db.execute(
+        update(Student).where(Student.id == student_id).values(password_hash=password_hash)
+    )
+    refresh_lifetime = timedelta(hours=settings.JWT_EXPIRATION_HOURS)
+    revocation_list.revoke_student(db, student_id, datetime.now(timezone.utc) + refresh_lifetime)
+    return db.query(Student).filter(Student.id == student_id).first()
+
+
+async def _revoke_token(db: AsyncSession, payload: dict) -> bool:
+    """Revoke a single verified token until its expiry; False if it already was."""
+    return await db.run_sync(
+        lambda session: revocation_list.revoke_token(
+            session, payload["jti"], int(payload["sub"]), _token_expiry(payload)
+        )
+    )
+
+
 # --- Routes ---
+# The slow bcrypt step is awaited on the password hashing pool with no
+# database connection checked out.
 
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     data: RegisterRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user account.
     Creates a student record with hashed password and returns a JWT token.
     """
+    client_ip = _client_ip(request)
+    _enforce_throttle(ip_limiter, client_ip)
+    ip_limiter.hit(client_ip)
+
     # Check if email already exists
-    existing = db.query(Student).filter(Student.email == data.email).first()
+    existing = await _find_student(Student.email == data.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,7 +214,10 @@ def register(
         )
 
     # Hash password and create student
-    hashed_password = pwd_context.hash(data.password)
+    try:
+        hashed_password = await password_hasher.hash(data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
     student = Student(
         email=data.email,
@@ -110,56 +228,148 @@ def register(
         remaining_budget=0.00,
         budget_setup_complete=False,
     )
-
     db.add(student)
-    db.commit()
-    db.refresh(student)
+    await db.commit()
+    await db.refresh(student)
 
-    # Generate JWT token
-    token = create_access_token(student.id)
-
-    return AuthResponse(
-        token=token,
-        student=student_to_dict(student)
-    )
+    return issue_tokens(student)
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(
+async def login(
     data: LoginRequest,
-    db: Session = Depends(get_db)
+    request: Request
 ):
     """
     Login with email and password.
     Returns a JWT token on success.
     """
+    client_ip = _client_ip(request)
+    email_key = data.email.lower()
+    _enforce_throttle(ip_limiter, client_ip)
+    _enforce_throttle(login_email_limiter, email_key)
+    ip_limiter.hit(client_ip)
+
     # Find student by email
-    student = db.query(Student).filter(Student.email == data.email).first()
+    student = await _find_student(Student.email == data.email)
 
     if not student:
+        login_email_limiter.hit(email_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
     # Verify password
-    if not pwd_context.verify(data.password, student.password_hash):
+    try:
+        password_ok = await password_hasher.verify(data.password, student.password_hash)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+    if not password_ok:
+        login_email_limiter.hit(email_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    # Generate JWT token
-    token = create_access_token(student.id)
+    login_email_limiter.reset(email_key)
 
-    return AuthResponse(
-        token=token,
-        student=student_to_dict(student)
-    )
+    return issue_tokens(student)
+
+
+@router.post("/refresh", response_model=AuthResponse)
+async def refresh_tokens(
+    data: RefreshRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+    The presented refresh token is revoked (rotation).
+    """
+    payload = decode_token(data.refresh_token, token_type="refresh")
+    if await is_token_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    student_id = int(payload["sub"])
+    student = await db.get(Student, student_id)
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student account not found."
+        )
+
+    # Rotation: only the request that actually revokes the presented token
+    # gets a new pair, so a refresh token replayed concurrently is refused.
+    if not await _revoke_token(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return issue_tokens(student)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    data: Optional[LogoutRequest] = None,
+    payload: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revoke the current access token and, if given, the refresh token.
+    """
+    student_id = int(payload["sub"])
+    await _revoke_token(db, payload)
+
+    if data and data.refresh_token:
+        try:
+            refresh_payload = decode_token(data.refresh_token, token_type="refresh")
+        except HTTPException:
+            refresh_payload = None
+        if refresh_payload and int(refresh_payload["sub"]) == student_id:
+            await _revoke_token(db, refresh_payload)
+
+    return None
+
+
+@router.post("/change-password", response_model=AuthResponse)
+async def change_password(
+    data: ChangePasswordRequest,
+    payload: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Change the account password.
+    Revokes every previously issued token and returns a fresh token pair.
+    """
+    student_id = int(payload["sub"])
+    student = await _find_student(Student.id == student_id)
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student account not found."
+        )
+
+    try:
+        password_ok = await password_hasher.verify(data.current_password, student.password_hash)
+        if not password_ok:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Current password is incorrect"
+            )
+        new_hash = await password_hasher.hash(data.new_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+    student = await db.run_sync(lambda session: _set_password(session, student_id, new_hash))
+    return issue_tokens(student)
 
 
 @router.get("/me")
-def get_me(
+async def get_me(
     student: Student = Depends(get_current_user),
 ):
     """
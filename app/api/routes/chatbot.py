@@ -5,13 +5,14 @@ Groq-powered AI chatbot with access to student's budget and expense data.
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Optional, List
 import logging
 
-from app.database import get_db
+from app.database import get_async_db
 from app.auth.middleware import get_current_user
 from app.models.student import Student
 from app.models.expense import Expense
@@ -107,7 +108,7 @@ def get_budget_info(db: Session, student: Student) -> dict:
 async def ask_chatbot(
     chat: ChatMessage,
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ask the AI-powered budget chatbot a question.
@@ -115,7 +116,7 @@ async def ask_chatbot(
     The chatbot has access to your budget, expenses, and investment data
     and provides personalized financial advice.
     """
-    info = get_budget_info(db, student)
+    info = await db.run_sync(lambda session: get_budget_info(session, student))
 
     if not info["budget_setup_complete"]:
         return ChatResponse(
@@ -161,12 +162,12 @@ async def ask_chatbot(
 @router.post("/report", response_model=ReportResponse)
 async def generate_report(
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a comprehensive financial report in Markdown format.
     """
-    info = get_budget_info(db, student)
+    info = await db.run_sync(lambda session: get_budget_info(session, student))
 
     if not info["budget_setup_complete"]:
         return ReportResponse(
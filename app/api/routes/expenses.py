@@ -1,16 +1,20 @@
 """
 API routes for expense management and daily checklist.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import date, timedelta
+import base64
+import json
+from fastapi import APIRouter, Body, Depends, File, HTTPException, status, Query, Request, Response, UploadFile
+from sqlalchemy import and_, literal_column, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
-from app.database import get_db
-from app.auth.middleware import get_current_user
+from typing import Any, List, Optional
+from app.database import get_async_db, get_analytics_db
+from app.auth.middleware import get_current_budget_user, get_current_principal, Principal
 from app.models.student import Student, StudentCategoryBudget
-from app.models.expense import Expense, ExpenseCategory, DailyExpenseTemplate
+from app.models.expense import Expense
 from app.schemas.expense import (
     ExpenseCreate,
     ExpenseResponse,
@@ -19,28 +23,85 @@ from app.schemas.expense import (
     DailyExpenseTemplateResponse,
     ExpenseCategoryResponse,
     AdditionalExpenseCreate,
+    ExpenseImportResult,
+    SpendingAnalyticsResponse,
+    SpendingHeatmapResponse,
+    SpendingPercentilesResponse,
 )
-from app.services.budget_service import BudgetService
+from app.config import settings
+from app.services.category_registry import category_registry
+from app.services.analytics_service import AnalyticsService, ANALYTICS_GROUPINGS, HEATMAP_ENCODINGS
+from app.services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from app.services.expense_import_service import ExpenseImportService, ExpenseImportTooLarge
+from app.services.spending_sketches import spending_sketches
+from app.services.post_write import AsyncPostWriteUpdates
+from app.models.spending_sketch import ALL_CATEGORIES_KEY
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
 
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+def _encode_cursor(expense: Expense) -> str:
+    """Opaque cursor for the position just after ``expense``."""
+    position = [expense.expense_date.isoformat(), expense.created_at.isoformat(), expense.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor into (expense_date, created_at, id), or raise 400."""
+    try:
+        expense_date, created_at, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return date.fromisoformat(expense_date), datetime.fromisoformat(created_at), int(expense_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def _load_expenses(db: AsyncSession, expense_ids: List[int]) -> List[Expense]:
+    """Load expenses by id with their categories, preserving the given order."""
+    if not expense_ids:
+        return []
+    result = await db.execute(
+        select(Expense).options(joinedload(Expense.category)).where(Expense.id.in_(expense_ids))
+    )
+    by_id = {expense.id: expense for expense in result.scalars()}
+    return [by_id[expense_id] for expense_id in expense_ids]
+
+
 @router.get("/categories", response_model=List[ExpenseCategoryResponse])
-def get_expense_categories(
-    db: Session = Depends(get_db)
+async def get_expense_categories(
+    request: Request,
+    response: Response
 ):
     """
     Get all available expense categories.
+
+    Served from the in-memory category registry. The ETag is the registry
+    version, so clients revalidating with If-None-Match get a 304.
     """
-    categories = db.query(ExpenseCategory).all()
-    return categories
+    snapshot = category_registry.snapshot
+    headers = {
+        "ETag": f'"{snapshot.version}"',
+        "Cache-Control": f"public, max-age={settings.CATEGORIES_CACHE_MAX_AGE_SECONDS}",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return snapshot.categories
 
 
 @router.get("/daily-checklist", response_model=DailyChecklistResponse)
-def get_daily_checklist(
+async def get_daily_checklist(
     expense_date: Optional[date] = Query(None, description="Date for checklist (defaults to today)"),
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get daily expense checklist based on student's category budgets.
@@ -52,23 +113,24 @@ def get_daily_checklist(
         expense_date = date.today()
 
     # Get student's category budgets (these are the categories to show in checklist)
-    category_budgets = db.query(StudentCategoryBudget).filter(
-        StudentCategoryBudget.student_id == student.id,
-        StudentCategoryBudget.is_active == True
-    ).all()
+    result = await db.execute(
+        select(StudentCategoryBudget).where(
+            StudentCategoryBudget.student_id == student.id,
+            StudentCategoryBudget.is_active == True
+        )
+    )
+    category_budgets = result.scalars().all()
 
     # If student has no category budgets, fall back to default templates
     if not category_budgets:
-        templates = db.query(DailyExpenseTemplate).join(ExpenseCategory).filter(
-            DailyExpenseTemplate.is_active == True
-        ).order_by(DailyExpenseTemplate.display_order).all()
+        templates = category_registry.snapshot.templates
 
         template_responses = []
         for i, template in enumerate(templates):
             template_responses.append(DailyExpenseTemplateResponse(
                 id=template.id,
                 category_id=template.category_id,
-                category_name=template.category.name,
+                category_name=template.category_name,
                 daily_budget=Decimal("0.00"),
                 display_order=i + 1,
                 is_active=template.is_active
@@ -80,19 +142,22 @@ def get_daily_checklist(
             template_responses.append(DailyExpenseTemplateResponse(
                 id=cat_budget.id,
                 category_id=cat_budget.category_id,
-                category_name=cat_budget.category.name,
+                category_name=category_registry.name(cat_budget.category_id),
                 daily_budget=cat_budget.daily_budget,
                 display_order=i + 1,
                 is_active=cat_budget.is_active
             ))
 
     # Get expenses for the specified date
-    today_expenses = db.query(Expense).filter(
-        and_(
-            Expense.student_id == student.id,
-            Expense.expense_date == expense_date
+    result = await db.execute(
+        select(Expense).options(joinedload(Expense.category)).where(
+            and_(
+                Expense.student_id == student.id,
+                Expense.expense_date == expense_date
+            )
         )
-    ).all()
+    )
+    today_expenses = result.scalars().all()
 
     # Calculate total daily budget
     total_daily_budget = sum(t.daily_budget for t in template_responses)
@@ -106,10 +171,10 @@ def get_daily_checklist(
 
 
 @router.post("/daily-checklist", response_model=List[ExpenseResponse], status_code=status.HTTP_201_CREATED)
-def submit_daily_checklist(
+async def submit_daily_checklist(
     checklist_data: DailyChecklistSubmit,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit daily expense checklist.
@@ -119,81 +184,90 @@ def submit_daily_checklist(
 
     Also supports additional/unplanned expenses with custom categories.
     """
-    created_expenses = []
-
-    # Process checked items from checklist
-    for item in checklist_data.items:
-        if item.is_checked and item.amount > 0:
-            # Verify category exists
-            category = db.query(ExpenseCategory).filter(
-                ExpenseCategory.id == item.category_id
-            ).first()
-
-            if not category:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Expense category {item.category_id} not found"
-                )
-
-            # Check if expense already exists for this category and date
-            existing_expense = db.query(Expense).filter(
-                and_(
-                    Expense.student_id == student.id,
-                    Expense.category_id == item.category_id,
-                    Expense.expense_date == checklist_data.expense_date,
-                    Expense.is_additional == False
-                )
-            ).first()
-
-            if existing_expense:
-                # Update amount if it changed
-                if existing_expense.amount != item.amount:
-                    existing_expense.amount = item.amount
-                created_expenses.append(existing_expense)
-            else:
-                # Create expense record
-                expense = Expense(
-                    student_id=student.id,
-                    category_id=item.category_id,
-                    amount=item.amount,
-                    expense_date=checklist_data.expense_date,
-                    is_additional=False
-                )
-                db.add(expense)
-                created_expenses.append(expense)
-
-    # Process additional expenses with custom categories
-    if checklist_data.additional_expenses:
-        for additional in checklist_data.additional_expenses:
-            expense = Expense(
-                student_id=student.id,
-                category_id=None,  # No predefined category
-                amount=additional.amount,
-                expense_date=additional.expense_date,
-                is_additional=True,
-                custom_category=additional.custom_category,
-                notes=additional.notes
-            )
-            db.add(expense)
-            created_expenses.append(expense)
-
-    db.commit()
-
-    # Update remaining budget
-    BudgetService.update_remaining_budget(db, student, checklist_data.expense_date)
+    # Checked items, one per category (a repeated category keeps its last amount)
+    checked_items = {
+        item.category_id: item
+        for item in checklist_data.items
+        if item.is_checked and item.amount > 0
+    }
+
+    # Verify categories exist
+    missing = category_registry.missing(checked_items)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Expense category {missing[0]} not found"
+        )
 
-    # Refresh expenses to get IDs
-    for expense in created_expenses:
-        db.refresh(expense)
+    rows = [
+        {
+            "student_id": student.id,
+            "category_id": item.category_id,
+            "amount": item.amount,
+            "expense_date": checklist_data.expense_date,
+            "is_additional": False,
+            "custom_category": None,
+            "notes": None,
+        }
+        for item in checked_items.values()
+    ]
+
+    # Additional expenses with custom categories
+    for additional in checklist_data.additional_expenses or []:
+        rows.append({
+            "student_id": student.id,
+            "category_id": None,  # No predefined category
+            "amount": additional.amount,
+            "expense_date": additional.expense_date,
+            "is_additional": True,
+            "custom_category": additional.custom_category,
+            "notes": additional.notes,
+        })
+
+    if not rows:
+        return []
+
+    # One statement for the whole checklist: checklist entries already
+    # recorded for the day get their amount updated (the partial unique
+    # index also makes concurrent double-submits safe); additional expenses
+    # are outside the index and always inserted.
+    expenses_table = Expense.__table__
+    insert_stmt = pg_insert(expenses_table).values(rows)
+    result = await db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[expenses_table.c.student_id, expenses_table.c.category_id, expenses_table.c.expense_date],
+            index_where=text("NOT is_additional"),
+            set_={"amount": insert_stmt.excluded.amount},
+        ).returning(*expenses_table.c, literal_column("xmax = 0").label("inserted"))
+    )
+    returned = result.mappings().all()
+    saved_expenses = [
+        {
+            **row,
+            "category_name": category_registry.name(row["category_id"]) or row["custom_category"],
+        }
+        for row in returned
+    ]
+    await db.commit()
+
+    # Remaining budget, spike statistics and other derived data. Sketches
+    # only count new amounts; resubmitted entries are corrected by the
+    # nightly rebuild.
+    await AsyncPostWriteUpdates.after_expense_write(
+        student,
+        [(expense["category_id"], expense["expense_date"]) for expense in saved_expenses],
+        [(row["category_id"], row["expense_date"], row["amount"]) for row in returned if row["inserted"]],
+        checklist_data.expense_date,
+    )
 
-    return created_expenses
+    return saved_expenses
 
 
 @router.post("/additional", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
-def create_additional_expense(
+async def create_additional_expense(
     expense_data: AdditionalExpenseCreate,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create an additional expense with a custom category.
@@ -210,84 +284,358 @@ def create_additional_expense(
     )
 
     db.add(expense)
-    db.commit()
-    db.refresh(expense)
-
-    # Update remaining budget
-    BudgetService.update_remaining_budget(db, student, expense_data.expense_date)
+    await db.commit()
+    expense_id = expense.id
+
+    # Remaining budget, spike statistics and other derived data
+    await AsyncPostWriteUpdates.after_expense_write(
+        student,
+        [(None, expense_data.expense_date)],
+        [(None, expense_data.expense_date, expense_data.amount)],
+        expense_data.expense_date,
+    )
 
-    return expense
+    expenses = await _load_expenses(db, [expense_id])
+    return expenses[0]
 
 
 @router.post("/", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
-def create_expense(
+async def create_expense(
     expense_data: ExpenseCreate,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a single expense record.
+
+    Returns 409 if a checklist entry (non-additional expense) for the same
+    category and date already exists; resubmit the daily checklist to
+    change its amount.
     """
     # Verify category exists if provided
     if expense_data.category_id:
-        category = db.query(ExpenseCategory).filter(
-            ExpenseCategory.id == expense_data.category_id
-        ).first()
-
-        if not category:
+        if category_registry.get(expense_data.category_id) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Expense category {expense_data.category_id} not found"
             )
 
-    expense = Expense(
-        student_id=student.id,
-        category_id=expense_data.category_id,
-        amount=expense_data.amount,
-        expense_date=expense_data.expense_date,
-        is_additional=expense_data.is_additional,
-        custom_category=expense_data.custom_category,
-        notes=expense_data.notes
+    # A checklist entry (non-additional) is unique per category and day;
+    # the partial unique index skips the insert if one already exists
+    expenses_table = Expense.__table__
+    result = await db.execute(
+        pg_insert(expenses_table).values(
+            student_id=student.id,
+            category_id=expense_data.category_id,
+            amount=expense_data.amount,
+            expense_date=expense_data.expense_date,
+            is_additional=expense_data.is_additional,
+            custom_category=expense_data.custom_category,
+            notes=expense_data.notes
+        ).on_conflict_do_nothing(
+            index_elements=[expenses_table.c.student_id, expenses_table.c.category_id, expenses_table.c.expense_date],
+            index_where=text("NOT is_additional"),
+        ).returning(expenses_table.c.id)
+    )
+    expense_id = result.scalar()
+    if expense_id is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A checklist entry for this category and date already exists"
+        )
+    await db.commit()
+
+    # Remaining budget, spike statistics and other derived data
+    await AsyncPostWriteUpdates.after_expense_write(
+        student,
+        [(expense_data.category_id, expense_data.expense_date)],
+        [(expense_data.category_id, expense_data.expense_date, expense_data.amount)],
+        expense_data.expense_date,
     )
 
-    db.add(expense)
-    db.commit()
-    db.refresh(expense)
+    expenses = await _load_expenses(db, [expense_id])
+    return expenses[0]
+
+
+async def _run_import(db: AsyncSession, student: Student, chunks) -> ExpenseImportResult:
+    """Run a bulk import, mapping reader errors to HTTP errors."""
+    try:
+        return await ExpenseImportService.ingest(db, student, chunks)
+    except ExpenseImportTooLarge as exc:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(exc)
+        )
+    except ValueError as exc:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+@router.post("/batch", response_model=ExpenseImportResult)
+async def create_expenses_batch(
+    expenses: List[Any] = Body(..., description="Expense objects in the POST /expenses/ format"),
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many expenses in one request.
+
+    Valid rows are inserted and invalid ones are reported by array index;
+    the remaining budget is recomputed once for the whole batch.
+    """
+    chunks = ExpenseImportService.json_chunks(expenses, settings.EXPENSE_IMPORT_CHUNK_SIZE)
+    return await _run_import(db, student, chunks)
 
-    # Update remaining budget
-    BudgetService.update_remaining_budget(db, student, expense_data.expense_date)
 
-    return expense
+@router.post("/import", response_model=ExpenseImportResult)
+async def import_expenses_csv(
+    file: UploadFile = File(..., description="CSV with expense_date, amount and category (or category_id/custom_category) columns"),
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import expenses from a CSV file (the /expenses/export layout is accepted).
+
+    Invalid rows are reported by line number; the remaining budget is
+    recomputed once for the whole file.
+    """
+    chunks = ExpenseImportService.csv_chunks(file.file, settings.EXPENSE_IMPORT_CHUNK_SIZE)
+    return await _run_import(db, student, chunks)
 
 
 @router.get("/", response_model=List[ExpenseResponse])
-def get_expenses(
+async def get_expenses(
+    response: Response,
     start_date: Optional[date] = Query(None, description="Start date filter"),
     end_date: Optional[date] = Query(None, description="End date filter"),
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (paginates the results)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get expenses for current student with optional date filtering.
+
+    Results are newest first. Passing limit or cursor paginates them by
+    keyset: when more rows exist, the X-Next-Cursor response header holds
+    the cursor for the next page. Without either, the whole range is
+    returned (existing clients sum it).
     """
-    query = db.query(Expense).filter(Expense.student_id == student.id)
+    query = select(Expense).options(joinedload(Expense.category)).where(
+        Expense.student_id == student.id
+    )
 
     if start_date:
-        query = query.filter(Expense.expense_date >= start_date)
+        query = query.where(Expense.expense_date >= start_date)
 
     if end_date:
-        query = query.filter(Expense.expense_date <= end_date)
+        query = query.where(Expense.expense_date <= end_date)
+
+    if cursor:
+        query = query.where(
+            tuple_(Expense.expense_date, Expense.created_at, Expense.id) < _decode_cursor(cursor)
+        )
 
-    expenses = query.order_by(Expense.expense_date.desc(), Expense.created_at.desc()).all()
+    query = query.order_by(Expense.expense_date.desc(), Expense.created_at.desc(), Expense.id.desc())
+    if limit is None and cursor is None:
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    result = await db.execute(query.limit(limit + 1))
+    expenses = result.scalars().all()
+
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(expenses[-1])
 
     return expenses
 
 
+@router.get("/analytics", response_model=SpendingAnalyticsResponse)
+async def get_spending_analytics(
+    group_by: str = Query("category", description="Group by: category, day, week or month"),
+    start_date: Optional[date] = Query(None, description="Start date (default: first day of the end date's month)"),
+    end_date: Optional[date] = Query(None, description="End date (default: today)"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_analytics_db)
+):
+    """
+    Get spending totals, counts and averages for a date range, grouped in SQL.
+    """
+    if group_by not in ANALYTICS_GROUPINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="group_by must be one of: category, day, week, month"
+        )
+
+    if end_date is None:
+        end_date = date.today()
+    if start_date is None:
+        start_date = end_date.replace(day=1)
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+
+    return await AnalyticsService.get_spending_analytics(db, student.id, start_date, end_date, group_by)
+
+
+@router.get("/heatmap", response_model=SpendingHeatmapResponse)
+async def get_spending_heatmap(
+    request: Request,
+    response: Response,
+    year: Optional[int] = Query(None, ge=1900, le=9999, description="Calendar year (default: current year)"),
+    encoding: str = Query("list", description="list, or base64 of packed little-endian int32"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_analytics_db)
+):
+    """
+    Get daily spending totals in paise for a whole year (for a calendar heatmap).
+
+    The ETag is the year's data version, so clients revalidating with
+    If-None-Match get a 304 until an expense in that year changes.
+    """
+    if encoding not in HEATMAP_ENCODINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="encoding must be one of: list, base64"
+        )
+
+    heatmap = await AnalyticsService.get_spending_heatmap(
+        db, student.id, year or date.today().year, encoding
+    )
+    headers = {
+        "ETag": f'"{heatmap.version}-{encoding}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return heatmap
+
+
+PERCENTILE_LEVELS = (10, 25, 50, 75, 90, 99)
+
+
+@router.get("/percentiles", response_model=SpendingPercentilesResponse)
+async def get_spending_percentiles(
+    month: Optional[str] = Query(None, description="Month as YYYY-MM (default: current month)"),
+    category_id: Optional[int] = Query(None, description="Category (default: all categories)"),
+    amount: Optional[float] = Query(None, ge=0, description="Amount to rank against everyone's expenses"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get percentiles of all students' expense amounts for a category and month,
+    and optionally where an amount falls among them.
+    """
+    if month is None:
+        month_date = date.today().replace(day=1)
+    else:
+        try:
+            month_date = datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="month must be in YYYY-MM format"
+            )
+
+    if category_id is not None and category_registry.get(category_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Expense category {category_id} not found"
+        )
+
+    sketch = await spending_sketches.get(
+        db, ALL_CATEGORIES_KEY if category_id is None else category_id, month_date
+    )
+    rank = sketch.rank(amount) if amount is not None else None
+
+    return SpendingPercentilesResponse(
+        category_id=category_id,
+        month=month_date.strftime("%Y-%m"),
+        count=sketch.count,
+        percentiles={
+            f"p{level}": None if value is None else round(value, 2)
+            for level in PERCENTILE_LEVELS
+            for value in [sketch.quantile(level / 100)]
+        },
+        amount=amount,
+        amount_percentile=None if rank is None else round(rank * 100, 1),
+    )
+
+
+EXPENSE_EXPORT_FIELDS = (
+    "id", "expense_date", "category", "amount", "is_additional", "notes", "created_at",
+)
+
+
+@router.get("/export")
+async def export_expenses(
+    format: str = Query("csv", description="Export format: csv or ndjson"),
+    gzip: bool = Query(False, description="Gzip the response body"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+    student: Principal = Depends(get_current_principal)
+):
+    """
+    Stream the student's expenses as CSV or NDJSON, newest first.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be one of: csv, ndjson"
+        )
+
+    query = select(
+        Expense.id,
+        Expense.expense_date,
+        Expense.category_id,
+        Expense.custom_category,
+        Expense.amount,
+        Expense.is_additional,
+        Expense.notes,
+        Expense.created_at,
+    ).where(Expense.student_id == student.id)
+
+    if start_date:
+        query = query.where(Expense.expense_date >= start_date)
+
+    if end_date:
+        query = query.where(Expense.expense_date <= end_date)
+
+    query = query.order_by(Expense.expense_date.desc(), Expense.created_at.desc(), Expense.id.desc())
+
+    def to_values(row) -> tuple:
+        return (
+            row["id"],
+            row["expense_date"],
+            row["custom_category"] or category_registry.name(row["category_id"]),
+            row["amount"],
+            row["is_additional"],
+            row["notes"],
+            row["created_at"],
+        )
+
+    chunks = ExportService.stream_rows(query, EXPENSE_EXPORT_FIELDS, format, to_values, compress=gzip)
+    return ExportService.response(chunks, "expenses", format, compress=gzip)
+
+
 @router.get("/today", response_model=List[ExpenseResponse])
-def get_today_expenses(
+async def get_today_expenses(
     expense_date: Optional[date] = Query(None, description="Date to query (defaults to today)"),
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get expenses for a specific date (defaults to today).
@@ -295,11 +643,13 @@ def get_today_expenses(
     if expense_date is None:
         expense_date = date.today()
 
-    expenses = db.query(Expense).filter(
-        and_(
-            Expense.student_id == student.id,
-            Expense.expense_date == expense_date
-        )
-    ).order_by(Expense.created_at.desc()).all()
+    result = await db.execute(
+        select(Expense).options(joinedload(Expense.category)).where(
+            and_(
+                Expense.student_id == student.id,
+                Expense.expense_date == expense_date
+            )
+        ).order_by(Expense.created_at.desc())
+    )
 
-    return expenses
+    return result.scalars().all()
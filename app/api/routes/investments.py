@@ -1,13 +1,14 @@
 """
 API routes for investment management.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
-from app.database import get_db
-from app.auth.middleware import get_current_user
-from app.models.student import Student
-from app.models.investment import Investment
+from typing import Optional
+from app.database import get_async_db
+from app.auth.middleware import get_current_principal, Principal
+from app.models.investment import Investment, InvestmentTransaction
 from app.schemas.investment import (
     InvestmentCreate,
     InvestmentUpdate,
@@ -17,176 +18,246 @@ from app.schemas.investment import (
     InvestmentWithdrawRequest,
     InvestmentDepositRequest
 )
-from app.services.investment_service import InvestmentService
+from app.services.investment_service import InvestmentService, AsyncInvestmentService
+from app.services.news_sentiment import TOPICS
+from app.services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from app.services.post_write import AsyncPostWriteUpdates
 
 router = APIRouter(prefix="/investments", tags=["investments"])
 
 
+async def _get_investment(db: AsyncSession, student_id: int) -> Optional[Investment]:
+    """Return the student's investment account, if any."""
+    result = await db.execute(
+        select(Investment).where(Investment.student_id == student_id)
+    )
+    return result.scalars().first()
+
+
 @router.post("/", response_model=InvestmentResponse, status_code=status.HTTP_201_CREATED)
-def create_investment(
+async def create_investment(
     investment_data: InvestmentCreate,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new investment account for current student.
     """
     # Check if investment already exists
-    existing = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    existing = await _get_investment(db, student.id)
+
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Investment account already exists. Use update endpoint to modify."
         )
-    
-    investment = InvestmentService.create_investment(
+
+    investment = await AsyncInvestmentService.create_investment(
         db,
         student.id,
         investment_data.initial_balance,
         investment_data.monthly_interest_rate
     )
-    
+    await AsyncPostWriteUpdates.after_budget_change(student.id)
+
     return investment
 
 
 @router.get("/me", response_model=InvestmentResponse)
-def get_my_investment(
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_investment(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current student's investment account.
     """
-    investment = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    investment = await _get_investment(db, student.id)
+
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment account not found. Create one first."
         )
-    
+
     return investment
 
 
 @router.put("/me", response_model=InvestmentResponse)
-def update_investment(
+async def update_investment(
     investment_data: InvestmentUpdate,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update investment settings (e.g., interest rate).
     """
-    investment = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    investment = await _get_investment(db, student.id)
+
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment account not found"
         )
-    
+
     if investment_data.monthly_interest_rate is not None:
         investment.monthly_interest_rate = investment_data.monthly_interest_rate
-    
-    db.commit()
-    db.refresh(investment)
-    
+
+    await db.commit()
+    await db.refresh(investment)
+
     return investment
 
 
 @router.get("/me/summary", response_model=InvestmentSummaryResponse)
-def get_investment_summary(
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_investment_summary(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get comprehensive investment summary with transaction history.
     """
-    investment = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    investment = await _get_investment(db, student.id)
+
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment account not found"
         )
-    
-    return InvestmentService.get_investment_summary(db, investment)
+
+    return await AsyncInvestmentService.get_investment_summary(db, investment)
+
+
+TRANSACTION_EXPORT_FIELDS = (
+    "id", "transaction_type", "amount", "balance_before", "balance_after", "notes", "created_at",
+)
+
+
+@router.get("/me/transactions/export")
+async def export_transactions(
+    format: str = Query("csv", description="Export format: csv or ndjson"),
+    gzip: bool = Query(False, description="Gzip the response body"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream the investment transaction history as CSV or NDJSON, newest first.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be one of: csv, ndjson"
+        )
+
+    investment = await _get_investment(db, student.id)
+
+    if not investment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Investment account not found"
+        )
+    await db.release()
+
+    query = select(
+        *(getattr(InvestmentTransaction, field) for field in TRANSACTION_EXPORT_FIELDS)
+    ).where(
+        InvestmentTransaction.investment_id == investment.id
+    ).order_by(InvestmentTransaction.created_at.desc(), InvestmentTransaction.id.desc())
+
+    chunks = ExportService.stream_rows(
+        query,
+        TRANSACTION_EXPORT_FIELDS,
+        format,
+        lambda row: tuple(row[field] for field in TRANSACTION_EXPORT_FIELDS),
+        compress=gzip,
+    )
+    return ExportService.response(chunks, "investment-transactions", format, compress=gzip)
 
 
 @router.get("/me/market-news", response_model=MarketNewsResponse)
-def get_market_news(
+async def get_market_news(
     limit: int = 10,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    sentiment: Optional[str] = Query(None, description="Filter by sentiment: positive, negative or neutral"),
+    topic: Optional[str] = Query(None, description="Filter by topic, e.g. mutual_funds or fixed_income"),
+    sort: str = Query("recent", description="Sort order: recent, sentiment or -sentiment"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get live market news curated for mutual fund / fixed-deposit style investing.
     """
     # Authentication dependency ensures this endpoint is user-protected.
     _ = (student, db)
+    if sentiment is not None and sentiment not in {"positive", "negative", "neutral"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sentiment must be one of: positive, negative, neutral"
+        )
+    if topic is not None and topic not in TOPICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"topic must be one of: {', '.join(TOPICS)}"
+        )
+    if sort not in InvestmentService.NEWS_SORT_OPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sort must be one of: recent, sentiment, -sentiment"
+        )
     safe_limit = max(1, min(limit, 20))
-    return InvestmentService.get_market_news(limit=safe_limit)
+    return await AsyncInvestmentService.get_market_news(
+        limit=safe_limit,
+        sentiment=sentiment,
+        topic=topic,
+        sort=sort,
+    )
 
 
 @router.post("/me/deposit", response_model=InvestmentResponse)
-def deposit_to_investment(
+async def deposit_to_investment(
     deposit_data: InvestmentDepositRequest,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Deposit money into investment account.
     """
-    investment = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    investment = await _get_investment(db, student.id)
+
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment account not found"
         )
-    
-    investment = InvestmentService.deposit(
+
+    investment = await AsyncInvestmentService.deposit(
         db,
         investment,
         deposit_data.amount,
         deposit_data.notes
     )
-    
+    await AsyncPostWriteUpdates.after_budget_change(student.id)
+
     return investment
 
 
 @router.post("/me/withdraw", response_model=InvestmentResponse)
-def withdraw_from_investment(
+async def withdraw_from_investment(
     withdraw_data: InvestmentWithdrawRequest,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Withdraw money from investment account.
     """
-    investment = db.query(Investment).filter(
-        Investment.student_id == student.id
-    ).first()
-    
+    investment = await _get_investment(db, student.id)
+
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Investment account not found"
         )
-    
+
     try:
-        investment = InvestmentService.withdraw(
+        investment = await AsyncInvestmentService.withdraw(
             db,
             investment,
             withdraw_data.amount,
@@ -197,5 +268,6 @@ def withdraw_from_investment(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-    
+    await AsyncPostWriteUpdates.after_budget_change(student.id)
+
     return investment
@@ -2,45 +2,59 @@
 API routes for student management and budget operations.
 Student creation is handled by /auth/register — these routes manage budget & profile.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from datetime import date
 from decimal import Decimal
-from app.database import get_db
-from app.auth.middleware import get_current_user
+from app.database import get_async_db
+from app.auth.middleware import get_current_user, get_current_budget_user, get_current_principal, Principal
 from app.models.student import Student, StudentCategoryBudget
-from app.models.expense import ExpenseCategory
+from app.models.forecast import BudgetForecast
 from app.schemas.student import (
     StudentUpdate,
     StudentResponse,
     BudgetStatusResponse,
+    BudgetForecastResponse,
+    BudgetHistoryResponse,
+    DashboardDigestResponse,
+    SimulationResponse,
     CategoryBudgetResponse,
     BudgetSetupRequest,
     BudgetSetupResponse,
 )
-from app.services.budget_service import BudgetService
+from app.services.budget_service import AsyncBudgetService
+from app.services.category_registry import category_registry
+from app.services.simulation_service import SimulationService
+from app.services.spend_history import AsyncSpendHistory
+from app.services.budget_history import AsyncBudgetHistoryService
+from app.services.dashboard_digest import AsyncDashboardDigestService
+from app.services.post_write import AsyncPostWriteUpdates
+from app.config import settings
 
 router = APIRouter(prefix="/students", tags=["students"])
 
 
 @router.get("/me", response_model=StudentResponse)
-def get_current_student_info(
+async def get_current_student_info(
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current authenticated student's information.
     """
     # Update remaining budget before returning
-    BudgetService.update_remaining_budget(db, student)
+    await AsyncBudgetService.update_remaining_budget(db, student)
     return student
 
 
 @router.put("/me", response_model=StudentResponse)
-def update_student_info(
+async def update_student_info(
     student_data: StudentUpdate,
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update current student's information.
@@ -66,55 +80,132 @@ def update_student_info(
     if student_data.budget_setup_complete is not None:
         student.budget_setup_complete = student_data.budget_setup_complete
 
-    db.commit()
-    db.refresh(student)
+    await db.commit()
+    await db.refresh(student)
+    await AsyncPostWriteUpdates.after_budget_change(student.id)
     return student
 
 
 @router.get("/me/budget-status", response_model=BudgetStatusResponse)
-def get_budget_status(
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_budget_status(
+    as_of: Optional[date] = Query(None, description="Past date to report the status as of (default: now)"),
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get comprehensive budget status including health metrics.
+
+    With as_of, returns the status at the end of that day, computed from
+    the stored cumulative daily spend.
+    """
+    if as_of is None:
+        return await AsyncBudgetService.get_budget_status(db, student)
+
+    if as_of > date.today():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="as_of must not be in the future"
+        )
+    return await AsyncSpendHistory.get_budget_status(db, student, as_of)
+
+
+@router.get("/me/history", response_model=BudgetHistoryResponse)
+async def get_budget_history(
+    months: int = Query(12, ge=1, le=120, description="Number of months, newest first"),
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get month-over-month budget vs spending, served from the monthly snapshots.
+    """
+    snapshots = await AsyncBudgetHistoryService.get_history(db, student.id, months)
+    return BudgetHistoryResponse(student_id=student.id, months=snapshots)
+
+
+@router.get("/me/dashboard", response_model=DashboardDigestResponse)
+async def get_dashboard(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get everything the dashboard shows on first load (budget status, today's
+    checklist, top categories, forecast, unread alerts) from the student's
+    precomputed digest.
+    """
+    return await AsyncDashboardDigestService.get(db, student.id)
+
+
+@router.get("/me/forecast", response_model=BudgetForecastResponse)
+async def get_budget_forecast(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    return BudgetService.get_budget_status(db, student)
+    Get the latest month-end forecast (computed by the nightly batch).
+    """
+    forecast = await db.get(BudgetForecast, student.id)
+
+    if not forecast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No forecast available yet"
+        )
+
+    return forecast
+
+
+@router.get("/me/simulate", response_model=SimulationResponse)
+async def simulate_month_end(
+    paths: int = Query(settings.SIMULATION_DEFAULT_PATHS, ge=100, le=settings.SIMULATION_MAX_PATHS, description="Trajectories to simulate"),
+    student: Student = Depends(get_current_budget_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Simulate the rest of the budget cycle from the student's own spending history.
+
+    Returns percentile bands of the remaining budget per day and the
+    probability of running out before the cycle ends.
+    """
+    return await SimulationService.simulate_month_end(db, student, paths, release=db.release)
 
 
 @router.post("/me/reset-budget", response_model=StudentResponse)
-def reset_monthly_budget(
+async def reset_monthly_budget(
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Reset monthly budget for new month.
     Creates a snapshot of previous month and resets budget.
     """
-    return BudgetService.reset_monthly_budget(db, student)
+    student = await AsyncBudgetService.reset_monthly_budget(db, student)
+    await AsyncPostWriteUpdates.after_dashboard_change(student.id)
+    return student
 
 
 # --- Category Budget Endpoints ---
 
 @router.get("/me/category-budgets", response_model=List[CategoryBudgetResponse])
-def get_category_budgets(
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_category_budgets(
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all category budgets for the current student.
     """
-    budgets = db.query(StudentCategoryBudget).filter(
-        StudentCategoryBudget.student_id == student.id
-    ).all()
-    return budgets
+    result = await db.execute(
+        select(StudentCategoryBudget).options(joinedload(StudentCategoryBudget.category)).where(
+            StudentCategoryBudget.student_id == student.id
+        )
+    )
+    return result.scalars().all()
 
 
 @router.post("/me/budget-setup", response_model=BudgetSetupResponse)
-def setup_budget(
+async def setup_budget(
     setup_data: BudgetSetupRequest,
     student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Complete budget setup - sets monthly budget and per-category daily budgets.
@@ -127,19 +218,15 @@ def setup_budget(
     student.budget_setup_complete = True
 
     # Delete existing category budgets
-    db.query(StudentCategoryBudget).filter(
-        StudentCategoryBudget.student_id == student.id
-    ).delete()
+    await db.execute(
+        delete(StudentCategoryBudget).where(StudentCategoryBudget.student_id == student.id)
+    )
 
     # Create new category budgets
     created_budgets = []
     for item in setup_data.category_budgets:
         # Verify category exists
-        category = db.query(ExpenseCategory).filter(
-            ExpenseCategory.id == item.category_id
-        ).first()
-
-        if not category:
+        if category_registry.get(item.category_id) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category {item.category_id} not found"
@@ -154,42 +241,45 @@ def setup_budget(
         db.add(cat_budget)
         created_budgets.append(cat_budget)
 
-    db.commit()
-    db.refresh(student)
+    await db.commit()
+    await db.refresh(student)
+    await AsyncPostWriteUpdates.after_budget_change(student.id)
 
-    # Refresh all budgets
-    for budget in created_budgets:
-        db.refresh(budget)
+    # Reload the new budgets with their categories
+    result = await db.execute(
+        select(StudentCategoryBudget).options(joinedload(StudentCategoryBudget.category)).where(
+            StudentCategoryBudget.id.in_([budget.id for budget in created_budgets])
+        ).order_by(StudentCategoryBudget.id)
+    )
 
     return BudgetSetupResponse(
         student=student,
-        category_budgets=created_budgets
+        category_budgets=result.scalars().all()
     )
 
 
 @router.put("/me/category-budgets/{category_id}", response_model=CategoryBudgetResponse)
-def update_category_budget(
+async def update_category_budget(
     category_id: int,
     daily_budget: Decimal,
     is_active: bool = True,
-    student: Student = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    student: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a specific category budget.
     """
-    cat_budget = db.query(StudentCategoryBudget).filter(
-        StudentCategoryBudget.student_id == student.id,
-        StudentCategoryBudget.category_id == category_id
-    ).first()
+    result = await db.execute(
+        select(StudentCategoryBudget).where(
+            StudentCategoryBudget.student_id == student.id,
+            StudentCategoryBudget.category_id == category_id
+        )
+    )
+    cat_budget = result.scalars().first()
 
     if not cat_budget:
         # Create new if doesn't exist
-        category = db.query(ExpenseCategory).filter(
-            ExpenseCategory.id == category_id
-        ).first()
-
-        if not category:
+        if category_registry.get(category_id) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category {category_id} not found"
@@ -206,6 +296,8 @@ def update_category_budget(
         cat_budget.daily_budget = daily_budget
         cat_budget.is_active = is_active
 
-    db.commit()
-    db.refresh(cat_budget)
+    await db.commit()
+    await db.refresh(cat_budget)
+    await db.refresh(cat_budget, ["category"])
+    await AsyncPostWriteUpdates.after_dashboard_change(student.id)
     return cat_budget
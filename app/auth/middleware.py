@@ -2,78 +2,228 @@
 Local JWT authentication middleware.
 Verifies JWT tokens signed by our backend and extracts user information.
 """
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from typing import Optional
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, AsyncSessionLocal, SessionLocal
 from app.models.student import Student
+from app.auth.token_cache import TokenCache
+from app.auth.revocation import RevocationList
 
 security = HTTPBearer()
 
+# Verified payloads keyed by token digest, shared by all requests in this worker
+token_cache = TokenCache(maxsize=settings.JWT_CACHE_SIZE)
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """
-    Verify local JWT token and return decoded payload.
+# Revoked tokens (Bloom filter, synced from the revoked_tokens table)
+revocation_list = RevocationList(
+    SessionLocal,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    sync_seconds=settings.REVOCATION_SYNC_SECONDS,
+    confirmed_size=settings.REVOCATION_CONFIRMED_CACHE_SIZE,
+)
 
-    Args:
-        credentials: HTTP Bearer token from request header
+# Student ids recently confirmed to exist: {student_id: expires_at (monotonic)},
+# least recently used first and bounded by STUDENT_EXISTS_CACHE_SIZE
+_known_students: OrderedDict[int, float] = OrderedDict()
+_known_students_lock = threading.Lock()
 
-    Returns:
-        Decoded JWT payload with user information
+# Columns loaded for the current user by default (password_hash is only
+# needed by login, which queries by email itself)
+STUDENT_PROFILE_COLUMNS = (
+    Student.id,
+    Student.email,
+    Student.name,
+    Student.monthly_budget,
+    Student.budget_start_date,
+    Student.remaining_budget,
+    Student.budget_setup_complete,
+    Student.created_at,
+    Student.updated_at,
+)
 
-    Raises:
-        HTTPException: If token is invalid or expired
+# Columns needed by budget recalculation and AI rule evaluation
+STUDENT_BUDGET_COLUMNS = (
+    Student.id,
+    Student.monthly_budget,
+    Student.budget_start_date,
+    Student.remaining_budget,
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated student identity built from JWT claims alone."""
+    id: int
+
+
+def decode_token(token: str, token_type: str = "access") -> dict:
     """
-    token = credentials.credentials
+    Verify a JWT signature and claims without consulting caches.
 
+    Raises:
+        HTTPException: If token is invalid, expired or of the wrong type
+    """
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET,
             algorithms=[settings.JWT_ALGORITHM],
         )
-
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user ID"
-            )
-
-        return payload
-
     except JWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid or expired token: {str(e)}"
         )
 
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: missing user ID"
+        )
+
+    if payload.get("typ") != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type"
+        )
 
-def get_current_user(
-    payload: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
-) -> Student:
+    return payload
+
+
+def _verified_payload(token: str) -> dict:
+    """Return the verified payload for a token, using the verification cache."""
+    # Repeat requests with the same token skip signature verification
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        token_cache.put(token, payload)
+    return payload
+
+
+def _revoked() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked"
+    )
+
+
+def authenticate_token(token: str) -> dict:
     """
-    Get current authenticated student from database.
+    Synchronously verify an access token (signature, expiry, revocation).
+
+    Raises:
+        HTTPException: If token is invalid, expired or revoked
+    """
+    payload = _verified_payload(token)
+    if revocation_list.is_revoked(payload):
+        raise _revoked()
+    return payload
+
+
+async def is_token_revoked(payload: dict) -> bool:
+    """Revocation check that does not block the event loop."""
+    # In-memory Bloom filter check; only a filter hit needs the database
+    revoked = revocation_list.check(payload)
+    if revoked is None:
+        revoked = await run_in_threadpool(revocation_list.confirm, payload["jti"])
+    return revoked
+
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """
+    Verify local JWT access token and return decoded payload.
 
     Args:
-        payload: Decoded JWT payload
-        db: Database session
+        credentials: HTTP Bearer token from request header
 
     Returns:
-        Student model instance
+        Decoded JWT payload with user information
+
+    Raises:
+        HTTPException: If token is invalid, expired or revoked
+    """
+    payload = _verified_payload(credentials.credentials)
+
+    if await is_token_revoked(payload):
+        raise _revoked()
+
+    return payload
+
+
+async def _student_exists(student_id: int) -> bool:
+    """
+    Check that a student exists, served from a short-TTL cache when possible.
+
+    A miss runs on a short session of its own, so the connection is back in
+    the pool before the handler runs and the request's session is untouched.
+    """
+    now = time.monotonic()
+    with _known_students_lock:
+        expires_at = _known_students.get(student_id)
+        if expires_at is not None:
+            if expires_at > now:
+                _known_students.move_to_end(student_id)
+                return True
+            del _known_students[student_id]
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Student.id).where(Student.id == student_id))
+        exists = result.first() is not None
+    if exists and settings.STUDENT_EXISTS_CACHE_SIZE > 0:
+        with _known_students_lock:
+            _known_students[student_id] = now + settings.STUDENT_EXISTS_TTL_SECONDS
+            _known_students.move_to_end(student_id)
+            while len(_known_students) > settings.STUDENT_EXISTS_CACHE_SIZE:
+                _known_students.popitem(last=False)
+    return exists
+
+
+def forget_student(student_id: int) -> None:
+    """Drop a student from the existence cache (e.g. after account removal)."""
+    with _known_students_lock:
+        _known_students.pop(student_id, None)
+
+
+async def get_current_principal(payload: dict = Depends(verify_token)) -> Principal:
+    """
+    Get the authenticated student's identity without loading the Student row.
+
+    Use this for endpoints that only need the student id. The existence
+    check is cached, so repeat requests do not touch the database.
 
     Raises:
         HTTPException: If student not found
     """
     student_id = int(payload.get("sub"))
 
-    student = db.query(Student).filter(
-        Student.id == student_id
-    ).first()
+    if not await _student_exists(student_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student account not found."
+        )
+
+    return Principal(id=student_id)
+
+
+async def _load_student(db: AsyncSession, student_id: int, columns: tuple) -> Student:
+    """Load a student with only the given columns, or raise 404."""
+    result = await db.execute(
+        select(Student).options(load_only(*columns)).where(Student.id == student_id)
+    )
+    student = result.scalars().first()
 
     if not student:
         raise HTTPException(
@@ -84,11 +234,53 @@ def get_current_user(
     return student
 
 
-def get_optional_user(
+async def get_current_user(
+    payload: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+) -> Student:
+    """
+    Get current authenticated student from database.
+
+    Only the profile and budget columns are loaded (everything except
+    password_hash).
+
+    Args:
+        payload: Decoded JWT payload
+        db: Database session
+
+    Returns:
+        Student model instance
+
+    Raises:
+        HTTPException: If student not found
+    """
+    return await _load_student(db, int(payload.get("sub")), STUDENT_PROFILE_COLUMNS)
+
+
+def current_user_with(*columns):
+    """
+    Build a dependency that loads the current student with a column projection.
+
+    Columns outside the projection are not loaded and must not be accessed
+    outside ``AsyncSession.run_sync``.
+
+    Example:
+        student: Student = Depends(current_user_with(Student.id, Student.monthly_budget))
+    """
+    async def dependency(
+        payload: dict = Depends(verify_token),
+        db: AsyncSession = Depends(get_async_db)
+    ) -> Student:
+        return await _load_student(db, int(payload.get("sub")), columns)
+
+    return dependency
+
+
+async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(
         HTTPBearer(auto_error=False)
     ),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[Student]:
     """
     Get current user if authenticated, otherwise return None.
@@ -98,11 +290,16 @@ def get_optional_user(
         return None
 
     try:
-        payload = verify_token(credentials)
-        student_id = int(payload.get("sub"))
-        student = db.query(Student).filter(
-            Student.id == student_id
-        ).first()
-        return student
+        payload = await verify_token(credentials)
+        result = await db.execute(
+            select(Student).options(load_only(*STUDENT_PROFILE_COLUMNS)).where(
+                Student.id == int(payload.get("sub"))
+            )
+        )
+        return result.scalars().first()
     except HTTPException:
         return None
+
+
+# Current student with only the budget columns loaded
+get_current_budget_user = current_user_with(*STUDENT_BUDGET_COLUMNS)
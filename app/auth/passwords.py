@@ -0,0 +1,92 @@
+"""
+Password hashing on a dedicated, bounded process pool.
+
+bcrypt is deliberately slow. Running it in the request threadpool lets a
+burst of logins occupy every anyio worker thread and starve unrelated
+endpoints. Hashing is therefore submitted to a small process pool, awaited
+without holding a thread, and admission is capped so excess work is
+rejected immediately instead of queueing without bound.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+from app.config import settings
+
+# Password hashing context (also used inside pool workers)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def _init_worker() -> None:
+    """Run bcrypt at lower CPU priority than request handling."""
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt hash/verify."""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Jobs allowed in flight: one per worker plus the waiting queue
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password."""
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password against its hash."""
+        return await self._run(_verify, password, password_hash)
+
+    def shutdown(self) -> None:
+        """Stop pool workers."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
@@ -0,0 +1,254 @@
+"""
+Token revocation backed by an in-memory Bloom filter.
+
+Revoked token ids live in the small revoked_tokens table. Each worker keeps
+a Bloom filter of the unexpired ids, so checking a token on every request
+is a pure in-memory test; only the rare filter hit is confirmed against the
+database. Student-wide revocations (password change) are few and kept as an
+exact in-memory map of cut-off times.
+
+Workers stay in sync by polling a cheap (count, max id) version of the
+table and rebuilding the filter when it changes. Revocations made by this
+worker take effect locally at once.
+"""
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.revoked_token import RevokedToken
+
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes from the driver as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Per-worker view of revoked tokens."""
+
+    def __init__(
+        self,
+        session_factory,
+        capacity: int,
+        error_rate: float,
+        sync_seconds: float,
+        confirmed_size: int = 4096,
+    ):
+        self._session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.confirmed_size = confirmed_size
+
+        self._filter = BloomFilter(capacity, error_rate)
+        self._student_cutoffs: dict[int, float] = {}
+        # Confirmed filter hits {jti: revoked}, least recently used first
+        self._confirmed: OrderedDict[str, bool] = OrderedDict()
+        self._version: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    # --- Checks (request path) ---
+
+    def check(self, payload: dict) -> Optional[bool]:
+        """
+        In-memory revocation check.
+
+        Returns True/False when the answer is certain, or None when the jti
+        hit the Bloom filter and must be confirmed with confirm().
+        """
+        cutoff = self._student_cutoffs.get(int(payload["sub"]))
+        if cutoff is not None and payload.get("iat", 0) < cutoff:
+            return True
+
+        jti = payload.get("jti")
+        if not jti or jti not in self._filter:
+            return False
+
+        self.filter_hits += 1
+        with self._lock:
+            confirmed = self._confirmed.get(jti)
+            if confirmed is not None:
+                self._confirmed.move_to_end(jti)
+        return confirmed
+
+    def confirm(self, jti: str) -> bool:
+        """Confirm a Bloom filter hit against the database and remember it."""
+        confirmed = self._confirm(jti)
+        with self._lock:
+            self._remember(jti, confirmed)
+        if not confirmed:
+            self.false_positives += 1
+        return confirmed
+
+    def _remember(self, jti: str, revoked: bool) -> None:
+        """Cache a confirmed answer, evicting the least recently used (lock held)."""
+        if self.confirmed_size <= 0:
+            return
+        self._confirmed[jti] = revoked
+        self._confirmed.move_to_end(jti)
+        while len(self._confirmed) > self.confirmed_size:
+            self._confirmed.popitem(last=False)
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Return True if the token has been revoked."""
+        revoked = self.check(payload)
+        if revoked is None:
+            revoked = self.confirm(payload["jti"])
+        return revoked
+
+    def _confirm(self, jti: str) -> bool:
+        """Confirm a Bloom filter hit against the database."""
+        db = self._session_factory()
+        try:
+            return db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+        finally:
+            db.close()
+
+    # --- Revocation (write path) ---
+
+    def revoke_token(self, db, jti: str, student_id: int, expires_at: datetime) -> bool:
+        """
+        Revoke a single token until its expiry.
+
+        The insert and the already-revoked check are one statement, so of
+        two concurrent calls for the same token exactly one returns True.
+
+        Returns:
+            True if this call revoked the token, False if it already was
+        """
+        inserted = db.execute(
+            pg_insert(RevokedToken)
+            .values(jti=jti, student_id=student_id, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            .returning(RevokedToken.id)
+        ).first() is not None
+        db.commit()
+        with self._lock:
+            self._filter.add(jti)
+            self._remember(jti, True)
+        return inserted
+
+    def revoke_student(self, db, student_id: int, expires_at: datetime) -> None:
+        """Revoke every token issued to a student before now."""
+        revoked_at = datetime.now(timezone.utc)
+        db.add(RevokedToken(
+            jti=None,
+            student_id=student_id,
+            revoked_at=revoked_at,
+            expires_at=expires_at,
+        ))
+        db.commit()
+        with self._lock:
+            self._student_cutoffs[student_id] = revoked_at.timestamp()
+
+    # --- Synchronisation ---
+
+    def _current_version(self, db) -> tuple:
+        return tuple(db.query(func.count(RevokedToken.id), func.max(RevokedToken.id)).one())
+
+    def rebuild(self) -> None:
+        """Rebuild the filter and cut-offs from unexpired revocations."""
+        now = datetime.now(timezone.utc)
+        db = self._session_factory()
+        try:
+            version = self._current_version(db)
+            rows = db.query(
+                RevokedToken.jti, RevokedToken.student_id, RevokedToken.revoked_at
+            ).filter(RevokedToken.expires_at > now).all()
+        finally:
+            db.close()
+
+        jtis = [row.jti for row in rows if row.jti]
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+
+        cutoffs: dict[int, float] = {}
+        for row in rows:
+            if row.jti is None:
+                cutoff = _as_utc(row.revoked_at).timestamp()
+                cutoffs[row.student_id] = max(cutoffs.get(row.student_id, 0), cutoff)
+
+        with self._lock:
+            self._filter = bloom
+            self._student_cutoffs = cutoffs
+            self._confirmed = OrderedDict()
+            self._version = version
+        logger.info(f"Revocation filter rebuilt: {len(jtis)} tokens, {len(cutoffs)} students")
+
+    def sync(self) -> None:
+        """Rebuild if another worker changed the revocation table."""
+        db = self._session_factory()
+        try:
+            version = self._current_version(db)
+        finally:
+            db.close()
+        if version != self._version:
+            self.rebuild()
+
+    def start(self) -> None:
+        """Load the filter and start the background sync thread."""
+        self.rebuild()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="revocation-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sync thread."""
+        self._stop.set()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_seconds):
+            try:
+                self.sync()
+            except Exception as exc:
+                logger.warning(f"Revocation sync failed: {exc}")
+
+    def stats(self) -> dict:
+        """Return filter metrics."""
+        return {
+            "filter_bits": self._filter.size,
+            "hash_count": self._filter.hash_count,
+            "revoked_students": len(self._student_cutoffs),
+            "confirmed_cached": len(self._confirmed),
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
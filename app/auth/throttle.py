@@ -0,0 +1,60 @@
+"""
+In-memory sliding-window rate limiting for authentication endpoints.
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class SlidingWindowLimiter:
+    """Allow at most ``limit`` events per key within ``window_seconds``."""
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100_000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, events: deque, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+    def retry_after(self, key: str) -> Optional[float]:
+        """Return seconds until ``key`` may try again, or None if allowed now."""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return None
+            self._prune(events, now)
+            if len(events) < self.limit:
+                return None
+            return events[0] + self.window_seconds - now
+
+    def hit(self, key: str) -> None:
+        """Record an event for ``key``."""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                if len(self._events) >= self.max_keys:
+                    self._evict_idle(now)
+                events = self._events[key] = deque()
+            self._prune(events, now)
+            events.append(now)
+
+    def reset(self, key: str) -> None:
+        """Forget all events for ``key``."""
+        with self._lock:
+            self._events.pop(key, None)
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop keys with no events left in the window (lock held)."""
+        for key in list(self._events):
+            events = self._events[key]
+            self._prune(events, now)
+            if not events:
+                del self._events[key]
@@ -15,11 +15,87 @@ class Settings(BaseSettings):
 
     # Database Configuration
     DATABASE_URL: str
+    # Named engine pools; each has its own size and statement timeout (0 = none)
+    DB_POOL_SIZE: int = 10  # api: interactive requests
+    DB_MAX_OVERFLOW: int = 20
+    DB_STATEMENT_TIMEOUT_MS: int = 5_000
+    DB_ANALYTICS_POOL_SIZE: int = 2  # analytics: reports and exports
+    DB_ANALYTICS_MAX_OVERFLOW: int = 2
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS: int = 30_000
+    DB_BATCH_POOL_SIZE: int = 2  # batch: scripts, jobs and seeding
+    DB_BATCH_MAX_OVERFLOW: int = 3
+    DB_BATCH_STATEMENT_TIMEOUT_MS: int = 600_000
 
     # JWT Configuration (local auth)
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
-    JWT_EXPIRATION_HOURS: int = 24 * 7  # 7 days
+    JWT_EXPIRATION_HOURS: int = 24 * 7  # Refresh token lifetime: 7 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # Short-lived access tokens
+    JWT_CACHE_SIZE: int = 4096  # Verified tokens kept in memory (0 disables)
+    STUDENT_EXISTS_TTL_SECONDS: int = 60  # How long a confirmed student id is trusted
+    STUDENT_EXISTS_CACHE_SIZE: int = 4096  # Confirmed student ids kept in memory (0 disables)
+
+    # Token revocation (Bloom filter per worker, synced from the database)
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    REVOCATION_CONFIRMED_CACHE_SIZE: int = 4096  # Confirmed filter hits kept in memory (0 disables)
+
+    # Password hashing pool and auth throttling
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt worker processes
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32  # Jobs allowed to wait before rejecting with 503
+    AUTH_IP_ATTEMPTS: int = 30  # Login/register attempts per IP per window
+    AUTH_IP_WINDOW_SECONDS: int = 60
+    LOGIN_EMAIL_FAILURES: int = 5  # Failed logins per email per window
+    LOGIN_EMAIL_WINDOW_SECONDS: int = 300
+
+    # In-memory category/template registry
+    CATEGORY_REGISTRY_REFRESH_SECONDS: float = 300.0  # Cross-worker change check interval
+    CATEGORIES_CACHE_MAX_AGE_SECONDS: int = 300  # Cache-Control max-age for /expenses/categories
+
+    # Bulk expense ingestion (/expenses/batch, /expenses/import)
+    EXPENSE_IMPORT_MAX_ROWS: int = 100_000
+    EXPENSE_IMPORT_CHUNK_SIZE: int = 1_000  # Rows validated and inserted per statement
+    EXPENSE_IMPORT_MAX_ERRORS: int = 1_000  # Row errors listed in the response
+
+    # Nightly budget forecasts
+    FORECAST_HISTORY_DAYS: int = 56  # Spending history per student (8 weeks)
+    FORECAST_HALFLIFE_DAYS: float = 7.0  # EWMA half-life of the daily spend rate
+    FORECAST_SEASONALITY_PRIOR_DAYS: float = 2.0  # Shrinks weekday factors toward 1 for sparse history
+    FORECAST_WORKERS: int = 2  # Processes in the nightly batch
+    FORECAST_SHARD_SIZE: int = 5_000  # Students per worker task
+
+    # Spending spike detection (per-category rolling z-score)
+    SPIKE_Z_THRESHOLD: float = 3.0  # Flag a day this many standard deviations above the mean
+    SPIKE_MIN_DAYS: int = 5  # Spending days of history needed before flagging
+    SPIKE_STD_FLOOR_RATIO: float = 0.1  # Minimum std as a fraction of the mean (steady spenders)
+    SPIKE_WINDOW_DAYS: int = 90  # History the nightly backfill rebuilds statistics from
+    SPIKE_ALERT_LOOKBACK_DAYS: int = 1  # Only days this recent raise alerts
+    SPIKE_BACKFILL_SHARD_SIZE: int = 5_000  # Students per backfill query
+
+    # Per-category daily limit rules (StudentCategoryBudget.daily_budget)
+    CATEGORY_DAILY_BREACH_RATIO: float = 1.0  # Today's spend above this x daily limit
+    CATEGORY_WEEK_OVERRUN_RATIO: float = 1.1  # Week-to-date spend above this x (limit x days so far)
+    CATEGORY_UNDERUSE_DAYS: int = 14  # Look-back for the under-use rule
+    CATEGORY_UNDERUSE_RATIO: float = 0.5  # Spend below this x (limit x days) counts as under-use
+
+    # Month-end Monte Carlo simulation (/students/me/simulate)
+    SIMULATION_HISTORY_DAYS: int = 60  # Daily spend history sampled from
+    SIMULATION_DEFAULT_PATHS: int = 5_000
+    SIMULATION_MAX_PATHS: int = 20_000
+    SIMULATION_CPU_BUDGET_MS: int = 250  # CPU time per request; fewer paths are simulated past it
+    SIMULATION_CACHE_SIZE: int = 1_024  # Memoized results per worker
+
+    # Dashboard digest
+    DIGEST_SHARD_SIZE: int = 2_000  # Students per batch in the nightly digest task
+    DIGEST_TOP_CATEGORIES: int = 5
+
+    # Year spending heatmap
+    HEATMAP_CACHE_SIZE: int = 4_096  # Cached (student, year) heatmaps per worker
+
+    # Peer spending percentiles (quantile sketches)
+    SKETCH_RELATIVE_ACCURACY: float = 0.01  # Quantiles within 1% of an actual amount
+    SKETCH_FLUSH_SECONDS: float = 10.0  # How often workers merge buffered amounts into the database
 
     # Application Settings
     APP_NAME: str = "Smart Student Expense & Budget System"
@@ -35,6 +111,12 @@ class Settings(BaseSettings):
     # MarketAux Market News Configuration
     MARKETAUX_API_TOKEN: str = ""
 
+    # Finnhub Market News Configuration (optional second provider)
+    FINNHUB_API_KEY: str = ""
+
+    # Per-provider timeout for market news fan-out
+    NEWS_PROVIDER_TIMEOUT_SECONDS: float = 8.0
+
     class Config:
         env_file = str(_ENV_FILE)
         case_sensitive = True
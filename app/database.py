@@ -1,28 +1,283 @@
 """
 Database connection and session management.
 Uses SQLAlchemy for PostgreSQL connection pooling.
+
+Work is split across named engines, each with its own pool and statement
+timeout, so one kind of load cannot starve another:
+
+- api: async engine (asyncpg) for interactive requests, via get_async_db
+- analytics: async engine for reports and exports, via get_analytics_db
+- batch: sync engine (psycopg2) for scripts, jobs, seeding and table creation
 """
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG,  # Log SQL queries in debug mode
+
+class PoolMetrics:
+    """Checkout wait, hold time and overflow usage for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sessions = 0
+        self.sessions_used = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def attach(self, sync_engine) -> None:
+        """Listen to checkout/checkin events on an engine's pool."""
+        self._engine = sync_engine
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        pool = self._engine.pool
+        overflow = max(0, pool.checkedout() - pool.size())
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if overflow:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        held = time.perf_counter() - checked_out_at if checked_out_at is not None else 0.0
+        with self._lock:
+            self.checked_out -= 1
+            self.hold_seconds += held
+            self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def stats(self) -> dict:
+        """Return pool usage for this engine."""
+        pool = self._engine.pool
+        checkouts = self.checkouts or 1
+        return {
+            "pool_size": pool.size(),
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds / checkouts * 1000, 3),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "avg_hold_ms": round(self.hold_seconds / checkouts * 1000, 3),
+            "max_hold_ms": round(self.max_hold_seconds * 1000, 3),
+            "overflow_checkouts": self.overflow_checkouts,
+            "peak_overflow": self.peak_overflow,
+            "sessions": self.sessions,
+            "sessions_used": self.sessions_used,
+            "checkouts_per_session": round(self.checkouts / self.sessions, 4) if self.sessions else 0.0,
+        }
+
+
+# Metrics per named engine, looked up by the pool's logging name
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        metrics = pool_metrics.get(self.logging_name)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            if metrics is not None:
+                metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if metrics is not None:
+            metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool with checkout wait metrics (sync engines)."""
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait metrics (asyncio engines)."""
+
+
+def _async_database_url(url: str) -> str:
+    """Return DATABASE_URL with its driver swapped for the asyncio one."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def _connect_args(statement_timeout_ms: int, is_async: bool) -> dict:
+    """Driver arguments applying a server-side statement timeout (PostgreSQL only)."""
+    if not statement_timeout_ms or make_url(settings.DATABASE_URL).get_backend_name() != "postgresql":
+        return {}
+    if is_async:
+        return {"server_settings": {"statement_timeout": str(statement_timeout_ms)}}
+    return {"options": f"-c statement_timeout={statement_timeout_ms}"}
+
+
+def _create_named_engine(
+    name: str,
+    pool_size: int,
+    max_overflow: int,
+    statement_timeout_ms: int,
+    is_async: bool,
+):
+    """Create an engine with its own pool, statement timeout and metrics."""
+    options = dict(
+        pool_pre_ping=True,  # Verify connections before using
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_logging_name=name,
+        connect_args=_connect_args(statement_timeout_ms, is_async),
+        echo=settings.DEBUG,  # Log SQL queries in debug mode
+    )
+    if is_async:
+        new_engine = create_async_engine(
+            _async_database_url(settings.DATABASE_URL),
+            poolclass=TimedAsyncQueuePool,
+            **options,
+        )
+        sync_engine = new_engine.sync_engine
+    else:
+        new_engine = sync_engine = create_engine(
+            settings.DATABASE_URL,
+            poolclass=TimedQueuePool,
+            **options,
+        )
+
+    metrics = pool_metrics[name] = PoolMetrics(name)
+    metrics.attach(sync_engine)
+    return new_engine
+
+
+# Interactive API requests
+api_engine = _create_named_engine(
+    "api",
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+    is_async=True,
+)
+
+# Reports and exports; a slow query here cannot hold API connections
+analytics_engine = _create_named_engine(
+    "analytics",
+    pool_size=settings.DB_ANALYTICS_POOL_SIZE,
+    max_overflow=settings.DB_ANALYTICS_MAX_OVERFLOW,
+    statement_timeout_ms=settings.DB_ANALYTICS_STATEMENT_TIMEOUT_MS,
+    is_async=True,
+)
+
+# Scripts, scheduled jobs, seeding and table creation
+engine = _create_named_engine(
+    "batch",
+    pool_size=settings.DB_BATCH_POOL_SIZE,
+    max_overflow=settings.DB_BATCH_MAX_OVERFLOW,
+    statement_timeout_ms=settings.DB_BATCH_STATEMENT_TIMEOUT_MS,
+    is_async=False,
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit; async sessions cannot lazily refresh them
+AsyncSessionLocal = async_sessionmaker(
+    bind=api_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+AnalyticsSessionLocal = async_sessionmaker(
+    bind=analytics_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
 
+class LazyAsyncSession:
+    """
+    AsyncSession stand-in that opens the real session on first use.
+
+    Handlers and dependencies that never run a statement (cached lookups,
+    endpoints that only need authentication) never create a session or
+    check out a connection. The request's handler may release() the
+    connection before slow work that needs no database; close() is for
+    the dependency's teardown.
+    """
+
+    __slots__ = ("_factory", "_metrics", "_session")
+
+    def __init__(self, factory, metrics: PoolMetrics):
+        self._factory = factory
+        self._metrics = metrics
+        self._session = None
+        metrics.sessions += 1
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._factory()
+            self._metrics.sessions_used += 1
+        return getattr(self._session, name)
+
+    async def release(self) -> None:
+        """
+        Return the connection to the pool mid-request, keeping the session.
+
+        Ends the current read-only transaction with a commit, so objects
+        already loaded stay attached and usable (expire_on_commit=False);
+        the next statement checks out a connection in a new transaction.
+        Only the handler that owns the request's session may call this:
+        dependencies and services share the session and must not end its
+        transaction.
+
+        Raises:
+            RuntimeError: If the session has unflushed changes
+        """
+        session = self._session
+        if session is None:
+            return
+        if session.new or session.dirty or session.deleted:
+            raise RuntimeError("Cannot release a session with pending changes; commit them first")
+        await session.commit()
+
+    async def close(self) -> None:
+        """Close the real session (if any), releasing its connection."""
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+
 def get_db():
     """
     Dependency function for FastAPI to get database session.
@@ -33,3 +288,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency function for FastAPI to get an async database session.
+
+    The session is lazy: no connection is checked out until the first
+    statement runs. Ensures proper session cleanup after request.
+    """
+    db = LazyAsyncSession(AsyncSessionLocal, pool_metrics["api"])
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_analytics_db():
+    """
+    Dependency function for FastAPI to get a lazy async session on the
+    analytics engine (reports and exports).
+    """
+    db = LazyAsyncSession(AnalyticsSessionLocal, pool_metrics["analytics"])
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -4,8 +4,14 @@ Main FastAPI application entry point.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, api_engine, analytics_engine, pool_metrics, Base
 from app.api.routes import students, expenses, investments, ai, auth, chatbot
+from app.auth.middleware import token_cache, revocation_list
+from app.auth.passwords import password_hasher
+from app.services.category_registry import category_registry
+from app.services.spending_sketches import spending_sketches
+from app.services.simulation_service import simulation_cache
+from app.services.analytics_service import heatmap_cache
 
 # Import all models so SQLAlchemy knows about them
 from app.models import (
@@ -13,8 +19,21 @@ from app.models import (
     ExpenseCategory, DailyExpenseTemplate, Expense, MonthlyBudgetSnapshot,
     Investment, InvestmentTransaction,
     AIAlert,
+    RevokedToken,
+    BudgetForecast,
+    CategorySpendingStats,
+    SpendingSketch,
+    DailySpendPrefix,
+    DashboardDigest,
 )
 
+# Indexes that existing databases may hold duplicates for, and the
+# migration that merges them
+INDEX_MIGRATIONS = {
+    "uq_expenses_checklist_entry": "python scripts/merge_duplicate_rows.py",
+    "uq_monthly_budget_snapshot_student_month": "python scripts/merge_duplicate_rows.py",
+}
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -31,6 +50,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -49,13 +69,30 @@ def on_startup():
     Base.metadata.create_all(bind=engine)
     print("[OK] Database tables created/verified")
 
+    # create_all only builds indexes with new tables; add any that were
+    # introduced after the tables already existed. Writes rely on these
+    # (e.g. the checklist upsert), so the app must not start without them.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                migration = INDEX_MIGRATIONS.get(index.name)
+                hint = f" Run {migration} first." if migration else ""
+                raise RuntimeError(f"Could not create index {index.name}: {e}.{hint}") from e
+
     # Log API key configuration status
     fh = "SET" if settings.MARKETAUX_API_TOKEN else "NOT SET"
+    fn = "SET" if settings.FINNHUB_API_KEY else "NOT SET"
     gq = "SET" if settings.GROQ_API_KEY else "NOT SET"
     print(f"[CONFIG] MARKETAUX_API_TOKEN: {fh}")
+    print(f"[CONFIG] FINNHUB_API_KEY: {fn}")
     print(f"[CONFIG] GROQ_API_KEY:    {gq}")
     print(f"[CONFIG] DATABASE_URL:    {settings.DATABASE_URL[:30]}...")
 
+    # Load the token revocation filter and keep it in sync across workers
+    revocation_list.start()
+
     # Run seed data
     try:
         from app.seed_data import run_seeder
@@ -63,6 +100,23 @@ def on_startup():
     except Exception as e:
         print(f"[WARNING] Seed data: {e}")
 
+    # Serve categories and checklist templates from memory
+    category_registry.start()
+
+    # Merge buffered expense amounts into the percentile sketches
+    spending_sketches.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background worker pools and close pooled connections."""
+    password_hasher.shutdown()
+    revocation_list.stop()
+    category_registry.stop()
+    spending_sketches.stop()
+    await api_engine.dispose()
+    await analytics_engine.dispose()
+
 
 @app.get("/")
 def root():
@@ -83,3 +137,24 @@ def health_check():
     Health check endpoint.
     """
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    In-process cache and performance metrics for this worker.
+    """
+    return {
+        "jwt_cache": token_cache.stats(),
+        "token_revocation": revocation_list.stats(),
+        "password_hasher": {
+            "workers": password_hasher.workers,
+            "queue_limit": password_hasher.queue_limit,
+            "rejected": password_hasher.rejected,
+        },
+        "category_registry": category_registry.stats(),
+        "simulation_cache": simulation_cache.stats(),
+        "heatmap_cache": heatmap_cache.stats(),
+        "spending_sketches": spending_sketches.stats(),
+        "db_pools": {name: metrics.stats() for name, metrics in pool_metrics.items()},
+    }
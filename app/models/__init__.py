@@ -6,6 +6,12 @@ from app.models.student import Student, StudentCategoryBudget
 from app.models.expense import ExpenseCategory, DailyExpenseTemplate, Expense, MonthlyBudgetSnapshot
 from app.models.investment import Investment, InvestmentTransaction
 from app.models.ai_alert import AIAlert
+from app.models.revoked_token import RevokedToken
+from app.models.forecast import BudgetForecast
+from app.models.spending_stats import CategorySpendingStats
+from app.models.spending_sketch import SpendingSketch
+from app.models.spend_prefix import DailySpendPrefix
+from app.models.dashboard_digest import DashboardDigest
 
 __all__ = [
     "Student",
@@ -17,4 +23,10 @@ __all__ = [
     "Investment",
     "InvestmentTransaction",
     "AIAlert",
+    "RevokedToken",
+    "BudgetForecast",
+    "CategorySpendingStats",
+    "SpendingSketch",
+    "DailySpendPrefix",
+    "DashboardDigest",
 ]
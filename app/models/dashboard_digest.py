@@ -0,0 +1,27 @@
+"""
+Precomputed per-student dashboard digest.
+"""
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DashboardDigest(Base):
+    """
+    Everything the dashboard shows on first paint, as one JSON document
+    (a serialized DashboardDigestResponse).
+
+    Built for every student by the nightly digest task, rebuilt for a
+    student after their expense writes, and dropped by other writes that
+    change it (the next read rebuilds it).
+    """
+    __tablename__ = "dashboard_digests"
+
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    as_of = Column(Date, nullable=False)  # Day the checklist and budget status are for
+    payload = Column(JSONB, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DashboardDigest(student_id={self.student_id}, as_of={self.as_of})>"
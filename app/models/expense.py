@@ -1,7 +1,7 @@
 """
 Expense-related models for tracking daily expenses and categories.
 """
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -52,10 +52,22 @@ class Expense(Base):
     """
     Individual expense transaction record.
 
-    This is append-only - expenses are never modified or deleted.
     Each expense represents a checked item from the daily checklist or an additional expense.
+    A student has at most one checklist row per category and day: resubmitting
+    the checklist updates that row's amount in place. Additional expenses are
+    exempt and always insert a new row.
     """
     __tablename__ = "expenses"
+    __table_args__ = (
+        # One checklist entry per student, category and day (additional
+        # expenses are exempt); checklist submits upsert against this index.
+        Index(
+            "uq_expenses_checklist_entry",
+            "student_id", "category_id", "expense_date",
+            unique=True,
+            postgresql_where=text("NOT is_additional"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
@@ -88,10 +100,21 @@ class Expense(Base):
         return f"<Expense(id={self.id}, student_id={self.student_id}, amount={self.amount}, date={self.expense_date})>"
 
 
+# Keyset pagination of a student's expenses (newest first)
+Index(
+    "ix_expenses_student_recent",
+    Expense.student_id,
+    Expense.expense_date.desc(),
+    Expense.created_at.desc(),
+    Expense.id.desc(),
+)
+
+
 class MonthlyBudgetSnapshot(Base):
     """
-    Monthly budget snapshots for historical tracking.
-    Created at the start of each month to track budget vs actual spending.
+    Monthly budget snapshots for historical tracking (budget vs actual
+    spending per calendar month). Backfilled for past months, kept current
+    on expense writes and read by the history endpoint.
     """
     __tablename__ = "monthly_budget_snapshot"
     
@@ -114,3 +137,13 @@ class MonthlyBudgetSnapshot(Base):
     
     def __repr__(self):
         return f"<MonthlyBudgetSnapshot(id={self.id}, student_id={self.student_id}, month={self.month}/{self.year})>"
+
+
+# One snapshot per student and month; snapshot writes upsert against this
+Index(
+    "uq_monthly_budget_snapshot_student_month",
+    MonthlyBudgetSnapshot.student_id,
+    MonthlyBudgetSnapshot.year,
+    MonthlyBudgetSnapshot.month,
+    unique=True,
+)
@@ -0,0 +1,34 @@
+"""
+Budget forecast model: nightly burn-rate projections per student.
+"""
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class BudgetForecast(Base):
+    """
+    Latest month-end projection for a student's budget cycle.
+
+    Written by the nightly forecast batch (one row per student, replaced on
+    each run) and read by the dashboard and the alert rules.
+    """
+    __tablename__ = "budget_forecasts"
+
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+
+    # Forecast inputs
+    as_of = Column(Date, nullable=False)  # Last day of spending history used
+    cycle_end = Column(Date, nullable=False)  # Last day of the budget cycle
+    remaining_budget = Column(Numeric(12, 2), nullable=False)  # Remaining budget at as_of
+
+    # Projection
+    daily_spend_rate = Column(Numeric(12, 2), nullable=False)  # Smoothed, deseasonalized daily spend
+    projected_spend = Column(Numeric(12, 2), nullable=False)  # Expected spend after as_of until cycle_end
+    projected_month_end_balance = Column(Numeric(12, 2), nullable=False)
+    exhaustion_date = Column(Date, nullable=True)  # Expected day the budget runs out, if within the cycle
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<BudgetForecast(student_id={self.student_id}, as_of={self.as_of}, balance={self.projected_month_end_balance})>"
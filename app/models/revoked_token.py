@@ -0,0 +1,27 @@
+"""
+Token revocation model for logout and password-change invalidation.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """
+    Revoked JWTs.
+
+    A row either revokes a single token (jti set) or, when jti is NULL,
+    every token for the student issued before revoked_at (e.g. after a
+    password change). Rows can be purged once expires_at has passed.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, nullable=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
+
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken(id={self.id}, student_id={self.student_id}, jti={self.jti})>"
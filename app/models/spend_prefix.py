@@ -0,0 +1,28 @@
+"""
+Per-student cumulative daily spend for as-of budget queries.
+"""
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DailySpendPrefix(Base):
+    """
+    Running total of a student's spending, one entry per day from start_date.
+
+    Entry i is the total spent from start_date through start_date + i, in
+    paise, so the spend over any date range is the difference of two
+    entries. Built from the expenses table on first use and updated on
+    expense writes (including backdated ones).
+    """
+    __tablename__ = "daily_spend_prefixes"
+
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    start_date = Column(Date, nullable=False)  # Day of the first entry
+    days = Column(Integer, nullable=False, default=0)
+    cumulative = Column(LargeBinary, nullable=True)  # zlib-compressed little-endian int64 paise
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DailySpendPrefix(student_id={self.student_id}, start_date={self.start_date}, days={self.days})>"
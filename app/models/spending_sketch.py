@@ -0,0 +1,36 @@
+"""
+Persisted quantile sketches of expense amounts, per category and month.
+"""
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+# category_id of the sketch covering every category, and of expenses
+# without a predefined category
+ALL_CATEGORIES_KEY = -1
+UNCATEGORIZED_KEY = 0
+
+
+class SpendingSketch(Base):
+    """
+    Mergeable quantile sketch of all students' expense amounts for one
+    category (0 = no predefined category, -1 = all) and month.
+
+    Workers buffer new amounts and merge them in periodically; the nightly
+    rebuild recomputes sketches from the expenses table.
+    """
+    __tablename__ = "spending_sketches"
+
+    category_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+
+    count = Column(BigInteger, nullable=False, default=0)
+    zero_count = Column(BigInteger, nullable=False, default=0)
+    bucket_offset = Column(Integer, nullable=False, default=0)  # Bucket index of the first count
+    counts = Column(LargeBinary, nullable=True)  # zlib-compressed little-endian int64 bucket counts
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SpendingSketch(category_id={self.category_id}, month={self.month}, count={self.count})>"
@@ -0,0 +1,40 @@
+"""
+Rolling per-category spending statistics for spike detection.
+"""
+from sqlalchemy import Column, Integer, Float, Numeric, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+# category_id used for expenses without a predefined category
+UNCATEGORIZED_KEY = 0
+
+
+class CategorySpendingStats(Base):
+    """
+    Welford running statistics of a student's daily spend in one category.
+
+    Only days with spending in the category count. The most recent day is
+    kept "open" (its total can still change) and folded into the
+    statistics when a later day starts. Maintained incrementally on expense
+    writes and rebuilt over a trailing window by the nightly backfill.
+    """
+    __tablename__ = "category_spending_stats"
+
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    category_id = Column(Integer, primary_key=True)  # 0 = no predefined category
+
+    # Welford state over completed spending days
+    day_count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0)  # Sum of squared deviations from the mean
+
+    # Latest spending day (not yet folded into the statistics)
+    open_date = Column(Date, nullable=False)
+    open_total = Column(Numeric(12, 2), nullable=False, default=0.00)
+
+    alerted_date = Column(Date, nullable=True)  # Last day a spike alert was raised
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CategorySpendingStats(student_id={self.student_id}, category_id={self.category_id}, days={self.day_count})>"
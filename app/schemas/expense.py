@@ -4,7 +4,7 @@ Pydantic schemas for Expense models.
 from pydantic import BaseModel, Field, model_validator, ConfigDict
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional, List, Annotated
+from typing import Dict, Optional, List, Annotated
 from pydantic import PlainSerializer
 
 # Serialize Decimal as float for JSON
@@ -119,3 +119,70 @@ class DailyChecklistResponse(BaseModel):
     total_daily_budget: DecimalFloat = 0.0  # Sum of all category daily budgets
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ExpenseImportError(BaseModel):
+    """A row rejected by a bulk import."""
+    row: int = Field(..., description="Index in the JSON array, or line number in the CSV file")
+    error: str
+
+
+class ExpenseImportResult(BaseModel):
+    """Outcome of a bulk expense import."""
+    received: int
+    inserted: int
+    failed: int
+    errors: List[ExpenseImportError] = Field(
+        default_factory=list,
+        description="Rejected rows (truncated to the first EXPENSE_IMPORT_MAX_ERRORS)"
+    )
+
+
+class SpendingBucket(BaseModel):
+    """Aggregated spending for one category or period."""
+    key: str = Field(..., description="Category name, or the ISO start date of the day/week/month")
+    category_id: Optional[int] = None
+    total: DecimalFloat
+    count: int
+    average: DecimalFloat
+
+
+class SpendingAnalyticsResponse(BaseModel):
+    """Spending totals for a date range, grouped by category or period."""
+    group_by: str
+    start_date: date
+    end_date: date
+    total: DecimalFloat
+    count: int
+    average: DecimalFloat
+    buckets: List[SpendingBucket] = Field(default_factory=list)
+
+
+class SpendingHeatmapResponse(BaseModel):
+    """Daily spending totals for a calendar year, in paise."""
+    year: int
+    start_date: date
+    days: int = Field(..., description="365 or 366")
+    version: str = Field(..., description="Changes whenever the year's expenses change")
+    encoding: str = Field(..., description="list or base64")
+    total_paise: int
+    max_day_paise: int
+    values: Optional[List[int]] = Field(None, description="Daily totals, start_date first (encoding=list)")
+    data: Optional[str] = Field(
+        None, description="Base64 of the daily totals as packed little-endian int32 (encoding=base64)"
+    )
+
+
+class SpendingPercentilesResponse(BaseModel):
+    """Distribution of all students' expense amounts for a category and month."""
+    category_id: Optional[int] = Field(None, description="Category, or null for all categories")
+    month: str = Field(..., description="YYYY-MM")
+    count: int
+    percentiles: Dict[str, Optional[float]] = Field(
+        default_factory=dict,
+        description="Amount at p10, p25, p50, p75, p90 and p99 (within SKETCH_RELATIVE_ACCURACY)"
+    )
+    amount: Optional[float] = None
+    amount_percentile: Optional[float] = Field(
+        None, description="Percentage of expenses at or below amount"
+    )
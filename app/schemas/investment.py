@@ -84,6 +84,9 @@ class MarketNewsItemResponse(BaseModel):
     published_at: datetime
     image_url: Optional[str] = None
     suggestions: List[str] = Field(default_factory=list)
+    sentiment_score: float = 0.0  # Lexicon score in [-1, 1], computed at ingest
+    sentiment_label: str = "neutral"  # "positive", "negative" or "neutral"
+    topics: List[str] = Field(default_factory=list)
 
 
 class MarketNewsResponse(BaseModel):
@@ -62,6 +62,92 @@ class BudgetStatusResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BudgetForecastResponse(BaseModel):
+    """Schema for the stored month-end budget forecast."""
+    student_id: int
+    as_of: date
+    cycle_end: date
+    remaining_budget: DecimalFloat
+    daily_spend_rate: DecimalFloat  # Smoothed daily spend (weekday effects removed)
+    projected_spend: DecimalFloat  # Expected spend from as_of to cycle_end
+    projected_month_end_balance: DecimalFloat
+    exhaustion_date: Optional[date] = None  # Expected day the budget runs out within the cycle
+    computed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SimulationBand(BaseModel):
+    """Percentiles of the simulated remaining budget at the end of one day."""
+    day: date
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+
+
+class SimulationResponse(BaseModel):
+    """Monte Carlo projection of the budget to the end of the cycle."""
+    as_of: date
+    cycle_end: date
+    remaining_budget: DecimalFloat
+    history_days: int  # Days of spending history sampled from
+    paths: int  # Trajectories simulated
+    truncated: bool = False  # True if the CPU budget stopped the simulation early
+    probability_run_out: float  # Share of trajectories that run out before cycle_end
+    median_exhaustion_date: Optional[date] = None  # Day by which half of the trajectories have run out
+    month_end: Optional[SimulationBand] = None
+    bands: List[SimulationBand] = Field(default_factory=list)
+
+
+class BudgetHistoryMonth(BaseModel):
+    """Budget vs actual spending for one calendar month."""
+    year: int
+    month: int  # 1-12
+    budgeted_amount: DecimalFloat
+    total_spent: DecimalFloat
+    remaining_budget: DecimalFloat
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BudgetHistoryResponse(BaseModel):
+    """Monthly budget history, newest month first."""
+    student_id: int
+    months: List[BudgetHistoryMonth] = Field(default_factory=list)
+
+
+class DashboardChecklistItem(BaseModel):
+    """One category of today's checklist."""
+    category_id: int
+    category_name: Optional[str] = None
+    daily_budget: DecimalFloat = 0.0
+    is_checked: bool = False  # An expense is already recorded for today
+    amount: Optional[DecimalFloat] = None  # Today's recorded amount
+
+
+class DashboardTopCategory(BaseModel):
+    """Spending in one category so far this cycle."""
+    category_id: Optional[int] = None
+    name: str
+    total: DecimalFloat
+
+
+class DashboardDigestResponse(BaseModel):
+    """Precomputed dashboard summary (one stored row per student)."""
+    student_id: int
+    as_of: date
+    budget_status: BudgetStatusResponse
+    checklist: List[DashboardChecklistItem] = Field(default_factory=list)
+    additional_today: DecimalFloat = 0.0  # Today's unplanned expenses
+    top_categories: List[DashboardTopCategory] = Field(default_factory=list)
+    forecast: Optional[BudgetForecastResponse] = None
+    unread_alerts: int = 0
+    computed_at: Optional[datetime] = None
+
+
 # --- Category Budget Schemas ---
 
 class CategoryBudgetBase(BaseModel):
@@ -13,6 +13,7 @@ The AI evaluates rules based on:
 
 And generates advisory alerts only.
 """
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import date, datetime, timedelta
@@ -22,6 +23,9 @@ from app.models.student import Student
 from app.models.expense import Expense
 from app.models.investment import Investment
 from app.models.ai_alert import AIAlert, AlertType, AlertSeverity
+from app.models.forecast import BudgetForecast
+from app.services.spike_detector import SpikeDetector
+from app.services.category_limit_rules import CategoryLimitRules
 from app.schemas.ai_alert import AIAlertCreate
 
 
@@ -222,6 +226,45 @@ class AIService:
         
         return alerts
     
+    @staticmethod
+    def evaluate_forecast_rules(
+        db: Session,
+        student: Student,
+        current_date: date = None
+    ) -> List[AIAlertCreate]:
+        """
+        Evaluate the stored nightly forecast and generate alerts.
+
+        Rules evaluated:
+        1. Budget projected to run out before the cycle ends
+        """
+        if current_date is None:
+            current_date = date.today()
+
+        alerts = []
+
+        forecast = db.get(BudgetForecast, student.id)
+        if not forecast or forecast.exhaustion_date is None:
+            return alerts
+
+        # Already-exhausted budgets are covered by the budget rules
+        if student.remaining_budget < 0 or forecast.exhaustion_date < current_date:
+            return alerts
+
+        days_early = (forecast.cycle_end - forecast.exhaustion_date).days
+        if days_early > 0:
+            alerts.append(AIAlertCreate(
+                student_id=student.id,
+                alert_type=AlertType.BUDGET_RISK,
+                severity=AlertSeverity.WARNING,
+                title="Budget Projected to Run Out",
+                message=f"At your recent pace of about ₹{forecast.daily_spend_rate:.2f}/day, your budget "
+                       f"is expected to run out on {forecast.exhaustion_date:%d %b}, {days_early} day(s) "
+                       f"before the cycle ends (projected balance: ₹{forecast.projected_month_end_balance:.2f})."
+            ))
+
+        return alerts
+
     @staticmethod
     def evaluate_spending_patterns(
         db: Session,
@@ -267,6 +310,10 @@ class AIService:
             )
         ).scalar() or Decimal("0.00")
         
+        # Rule: Unusual spending spikes (rolling per-category z-score)
+        for spike in SpikeDetector.get_spikes(db, student.id, current_date):
+            alerts.append(AIAlertCreate(**spike))
+
         # Rule: High additional expenses (>30% of total)
         if total_expenses > 0:
             additional_percentage = (additional_expenses / total_expenses) * 100
@@ -309,6 +356,12 @@ class AIService:
         # Investment rules
         all_alerts.extend(AIService.evaluate_investment_rules(db, student))
         
+        # Forecast rules (nightly projection)
+        all_alerts.extend(AIService.evaluate_forecast_rules(db, student, current_date))
+
+        # Per-category daily limit rules
+        all_alerts.extend(CategoryLimitRules.evaluate(db, current_date, student_ids=[student.id]))
+
         # Spending pattern rules
         all_alerts.extend(AIService.evaluate_spending_patterns(db, student, current_date))
         
@@ -338,3 +391,17 @@ class AIService:
             db.refresh(alert)
         
         return created_alerts
+
+
+class AsyncAIService:
+    """AIService for AsyncSession callers (runs the rules via ``run_sync``)."""
+
+    @staticmethod
+    async def evaluate_all_rules(
+        db: AsyncSession,
+        student: Student,
+        current_date: date = None
+    ) -> List[AIAlert]:
+        return await db.run_sync(
+            lambda session: AIService.evaluate_all_rules(session, student, current_date)
+        )
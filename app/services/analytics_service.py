@@ -0,0 +1,188 @@
+"""
+Server-side spending aggregates.
+
+Charts need a handful of totals, not every expense row, so grouping runs in
+SQL and responses are sized by the number of buckets rather than the number
+of expenses.
+
+The year heatmap is a fixed-order array of daily totals in paise, cached
+per (student, year, data version) so unchanged years skip the grouping.
+"""
+import base64
+import hashlib
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.expense import Expense
+from app.schemas.expense import SpendingAnalyticsResponse, SpendingBucket, SpendingHeatmapResponse
+from app.services.category_registry import category_registry
+from app.services.result_cache import ResultCache
+
+
+ANALYTICS_GROUPINGS = ("category", "day", "week", "month")
+HEATMAP_ENCODINGS = ("list", "base64")
+
+# Daily totals are int32 paise; larger days are clipped
+MAX_DAY_PAISE = np.iinfo(np.int32).max
+
+heatmap_cache = ResultCache(settings.HEATMAP_CACHE_SIZE)
+
+UNCATEGORIZED = "Uncategorized"
+
+
+def _average(total: Decimal, count: int) -> Decimal:
+    return (total / count).quantize(Decimal("0.01")) if count else Decimal("0.00")
+
+
+class AnalyticsService:
+    """Service for spending aggregates."""
+
+    @staticmethod
+    async def _category_buckets(db: AsyncSession, conditions) -> List[SpendingBucket]:
+        custom_name = case((Expense.category_id.is_(None), Expense.custom_category))
+        result = await db.execute(
+            select(
+                Expense.category_id,
+                custom_name.label("custom_category"),
+                func.sum(Expense.amount),
+                func.count(Expense.id),
+            ).where(conditions).group_by(Expense.category_id, custom_name)
+        )
+
+        # Custom categories are free text; name them and merge same-named groups
+        merged: Dict[Tuple, List] = {}
+        for category_id, custom_category, total, count in result.all():
+            name = category_registry.name(category_id) or custom_category or UNCATEGORIZED
+            bucket = merged.setdefault((name, category_id), [Decimal("0.00"), 0])
+            bucket[0] += total
+            bucket[1] += count
+
+        buckets = [
+            SpendingBucket(key=name, category_id=category_id, total=total, count=count, average=_average(total, count))
+            for (name, category_id), (total, count) in merged.items()
+        ]
+        buckets.sort(key=lambda bucket: bucket.total, reverse=True)
+        return buckets
+
+    @staticmethod
+    async def _period_buckets(db: AsyncSession, conditions, group_by: str) -> List[SpendingBucket]:
+        if group_by == "day":
+            period = Expense.expense_date
+        else:
+            period = func.date(func.date_trunc(group_by, Expense.expense_date))
+
+        result = await db.execute(
+            select(
+                period.label("period"),
+                func.sum(Expense.amount),
+                func.count(Expense.id),
+            ).where(conditions).group_by(period).order_by(period)
+        )
+        return [
+            SpendingBucket(key=start.isoformat(), total=total, count=count, average=_average(total, count))
+            for start, total, count in result.all()
+        ]
+
+    @staticmethod
+    async def get_spending_analytics(
+        db: AsyncSession,
+        student_id: int,
+        start_date: date,
+        end_date: date,
+        group_by: str,
+    ) -> SpendingAnalyticsResponse:
+        """
+        Totals, counts and averages per category, day, week or month.
+
+        Periods are keyed by their first day (weeks start on Monday); days
+        without expenses are omitted.
+        """
+        conditions = and_(
+            Expense.student_id == student_id,
+            Expense.expense_date >= start_date,
+            Expense.expense_date <= end_date,
+        )
+
+        if group_by == "category":
+            buckets = await AnalyticsService._category_buckets(db, conditions)
+        else:
+            buckets = await AnalyticsService._period_buckets(db, conditions, group_by)
+
+        total = sum((bucket.total for bucket in buckets), Decimal("0.00"))
+        count = sum(bucket.count for bucket in buckets)
+        return SpendingAnalyticsResponse(
+            group_by=group_by,
+            start_date=start_date,
+            end_date=end_date,
+            total=total,
+            count=count,
+            average=_average(total, count),
+            buckets=buckets,
+        )
+
+    @staticmethod
+    async def get_spending_heatmap(
+        db: AsyncSession,
+        student_id: int,
+        year: int,
+        encoding: str = "list",
+    ) -> SpendingHeatmapResponse:
+        """
+        Daily spending totals for a calendar year, January 1st first.
+
+        The data version is the count, highest id and sum of the year's
+        expenses (one aggregate row); the per-day GROUP BY runs only when
+        it has changed since the cached copy. With encoding="base64" the
+        totals are a packed little-endian int32 buffer instead of a list.
+        """
+        start_date = date(year, 1, 1)
+        end_date = date(year, 12, 31)
+        conditions = and_(
+            Expense.student_id == student_id,
+            Expense.expense_date >= start_date,
+            Expense.expense_date <= end_date,
+        )
+
+        count, last_id, total = (await db.execute(
+            select(
+                func.count(Expense.id),
+                func.coalesce(func.max(Expense.id), 0),
+                func.coalesce(func.sum(Expense.amount), 0),
+            ).where(conditions)
+        )).one()
+        version = hashlib.sha256(f"{year}|{count}|{last_id}|{total}".encode("utf-8")).hexdigest()[:16]
+        key = (student_id, year, version)
+
+        paise = heatmap_cache.get(key)
+        if paise is None:
+            paise = np.zeros((end_date - start_date).days + 1, dtype=np.int32)
+            if count:
+                rows = (await db.execute(
+                    select(Expense.expense_date, func.sum(Expense.amount))
+                    .where(conditions)
+                    .group_by(Expense.expense_date)
+                )).all()
+                offsets = np.fromiter(((day - start_date).days for day, _ in rows), dtype=np.int64, count=len(rows))
+                totals = np.fromiter((total * 100 for _, total in rows), dtype=np.float64, count=len(rows))
+                paise[offsets] = np.clip(np.rint(totals), 0, MAX_DAY_PAISE)
+            paise.flags.writeable = False
+            heatmap_cache.put(key, paise)
+
+        response = SpendingHeatmapResponse(
+            year=year,
+            start_date=start_date,
+            days=len(paise),
+            version=version,
+            encoding=encoding,
+            total_paise=int(paise.sum(dtype=np.int64)),
+            max_day_paise=int(paise.max()),
+        )
+        if encoding == "base64":
+            response.data = base64.b64encode(paise.astype("<i4").tobytes()).decode("ascii")
+        else:
+            response.values = paise.tolist()
+        return response
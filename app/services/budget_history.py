@@ -0,0 +1,240 @@
+"""
+Month-over-month budget history from MonthlyBudgetSnapshot.
+
+Every student has one snapshot per calendar month from their first
+expense (or current cycle) to now, so the history endpoint reads stored
+rows instead of re-aggregating raw expenses. All snapshot writes are one
+set-based INSERT ... SELECT with the month's spend and investment
+movements grouped in SQL:
+
+- backfill(): nightly; creates the snapshots that are missing for every
+  student and refreshes each student's current month;
+- refresh(): after expense writes; recomputes the months just touched
+  (including backdated ones) for one student;
+- refresh_current(): after budget settings or investment movements;
+  recomputes one student's months from the current cycle on.
+
+The month of the current cycle counts spending from budget_start_date
+(as the remaining budget does) and follows the student's current monthly
+budget; earlier months keep the budget they were snapshotted with.
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Sequence
+from sqlalchemy import and_, case, cast, func, literal_column, or_, select, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.expense import Expense, MonthlyBudgetSnapshot
+from app.models.investment import Investment, InvestmentTransaction, InvestmentTransactionType
+from app.models.student import Student
+
+
+SNAPSHOT_COLUMNS = ["student_id", "month", "year", "budgeted_amount", "total_spent", "remaining_budget"]
+
+
+def _month(column):
+    return cast(func.date_trunc("month", column), Date)
+
+
+def _snapshot_insert(
+    student_ids: Optional[Sequence[int]] = None,
+    months: Optional[Sequence[date]] = None,
+    from_cycle: bool = False,
+    overwrite: bool = True,
+):
+    """
+    INSERT ... SELECT of snapshot rows.
+
+    Restrict to some students, some months (first days), or each student's
+    current cycle month onward (from_cycle). Existing snapshots are
+    overwritten, or left alone with overwrite=False.
+    """
+    first_expense = (
+        select(func.min(Expense.expense_date))
+        .where(Expense.student_id == Student.id)
+        .scalar_subquery()
+    )
+    students_query = select(
+        Student.id.label("student_id"),
+        Student.monthly_budget,
+        Student.budget_start_date,
+        _month(Student.budget_start_date).label("cycle_month"),
+        _month(func.least(func.coalesce(first_expense, Student.budget_start_date), Student.budget_start_date))
+        .label("first_month"),
+        _month(func.greatest(Student.budget_start_date, func.current_date())).label("last_month"),
+    )
+    if student_ids is not None:
+        students_query = students_query.where(Student.id.in_(student_ids))
+    students = students_query.cte("snapshot_students")
+
+    months_query = select(
+        students.c.student_id,
+        students.c.monthly_budget,
+        students.c.cycle_month,
+        cast(
+            func.generate_series(students.c.first_month, students.c.last_month, literal_column("interval '1 month'")),
+            Date,
+        ).label("month_start"),
+    )
+    student_months = months_query.cte("snapshot_months")
+
+    # Spending before budget_start_date in the cycle's month is outside any cycle
+    expense_month = _month(Expense.expense_date)
+    spend_query = (
+        select(
+            Expense.student_id,
+            expense_month.label("month_start"),
+            func.sum(Expense.amount).label("spent"),
+        )
+        .join(students, students.c.student_id == Expense.student_id)
+        .where(or_(expense_month != students.c.cycle_month, Expense.expense_date >= students.c.budget_start_date))
+        .group_by(Expense.student_id, expense_month)
+    )
+    if months is not None:
+        spend_query = spend_query.where(expense_month.in_(months))
+    spend = spend_query.subquery("snapshot_spend")
+
+    transaction_date = func.date(InvestmentTransaction.created_at)
+    transaction_month = _month(transaction_date)
+    signed_amount = case(
+        (InvestmentTransaction.transaction_type == InvestmentTransactionType.INVEST, InvestmentTransaction.amount),
+        (InvestmentTransaction.transaction_type == InvestmentTransactionType.WITHDRAW, -InvestmentTransaction.amount),
+        else_=0,
+    )
+    outflow_query = (
+        select(
+            Investment.student_id,
+            transaction_month.label("month_start"),
+            func.sum(signed_amount).label("outflow"),
+        )
+        .join(Investment, Investment.id == InvestmentTransaction.investment_id)
+        .join(students, students.c.student_id == Investment.student_id)
+        .where(or_(transaction_month != students.c.cycle_month, transaction_date >= students.c.budget_start_date))
+        .group_by(Investment.student_id, transaction_month)
+    )
+    if months is not None:
+        outflow_query = outflow_query.where(transaction_month.in_(months))
+    outflow = outflow_query.subquery("snapshot_outflow")
+
+    existing = MonthlyBudgetSnapshot.__table__.alias("existing")
+    month_number = cast(func.extract("month", student_months.c.month_start), existing.c.month.type)
+    year_number = cast(func.extract("year", student_months.c.month_start), existing.c.year.type)
+    budgeted = case(
+        (student_months.c.month_start < student_months.c.cycle_month,
+         func.coalesce(existing.c.budgeted_amount, student_months.c.monthly_budget)),
+        else_=student_months.c.monthly_budget,
+    )
+    spent = func.coalesce(spend.c.spent, 0)
+
+    rows = (
+        select(
+            student_months.c.student_id,
+            month_number,
+            year_number,
+            budgeted,
+            spent,
+            budgeted - spent - func.coalesce(outflow.c.outflow, 0),
+        )
+        .select_from(
+            student_months
+            .outerjoin(spend, and_(
+                spend.c.student_id == student_months.c.student_id,
+                spend.c.month_start == student_months.c.month_start,
+            ))
+            .outerjoin(outflow, and_(
+                outflow.c.student_id == student_months.c.student_id,
+                outflow.c.month_start == student_months.c.month_start,
+            ))
+            .outerjoin(existing, and_(
+                existing.c.student_id == student_months.c.student_id,
+                existing.c.year == year_number,
+                existing.c.month == month_number,
+            ))
+        )
+    )
+    if months is not None:
+        rows = rows.where(student_months.c.month_start.in_(months))
+    if from_cycle:
+        rows = rows.where(student_months.c.month_start >= student_months.c.cycle_month)
+
+    snapshots_table = MonthlyBudgetSnapshot.__table__
+    statement = pg_insert(snapshots_table).from_select(SNAPSHOT_COLUMNS, rows)
+    conflict_columns = [snapshots_table.c.student_id, snapshots_table.c.year, snapshots_table.c.month]
+    if not overwrite:
+        return statement.on_conflict_do_nothing(index_elements=conflict_columns)
+    return statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={
+            "budgeted_amount": statement.excluded.budgeted_amount,
+            "total_spent": statement.excluded.total_spent,
+            "remaining_budget": statement.excluded.remaining_budget,
+            "updated_at": func.now(),
+        },
+    )
+
+
+class BudgetHistoryService:
+    """Service for monthly budget snapshots."""
+
+    @staticmethod
+    def write_snapshots(db: Session, student_id: int, months: Iterable[date]) -> None:
+        """Recompute one student's snapshots for some months (not committed)."""
+        months = sorted({month.replace(day=1) for month in months})
+        if months:
+            db.execute(_snapshot_insert(student_ids=[student_id], months=months))
+
+    @staticmethod
+    def refresh(db: Session, student_id: int, days: Iterable[date]) -> None:
+        """
+        Bring the snapshots of the months containing ``days`` up to date.
+        Call after expenses on those days are committed.
+        """
+        BudgetHistoryService.write_snapshots(db, student_id, days)
+        db.commit()
+
+    @staticmethod
+    def refresh_current(db: Session, student_id: int) -> None:
+        """
+        Bring one student's snapshots from the current cycle month on up to
+        date. Call after budget settings or investment movements are
+        committed.
+        """
+        db.execute(_snapshot_insert(student_ids=[student_id], from_cycle=True))
+        db.commit()
+
+    @staticmethod
+    def backfill(db: Session) -> tuple[int, int]:
+        """
+        Create every missing snapshot and refresh current cycle months.
+
+        Returns (snapshots created, current months refreshed).
+        """
+        created = db.execute(_snapshot_insert(overwrite=False)).rowcount
+        refreshed = db.execute(_snapshot_insert(from_cycle=True)).rowcount
+        db.commit()
+        return created, refreshed
+
+    @staticmethod
+    def get_history(db: Session, student_id: int, months: int) -> List[MonthlyBudgetSnapshot]:
+        """The student's latest ``months`` snapshots, newest first."""
+        return db.query(MonthlyBudgetSnapshot).filter(
+            MonthlyBudgetSnapshot.student_id == student_id
+        ).order_by(
+            MonthlyBudgetSnapshot.year.desc(),
+            MonthlyBudgetSnapshot.month.desc(),
+        ).limit(months).all()
+
+
+class AsyncBudgetHistoryService:
+    """BudgetHistoryService for AsyncSession callers (runs via ``run_sync``)."""
+
+    @staticmethod
+    async def refresh(db: AsyncSession, student_id: int, days: Iterable[date]) -> None:
+        days = set(days)
+        if not days:
+            return
+        await db.run_sync(lambda session: BudgetHistoryService.refresh(session, student_id, days))
+
+    @staticmethod
+    async def get_history(db: AsyncSession, student_id: int, months: int) -> List[MonthlyBudgetSnapshot]:
+        return await db.run_sync(lambda session: BudgetHistoryService.get_history(session, student_id, months))
@@ -1,14 +1,16 @@
 """
 Budget service for managing student budgets and calculating budget status.
 """
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import date, timedelta
 from decimal import Decimal
 from app.models.student import Student
-from app.models.expense import Expense, MonthlyBudgetSnapshot
+from app.models.expense import Expense
 from app.models.investment import Investment, InvestmentTransaction, InvestmentTransactionType
 from app.schemas.student import BudgetStatusResponse
+from app.services.budget_history import BudgetHistoryService
 
 
 class BudgetService:
@@ -194,33 +196,9 @@ class BudgetService:
             else:
                 new_start_date = date(current_start.year, current_start.month + 1, 1)
         
-        # Create snapshot of previous month
-        previous_month = student.budget_start_date.month
-        previous_year = student.budget_start_date.year
-        
-        # Calculate total spent in previous month
-        month_start = student.budget_start_date
-        month_end = new_start_date - timedelta(days=1)
-        
-        total_spent = db.query(func.sum(Expense.amount)).filter(
-            and_(
-                Expense.student_id == student.id,
-                Expense.expense_date >= month_start,
-                Expense.expense_date <= month_end
-            )
-        ).scalar() or Decimal("0.00")
-        
-        # Create snapshot
-        snapshot = MonthlyBudgetSnapshot(
-            student_id=student.id,
-            month=previous_month,
-            year=previous_year,
-            budgeted_amount=student.monthly_budget,
-            total_spent=total_spent,
-            remaining_budget=student.remaining_budget
-        )
-        db.add(snapshot)
-        
+        # Snapshot the month being closed
+        BudgetHistoryService.write_snapshots(db, student.id, [student.budget_start_date])
+
         # Reset budget
         student.budget_start_date = new_start_date
         student.remaining_budget = student.monthly_budget
@@ -228,3 +206,53 @@ class BudgetService:
         db.refresh(student)
         
         return student
+
+
+class AsyncBudgetService:
+    """
+    BudgetService for AsyncSession callers.
+
+    Each method runs the BudgetService logic through ``AsyncSession.run_sync``,
+    so queries go over the async (asyncpg) connection without blocking the
+    event loop and the business rules live in one place.
+    """
+
+    @staticmethod
+    async def calculate_remaining_budget(
+        db: AsyncSession,
+        student: Student,
+        current_date: date = None
+    ) -> Decimal:
+        return await db.run_sync(
+            lambda session: BudgetService.calculate_remaining_budget(session, student, current_date)
+        )
+
+    @staticmethod
+    async def update_remaining_budget(
+        db: AsyncSession,
+        student: Student,
+        current_date: date = None
+    ) -> Student:
+        return await db.run_sync(
+            lambda session: BudgetService.update_remaining_budget(session, student, current_date)
+        )
+
+    @staticmethod
+    async def get_budget_status(
+        db: AsyncSession,
+        student: Student,
+        current_date: date = None
+    ) -> BudgetStatusResponse:
+        return await db.run_sync(
+            lambda session: BudgetService.get_budget_status(session, student, current_date)
+        )
+
+    @staticmethod
+    async def reset_monthly_budget(
+        db: AsyncSession,
+        student: Student,
+        new_start_date: date = None
+    ) -> Student:
+        return await db.run_sync(
+            lambda session: BudgetService.reset_monthly_budget(session, student, new_start_date)
+        )
@@ -0,0 +1,177 @@
+"""
+Per-category daily limit rules.
+
+Compares each student's actual spend per category against the daily
+budget they set (StudentCategoryBudget.daily_budget):
+
+- daily breach: today's spend in the category is over the limit;
+- week-to-date overrun: spend since Monday is over limit x days so far;
+- consistent under-use: spend over the last CATEGORY_UNDERUSE_DAYS is well
+  below the limit, so the allocation could be moved elsewhere.
+
+The totals for every (student, category) come from one GROUP BY joined to
+the budgets, and the rules are evaluated as array comparisons over all
+rows at once, so the cost does not depend on how many categories exist.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+import numpy as np
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.ai_alert import AIAlert, AlertType, AlertSeverity
+from app.models.expense import Expense
+from app.models.student import StudentCategoryBudget
+from app.schemas.ai_alert import AIAlertCreate
+from app.services.category_registry import category_registry
+
+
+class CategoryLimitRules:
+    """Service for evaluating per-category daily limits."""
+
+    @staticmethod
+    def _load(db: Session, current_date: date, student_ids: Optional[Iterable[int]]):
+        """One row per active category budget with today's, week-to-date and window spend."""
+        week_start = current_date - timedelta(days=current_date.weekday())
+        window_start = current_date - timedelta(days=settings.CATEGORY_UNDERUSE_DAYS - 1)
+
+        spend_filter = [
+            Expense.category_id.isnot(None),
+            Expense.expense_date >= min(week_start, window_start),
+            Expense.expense_date <= current_date,
+        ]
+        budget_filter = [
+            StudentCategoryBudget.is_active == True,
+            StudentCategoryBudget.daily_budget > 0,
+        ]
+        if student_ids is not None:
+            student_ids = list(student_ids)
+            spend_filter.append(Expense.student_id.in_(student_ids))
+            budget_filter.append(StudentCategoryBudget.student_id.in_(student_ids))
+
+        spend = select(
+            Expense.student_id,
+            Expense.category_id,
+            func.sum(case((Expense.expense_date == current_date, Expense.amount), else_=0)).label("today"),
+            func.sum(case((Expense.expense_date >= week_start, Expense.amount), else_=0)).label("week"),
+            func.sum(case((Expense.expense_date >= window_start, Expense.amount), else_=0)).label("window"),
+        ).where(and_(*spend_filter)).group_by(Expense.student_id, Expense.category_id).subquery()
+
+        return db.execute(
+            select(
+                StudentCategoryBudget.student_id,
+                StudentCategoryBudget.category_id,
+                StudentCategoryBudget.daily_budget,
+                func.date(StudentCategoryBudget.created_at),
+                func.coalesce(spend.c.today, 0),
+                func.coalesce(spend.c.week, 0),
+                func.coalesce(spend.c.window, 0),
+            )
+            .outerjoin(spend, and_(
+                spend.c.student_id == StudentCategoryBudget.student_id,
+                spend.c.category_id == StudentCategoryBudget.category_id,
+            ))
+            .where(and_(*budget_filter))
+            .order_by(StudentCategoryBudget.student_id, StudentCategoryBudget.category_id)
+        ).all()
+
+    @staticmethod
+    def evaluate(
+        db: Session,
+        current_date: date = None,
+        student_ids: Optional[Iterable[int]] = None,
+    ) -> List[AIAlertCreate]:
+        """
+        Evaluate the category limit rules for the given students (default: all).
+        """
+        if current_date is None:
+            current_date = date.today()
+
+        rows = CategoryLimitRules._load(db, current_date, student_ids)
+        if not rows:
+            return []
+
+        n = len(rows)
+        student = np.fromiter((row[0] for row in rows), dtype=np.int64, count=n)
+        category = np.fromiter((row[1] for row in rows), dtype=np.int64, count=n)
+        limit = np.fromiter((row[2] for row in rows), dtype=np.float64, count=n)
+        budget_age = np.fromiter(
+            ((current_date - row[3]).days + 1 if row[3] else 0 for row in rows), dtype=np.int64, count=n
+        )
+        today = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        week = np.fromiter((row[5] for row in rows), dtype=np.float64, count=n)
+        window = np.fromiter((row[6] for row in rows), dtype=np.float64, count=n)
+
+        week_days = current_date.weekday() + 1
+        underuse_days = settings.CATEGORY_UNDERUSE_DAYS
+
+        daily_breach = today > limit * settings.CATEGORY_DAILY_BREACH_RATIO
+        week_overrun = ~daily_breach & (week > limit * week_days * settings.CATEGORY_WEEK_OVERRUN_RATIO)
+        underuse = ~daily_breach & ~week_overrun & (budget_age >= underuse_days) & (
+            window < limit * underuse_days * settings.CATEGORY_UNDERUSE_RATIO
+        )
+
+        alerts = []
+        for i in np.flatnonzero(daily_breach | week_overrun | underuse).tolist():
+            name = category_registry.name(int(category[i])) or f"Category {int(category[i])}"
+            if daily_breach[i]:
+                alerts.append(AIAlertCreate(
+                    student_id=int(student[i]),
+                    alert_type=AlertType.BUDGET_RISK,
+                    severity=AlertSeverity.WARNING,
+                    title=f"Daily Limit Exceeded: {name}",
+                    message=f"You spent ₹{today[i]:.2f} on {name} today, over your daily limit of "
+                           f"₹{limit[i]:.2f}."
+                ))
+            elif week_overrun[i]:
+                alerts.append(AIAlertCreate(
+                    student_id=int(student[i]),
+                    alert_type=AlertType.BUDGET_RISK,
+                    severity=AlertSeverity.WARNING,
+                    title=f"Weekly Pace Over Limit: {name}",
+                    message=f"You have spent ₹{week[i]:.2f} on {name} this week, above the "
+                           f"₹{limit[i] * week_days:.2f} your daily limit allows for {week_days} day(s)."
+                ))
+            if underuse[i]:
+                alerts.append(AIAlertCreate(
+                    student_id=int(student[i]),
+                    alert_type=AlertType.SPENDING_PATTERN,
+                    severity=AlertSeverity.INFO,
+                    title=f"Category Budget Underused: {name}",
+                    message=f"You averaged ₹{window[i] / underuse_days:.2f}/day on {name} over the last "
+                           f"{underuse_days} days against a ₹{limit[i]:.2f} daily limit. "
+                           f"Consider moving part of this allocation to other categories or savings."
+                ))
+
+        return alerts
+
+    @staticmethod
+    def run_batch(db: Session, current_date: date = None) -> int:
+        """
+        Evaluate every student and store new alerts; returns how many were created.
+
+        Alerts already raised today (same student and title) are skipped.
+        """
+        if current_date is None:
+            current_date = date.today()
+
+        # Alert titles use category names; scripts run without the app's startup
+        if not category_registry.snapshot.categories:
+            category_registry.refresh()
+
+        alerts = CategoryLimitRules.evaluate(db, current_date)
+        if not alerts:
+            return 0
+
+        existing = set(db.execute(
+            select(AIAlert.student_id, AIAlert.title).where(and_(
+                AIAlert.is_resolved == False,
+                func.date(AIAlert.created_at) == current_date,
+                AIAlert.alert_type.in_([AlertType.BUDGET_RISK, AlertType.SPENDING_PATTERN]),
+            ))
+        ).all())
+
+        new_alerts = [alert for alert in alerts if (alert.student_id, alert.title) not in existing]
+        db.add_all(AIAlert(**alert.model_dump()) for alert in new_alerts)
+        db.commit()
+        return len(new_alerts)
@@ -0,0 +1,185 @@
+"""
+In-process registry of expense categories and daily checklist templates.
+
+Both tables are tiny and almost never change (they are seeded at startup),
+so each worker keeps an immutable snapshot in memory and serves lookups and
+validation from it without touching the database. A snapshot's version is
+a hash of its contents, so every worker computes the same version (used as
+the HTTP ETag) for the same data.
+
+The snapshot is loaded at startup (after seeding) and re-checked
+periodically by a background thread, so changes made by other processes
+(e.g. the seeding scripts) are picked up.
+"""
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.models.expense import ExpenseCategory, DailyExpenseTemplate
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CategoryInfo:
+    """Read-only view of an expense category."""
+    id: int
+    name: str
+    description: Optional[str]
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class TemplateInfo:
+    """Read-only view of an active daily checklist template."""
+    id: int
+    category_id: int
+    category_name: str
+    display_order: int
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    """One immutable version of the registry."""
+    version: str
+    categories: tuple = ()
+    templates: tuple = ()
+    by_id: Mapping[int, CategoryInfo] = field(default_factory=lambda: MappingProxyType({}))
+    by_name: Mapping[str, CategoryInfo] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, categories: Iterable[CategoryInfo], templates: Iterable[TemplateInfo]) -> "CategorySnapshot":
+        categories = tuple(sorted(categories, key=lambda c: c.id))
+        templates = tuple(templates)
+        content = json.dumps(
+            [
+                [[c.id, c.name, c.description, c.created_at.isoformat() if c.created_at else None] for c in categories],
+                [[t.id, t.category_id, t.display_order, t.is_active] for t in templates],
+            ],
+            separators=(",", ":"),
+        )
+        return cls(
+            version=hashlib.sha256(content.encode("utf-8")).hexdigest()[:16],
+            categories=categories,
+            templates=templates,
+            by_id=MappingProxyType({c.id: c for c in categories}),
+            by_name=MappingProxyType({c.name.casefold(): c for c in categories}),
+        )
+
+
+class CategoryRegistry:
+    """Per-worker, versioned category/template registry."""
+
+    def __init__(self, session_factory, refresh_seconds: float):
+        self._session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = CategorySnapshot.build((), ())
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> CategorySnapshot:
+        """The current snapshot (replaced atomically, never mutated)."""
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def get(self, category_id: int) -> Optional[CategoryInfo]:
+        """Return a category by id, or None if it does not exist."""
+        return self._snapshot.by_id.get(category_id)
+
+    def name(self, category_id: Optional[int]) -> Optional[str]:
+        """Return a category's name, or None."""
+        category = self._snapshot.by_id.get(category_id)
+        return category.name if category else None
+
+    def find(self, name: str) -> Optional[CategoryInfo]:
+        """Return a category by name (case-insensitive), or None."""
+        return self._snapshot.by_name.get(name.strip().casefold())
+
+    def missing(self, category_ids: Iterable[int]) -> list:
+        """Return the ids (in order) that are not known categories."""
+        by_id = self._snapshot.by_id
+        return [category_id for category_id in category_ids if category_id not in by_id]
+
+    # --- Loading ---
+
+    def _load(self) -> CategorySnapshot:
+        db = self._session_factory()
+        try:
+            categories = [
+                CategoryInfo(id=c.id, name=c.name, description=c.description, created_at=c.created_at)
+                for c in db.query(ExpenseCategory).all()
+            ]
+            names = {c.id: c.name for c in categories}
+            templates = [
+                TemplateInfo(
+                    id=t.id,
+                    category_id=t.category_id,
+                    category_name=names.get(t.category_id),
+                    display_order=t.display_order,
+                    is_active=t.is_active,
+                )
+                for t in db.query(DailyExpenseTemplate).filter(
+                    DailyExpenseTemplate.is_active == True
+                ).order_by(DailyExpenseTemplate.display_order).all()
+                if t.category_id in names
+            ]
+        finally:
+            db.close()
+        return CategorySnapshot.build(categories, templates)
+
+    def refresh(self) -> bool:
+        """Reload from the database; returns True if the version changed."""
+        snapshot = self._load()
+        if snapshot.version == self._snapshot.version:
+            return False
+        self._snapshot = snapshot
+        self.reloads += 1
+        logger.info(f"Category registry loaded: version {snapshot.version}, {len(snapshot.categories)} categories")
+        return True
+
+    def start(self) -> None:
+        """Load the registry and start the background refresh thread."""
+        self.refresh()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="category-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.warning(f"Category registry refresh failed: {exc}")
+
+    def stats(self) -> dict:
+        return {
+            "version": self._snapshot.version,
+            "categories": len(self._snapshot.categories),
+            "templates": len(self._snapshot.templates),
+            "reloads": self.reloads,
+        }
+
+
+category_registry = CategoryRegistry(
+    SessionLocal,
+    refresh_seconds=settings.CATEGORY_REGISTRY_REFRESH_SECONDS,
+)
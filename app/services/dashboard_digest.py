@@ -0,0 +1,282 @@
+"""
+Precomputed per-student dashboard digests.
+
+The dashboard's first paint needs the budget status, today's checklist,
+the top spending categories, the forecast and the unread alert count.
+Computing those per request costs dozens of statements, so each student
+has one DashboardDigest row holding all of it and the dashboard reads it
+by primary key.
+
+Digests are built set-based for a batch of students (a fixed number of
+grouped statements per batch, however many students it holds):
+
+- run_batch(): nightly, for every student, so the day's checklist and
+  day counts are current;
+- refresh(): after a student's expense writes;
+- invalidate(): after other writes that change the digest (alerts,
+  investments, budget settings); the next read rebuilds it.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Sequence
+from sqlalchemy import Date, and_, case, cast, delete, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.ai_alert import AIAlert
+from app.models.dashboard_digest import DashboardDigest
+from app.models.expense import Expense
+from app.models.forecast import BudgetForecast
+from app.models.investment import Investment, InvestmentTransaction, InvestmentTransactionType
+from app.models.student import Student, StudentCategoryBudget
+from app.schemas.student import (
+    BudgetForecastResponse,
+    BudgetStatusResponse,
+    DashboardChecklistItem,
+    DashboardDigestResponse,
+    DashboardTopCategory,
+)
+from app.services.analytics_service import UNCATEGORIZED
+from app.services.category_registry import category_registry
+
+
+def _next_month_start(day: date) -> date:
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+# Last day of each student's current budget cycle, in SQL
+cycle_end = cast(
+    func.date_trunc("month", Student.budget_start_date) + literal_column("interval '1 month - 1 day'"),
+    Date,
+)
+
+
+class DashboardDigestService:
+    """Service for precomputed dashboard digests."""
+
+    @staticmethod
+    def build(db: Session, student_ids: Sequence[int], current_date: date) -> List[DashboardDigestResponse]:
+        """Compute the digests of a batch of students."""
+        student_ids = list(student_ids)
+        if not student_ids:
+            return []
+
+        students = db.execute(
+            select(Student.id, Student.monthly_budget, Student.budget_start_date)
+            .where(Student.id.in_(student_ids))
+            .order_by(Student.id)
+        ).all()
+
+        # Spending so far this cycle, per category
+        custom_name = case((Expense.category_id.is_(None), Expense.custom_category))
+        category_spend: Dict[int, Dict[tuple, Decimal]] = {}
+        for student_id, category_id, custom_category, total in db.execute(
+            select(Expense.student_id, Expense.category_id, custom_name, func.sum(Expense.amount))
+            .join(Student, Student.id == Expense.student_id)
+            .where(and_(
+                Expense.student_id.in_(student_ids),
+                Expense.expense_date >= Student.budget_start_date,
+                Expense.expense_date <= cycle_end,
+            ))
+            .group_by(Expense.student_id, Expense.category_id, custom_name)
+        ):
+            name = category_registry.name(category_id) or custom_category or UNCATEGORIZED
+            totals = category_spend.setdefault(student_id, {})
+            totals[(name, category_id)] = totals.get((name, category_id), Decimal("0.00")) + total
+
+        # Net money moved to investments this cycle
+        signed_amount = case(
+            (InvestmentTransaction.transaction_type == InvestmentTransactionType.INVEST, InvestmentTransaction.amount),
+            (InvestmentTransaction.transaction_type == InvestmentTransactionType.WITHDRAW, -InvestmentTransaction.amount),
+            else_=0,
+        )
+        transaction_date = func.date(InvestmentTransaction.created_at)
+        outflows: Dict[int, Decimal] = dict(db.execute(
+            select(Investment.student_id, func.sum(signed_amount))
+            .join(Investment, Investment.id == InvestmentTransaction.investment_id)
+            .join(Student, Student.id == Investment.student_id)
+            .where(and_(
+                Investment.student_id.in_(student_ids),
+                transaction_date >= Student.budget_start_date,
+                transaction_date <= cycle_end,
+            ))
+            .group_by(Investment.student_id)
+        ).all())
+
+        category_budgets: Dict[int, list] = {}
+        for student_id, category_id, daily_budget in db.execute(
+            select(StudentCategoryBudget.student_id, StudentCategoryBudget.category_id, StudentCategoryBudget.daily_budget)
+            .where(and_(
+                StudentCategoryBudget.student_id.in_(student_ids),
+                StudentCategoryBudget.is_active == True,
+            ))
+            .order_by(StudentCategoryBudget.student_id, StudentCategoryBudget.id)
+        ):
+            category_budgets.setdefault(student_id, []).append((category_id, daily_budget))
+
+        # Today's checklist amounts and unplanned spending
+        today_amounts: Dict[int, Dict[int, Decimal]] = {}
+        additional_today: Dict[int, Decimal] = {}
+        for student_id, category_id, is_additional, total in db.execute(
+            select(Expense.student_id, Expense.category_id, Expense.is_additional, func.sum(Expense.amount))
+            .where(and_(Expense.student_id.in_(student_ids), Expense.expense_date == current_date))
+            .group_by(Expense.student_id, Expense.category_id, Expense.is_additional)
+        ):
+            if is_additional or category_id is None:
+                additional_today[student_id] = additional_today.get(student_id, Decimal("0.00")) + total
+            else:
+                today_amounts.setdefault(student_id, {})[category_id] = total
+
+        forecasts = {
+            forecast.student_id: BudgetForecastResponse.model_validate(forecast)
+            for forecast in db.query(BudgetForecast).filter(BudgetForecast.student_id.in_(student_ids))
+        }
+
+        unread_alerts: Dict[int, int] = dict(db.execute(
+            select(AIAlert.student_id, func.count(AIAlert.id))
+            .where(and_(AIAlert.student_id.in_(student_ids), AIAlert.is_read == False))
+            .group_by(AIAlert.student_id)
+        ).all())
+
+        default_checklist = [
+            (template.category_id, Decimal("0.00")) for template in category_registry.snapshot.templates
+        ]
+        computed_at = datetime.now(timezone.utc)
+        from app.services.ai_service import AIService
+
+        digests = []
+        for student_id, monthly_budget, budget_start in students:
+            spend = category_spend.get(student_id, {})
+            total_spent = sum(spend.values(), Decimal("0.00"))
+            remaining_budget = monthly_budget - total_spent - outflows.get(student_id, Decimal("0.00"))
+            days_remaining = (_next_month_start(budget_start) - current_date).days
+
+            status = BudgetStatusResponse(
+                student_id=student_id,
+                monthly_budget=monthly_budget,
+                remaining_budget=remaining_budget,
+                total_spent=total_spent,
+                budget_start_date=budget_start,
+                days_elapsed=(current_date - budget_start).days,
+                days_remaining=days_remaining,
+                daily_budget_allowance=remaining_budget / days_remaining if days_remaining > 0 else Decimal("0.00"),
+                budget_health=AIService.calculate_budget_health(remaining_budget, monthly_budget, days_remaining),
+            )
+
+            amounts = today_amounts.get(student_id, {})
+            checklist = [
+                DashboardChecklistItem(
+                    category_id=category_id,
+                    category_name=category_registry.name(category_id),
+                    daily_budget=daily_budget,
+                    is_checked=category_id in amounts,
+                    amount=amounts.get(category_id),
+                )
+                for category_id, daily_budget in category_budgets.get(student_id) or default_checklist
+            ]
+
+            top = sorted(spend.items(), key=lambda item: item[1], reverse=True)[:settings.DIGEST_TOP_CATEGORIES]
+            digests.append(DashboardDigestResponse(
+                student_id=student_id,
+                as_of=current_date,
+                budget_status=status,
+                checklist=checklist,
+                additional_today=additional_today.get(student_id, Decimal("0.00")),
+                top_categories=[
+                    DashboardTopCategory(category_id=category_id, name=name, total=total)
+                    for (name, category_id), total in top
+                ],
+                forecast=forecasts.get(student_id),
+                unread_alerts=unread_alerts.get(student_id, 0),
+                computed_at=computed_at,
+            ))
+        return digests
+
+    @staticmethod
+    def store(db: Session, digests: List[DashboardDigestResponse]) -> None:
+        """Upsert digests (not committed)."""
+        if not digests:
+            return
+        digests_table = DashboardDigest.__table__
+        statement = pg_insert(digests_table)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[digests_table.c.student_id],
+                set_={
+                    "as_of": statement.excluded.as_of,
+                    "payload": statement.excluded.payload,
+                    "computed_at": func.now(),
+                },
+            ),
+            [
+                {"student_id": digest.student_id, "as_of": digest.as_of, "payload": digest.model_dump(mode="json")}
+                for digest in digests
+            ],
+        )
+
+    @staticmethod
+    def refresh(db: Session, student_id: int, current_date: date = None) -> DashboardDigestResponse:
+        """Rebuild and store one student's digest."""
+        if current_date is None:
+            current_date = date.today()
+        digests = DashboardDigestService.build(db, [student_id], current_date)
+        DashboardDigestService.store(db, digests)
+        db.commit()
+        return digests[0]
+
+    @staticmethod
+    def invalidate(db: Session, student_id: int) -> None:
+        """Drop a student's digest; the next read rebuilds it."""
+        db.execute(delete(DashboardDigest).where(DashboardDigest.student_id == student_id))
+        db.commit()
+
+    @staticmethod
+    def get(db: Session, student_id: int, current_date: date = None) -> DashboardDigestResponse:
+        """The stored digest, rebuilt first if it is missing or from an earlier day."""
+        if current_date is None:
+            current_date = date.today()
+        digest = db.get(DashboardDigest, student_id)
+        if digest is None or digest.as_of != current_date:
+            return DashboardDigestService.refresh(db, student_id, current_date)
+        return DashboardDigestResponse.model_validate(digest.payload)
+
+    @staticmethod
+    def run_batch(current_date: date = None, shard_size: int = None) -> int:
+        """Build and store the digest of every student; returns the count."""
+        if current_date is None:
+            current_date = date.today()
+        shard_size = shard_size or settings.DIGEST_SHARD_SIZE
+
+        db = SessionLocal()
+        try:
+            if not category_registry.snapshot.categories:
+                category_registry.refresh()
+            student_ids = db.execute(select(Student.id).order_by(Student.id)).scalars().all()
+            for start in range(0, len(student_ids), shard_size):
+                DashboardDigestService.store(
+                    db, DashboardDigestService.build(db, student_ids[start:start + shard_size], current_date)
+                )
+                db.commit()
+            return len(student_ids)
+        finally:
+            db.close()
+
+
+class AsyncDashboardDigestService:
+    """DashboardDigestService for AsyncSession callers (runs via ``run_sync``)."""
+
+    @staticmethod
+    async def refresh(db: AsyncSession, student_id: int) -> DashboardDigestResponse:
+        return await db.run_sync(lambda session: DashboardDigestService.refresh(session, student_id))
+
+    @staticmethod
+    async def invalidate(db: AsyncSession, student_id: int) -> None:
+        await db.run_sync(lambda session: DashboardDigestService.invalidate(session, student_id))
+
+    @staticmethod
+    async def get(db: AsyncSession, student_id: int) -> DashboardDigestResponse:
+        return await db.run_sync(lambda session: DashboardDigestService.get(session, student_id))
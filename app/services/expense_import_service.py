@@ -0,0 +1,269 @@
+"""
+Bulk expense ingestion for JSON batches and CSV uploads.
+
+Rows are processed in fixed-size chunks: each chunk is validated off the
+event loop (categories resolved from the in-memory registry), then written
+with one multi-row INSERT. The whole import is one transaction and the
+student's remaining budget is recomputed once at the end, instead of a
+commit and a recompute per expense.
+"""
+import csv
+import io
+from decimal import Decimal
+from itertools import islice
+from typing import Any, AsyncIterator, BinaryIO, List, Sequence, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.expense import Expense
+from app.models.student import Student
+from app.schemas.expense import ExpenseCreate, ExpenseImportError, ExpenseImportResult
+from app.services.category_registry import category_registry
+from app.services.post_write import AsyncPostWriteUpdates
+
+
+# Largest amount that fits Numeric(10, 2)
+MAX_EXPENSE_AMOUNT = Decimal("99999999.99")
+CUSTOM_CATEGORY_MAX_LENGTH = 100
+
+# (row number, raw record) pairs, as produced by the JSON and CSV readers
+Records = List[Tuple[int, Any]]
+
+
+class ExpenseImportTooLarge(ValueError):
+    """The import has more rows than EXPENSE_IMPORT_MAX_ROWS."""
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    """Flatten a pydantic error into one line per failed field."""
+    messages = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error["loc"])
+        messages.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return "; ".join(messages)
+
+
+def _csv_record(row: dict) -> dict:
+    """
+    Map a CSV row to ExpenseCreate fields.
+
+    Accepts the /expenses/export layout: ``category`` is matched against the
+    category names (case-insensitive) and otherwise used as a custom
+    category. Unknown columns (id, created_at, ...) are ignored.
+    """
+    values = {
+        key.strip().lower(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+        if key
+    }
+    record = {
+        "category_id": values.get("category_id") or None,
+        "amount": values.get("amount") or None,
+        "expense_date": values.get("expense_date") or None,
+        "custom_category": values.get("custom_category") or None,
+        "notes": values.get("notes") or None,
+    }
+
+    category = values.get("category")
+    if category and not record["category_id"]:
+        info = category_registry.find(category)
+        if info is not None:
+            record["category_id"] = info.id
+        elif not record["custom_category"]:
+            record["custom_category"] = category
+
+    is_additional = values.get("is_additional")
+    record["is_additional"] = is_additional if is_additional else record["category_id"] is None
+    return record
+
+
+class ExpenseImportService:
+    """Service for bulk expense ingestion."""
+
+    @staticmethod
+    def validate_rows(records: Records, student_id: int) -> Tuple[List[Tuple[int, dict]], List[ExpenseImportError]]:
+        """
+        Validate one chunk of records.
+
+        Returns the insertable rows (with their row numbers) and the errors
+        for the rest. Pure CPU work; callers run it in a worker thread.
+        """
+        snapshot = category_registry.snapshot
+        valid = []
+        errors = []
+
+        for row, record in records:
+            try:
+                expense = ExpenseCreate.model_validate(record)
+            except ValidationError as exc:
+                errors.append(ExpenseImportError(row=row, error=_format_validation_error(exc)))
+                continue
+
+            error = None
+            if expense.category_id is not None and expense.category_id not in snapshot.by_id:
+                error = f"Expense category {expense.category_id} not found"
+            elif expense.amount > MAX_EXPENSE_AMOUNT:
+                error = f"amount must be at most {MAX_EXPENSE_AMOUNT}"
+            elif expense.custom_category and len(expense.custom_category) > CUSTOM_CATEGORY_MAX_LENGTH:
+                error = f"custom_category must be at most {CUSTOM_CATEGORY_MAX_LENGTH} characters"
+
+            if error:
+                errors.append(ExpenseImportError(row=row, error=error))
+                continue
+
+            valid.append((row, {
+                "student_id": student_id,
+                "category_id": expense.category_id,
+                "amount": expense.amount,
+                "expense_date": expense.expense_date,
+                "is_additional": expense.is_additional,
+                "custom_category": expense.custom_category,
+                "notes": expense.notes,
+            }))
+
+        return valid, errors
+
+    @staticmethod
+    async def json_chunks(items: Sequence[Any], chunk_size: int) -> AsyncIterator[Records]:
+        """Split a JSON array into chunks of (index, item)."""
+        if len(items) > settings.EXPENSE_IMPORT_MAX_ROWS:
+            raise ExpenseImportTooLarge(f"At most {settings.EXPENSE_IMPORT_MAX_ROWS} rows per import")
+        for start in range(0, len(items), chunk_size):
+            yield list(enumerate(items[start:start + chunk_size], start))
+
+    @staticmethod
+    async def csv_chunks(file: BinaryIO, chunk_size: int) -> AsyncIterator[Records]:
+        """
+        Read an uploaded CSV file in chunks of (line number, record).
+
+        The file is parsed incrementally in a worker thread, so a large
+        upload is never decoded into memory at once.
+        """
+        stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(stream)
+
+        def read_chunk() -> Records:
+            return [(reader.line_num, _csv_record(row)) for row in islice(reader, chunk_size)]
+
+        received = 0
+        try:
+            while True:
+                try:
+                    chunk = await run_in_threadpool(read_chunk)
+                except (csv.Error, UnicodeDecodeError) as exc:
+                    raise ValueError(f"Invalid CSV file: {exc}")
+                if not chunk:
+                    break
+                columns = {name.strip().lower() for name in reader.fieldnames or () if name}
+                if not {"expense_date", "amount"} <= columns:
+                    raise ValueError("CSV header must include expense_date and amount columns")
+                received += len(chunk)
+                if received > settings.EXPENSE_IMPORT_MAX_ROWS:
+                    raise ExpenseImportTooLarge(f"At most {settings.EXPENSE_IMPORT_MAX_ROWS} rows per import")
+                yield chunk
+        finally:
+            stream.detach()
+
+    @staticmethod
+    async def _insert_rows(
+        db: AsyncSession,
+        rows: List[Tuple[int, dict]],
+    ) -> Tuple[int, List[ExpenseImportError], List[tuple]]:
+        """
+        Insert validated rows with one multi-row INSERT.
+
+        Returns the inserted count, the conflict errors and the inserted
+        (category_id, expense_date, amount) tuples.
+
+        Checklist entries that already exist (same category and day) are
+        skipped by the partial unique index and reported as row errors.
+        """
+        expenses_table = Expense.__table__
+        statement = pg_insert(expenses_table).on_conflict_do_nothing(
+            index_elements=[expenses_table.c.student_id, expenses_table.c.category_id, expenses_table.c.expense_date],
+            index_where=text("NOT is_additional"),
+        ).returning(
+            expenses_table.c.category_id,
+            expenses_table.c.expense_date,
+            expenses_table.c.is_additional,
+            expenses_table.c.amount,
+        )
+
+        result = await db.execute(statement, [values for _, values in rows])
+        returned = result.all()
+        inserted_keys = {
+            (category_id, expense_date)
+            for category_id, expense_date, is_additional, _ in returned
+            if not is_additional
+        }
+
+        errors = [
+            ExpenseImportError(row=row, error="A checklist entry for this category and date already exists")
+            for row, values in rows
+            if not values["is_additional"]
+            and (values["category_id"], values["expense_date"]) not in inserted_keys
+        ]
+        amounts = [(category_id, expense_date, amount) for category_id, expense_date, _, amount in returned]
+        return len(returned), errors, amounts
+
+    @staticmethod
+    async def ingest(
+        db: AsyncSession,
+        student: Student,
+        chunks: AsyncIterator[Records],
+    ) -> ExpenseImportResult:
+        """
+        Validate and insert every chunk, then commit and update the budget once.
+
+        Invalid rows are skipped and reported; valid rows are inserted. On
+        an error that aborts the import nothing is committed.
+        """
+        received = 0
+        inserted = 0
+        errors: List[ExpenseImportError] = []
+        seen_checklist_keys = set()
+        amounts = []
+
+        async for records in chunks:
+            received += len(records)
+            valid, chunk_errors = await run_in_threadpool(ExpenseImportService.validate_rows, records, student.id)
+            errors.extend(chunk_errors)
+
+            # One checklist entry per category and day within the import too
+            rows = []
+            for row, values in valid:
+                if not values["is_additional"]:
+                    key = (values["category_id"], values["expense_date"])
+                    if key in seen_checklist_keys:
+                        errors.append(ExpenseImportError(
+                            row=row,
+                            error="Duplicate checklist entry for this category and date in the import",
+                        ))
+                        continue
+                    seen_checklist_keys.add(key)
+                rows.append((row, values))
+
+            if rows:
+                chunk_inserted, conflict_errors, chunk_amounts = await ExpenseImportService._insert_rows(db, rows)
+                inserted += chunk_inserted
+                amounts.extend(chunk_amounts)
+                errors.extend(conflict_errors)
+
+        if inserted:
+            await db.commit()
+            await AsyncPostWriteUpdates.after_expense_write(
+                student,
+                {(category_id, expense_date) for category_id, expense_date, _ in amounts},
+                amounts,
+            )
+
+        errors.sort(key=lambda error: error.row)
+        return ExpenseImportResult(
+            received=received,
+            inserted=inserted,
+            failed=len(errors),
+            errors=errors[:settings.EXPENSE_IMPORT_MAX_ERRORS],
+        )
@@ -0,0 +1,119 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read through a server-side cursor in fixed-size partitions on the
+analytics engine and encoded (and optionally gzipped) one partition at a
+time, so memory use stays flat however many rows a student has.
+"""
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Sequence
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+from app.database import AnalyticsSessionLocal
+
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_BATCH_SIZE = 2000
+
+
+def _json_value(value):
+    """Convert a column value to a JSON-compatible value."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _csv_value(value):
+    """Convert a column value for a CSV cell."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+class ExportService:
+    """Service for streaming exports."""
+
+    @staticmethod
+    async def stream_rows(
+        statement: Select,
+        fields: Sequence[str],
+        export_format: str,
+        to_values: Callable[[dict], Sequence],
+        compress: bool = False,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """
+        Execute ``statement`` with a server-side cursor and yield encoded chunks.
+
+        ``to_values`` maps each result row (as a mapping) to values in
+        ``fields`` order. The generator opens its own analytics session, so
+        the connection is held only while the response body is streaming.
+        """
+        compressor = zlib.compressobj(wbits=31) if compress else None  # gzip container
+
+        def emit(text: str) -> bytes:
+            data = text.encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+        if writer:
+            writer.writerow(fields)
+
+        async with AnalyticsSessionLocal() as db:
+            result = await db.stream(statement.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                if writer:
+                    writer.writerows([_csv_value(v) for v in to_values(row)] for row in partition)
+                else:
+                    for row in partition:
+                        buffer.write(json.dumps(
+                            dict(zip(fields, (_json_value(v) for v in to_values(row)))),
+                            separators=(",", ":"),
+                        ))
+                        buffer.write("\n")
+
+                chunk = emit(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if chunk:
+                    yield chunk
+
+        tail = emit(buffer.getvalue())
+        if compressor:
+            tail += compressor.flush()
+        if tail:
+            yield tail
+
+    @staticmethod
+    def response(
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        export_format: str,
+        compress: bool = False,
+    ) -> StreamingResponse:
+        """Wrap encoded chunks in a downloadable streaming response."""
+        headers = {"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=headers,
+        )
@@ -0,0 +1,273 @@
+"""
+Budget burn-rate forecasting.
+
+For every student the nightly batch projects spending to the end of the
+current budget cycle and stores the month-end balance and the expected
+day the budget runs out (BudgetForecast), so the dashboard and the alert
+rules read a stored row instead of recomputing.
+
+The model works on a (students x days) matrix of daily spend:
+
+- day-of-week factors: each student's mean spend per weekday relative to
+  their overall daily mean, shrunk toward 1 when there is little history;
+- daily rate: exponentially weighted mean of the deseasonalized spend
+  (recent days count more, half-life FORECAST_HALFLIFE_DAYS);
+- projection: rate x weekday factor for each remaining day of the cycle.
+
+All of it is NumPy array arithmetic over the whole matrix; the batch is
+split into shards of students that run on a process pool.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.config import settings
+from app.database import SessionLocal
+from app.models.expense import Expense
+from app.models.forecast import BudgetForecast
+from app.models.student import Student
+
+
+# (id, budget_start_date, remaining_budget, created_at date) per student
+StudentRow = Tuple[int, date, Decimal, Optional[date]]
+
+NO_EXHAUSTION = -1
+
+
+@dataclass
+class ForecastArrays:
+    """Per-student forecast results (one element per matrix row)."""
+    daily_rate: np.ndarray
+    projected_spend: np.ndarray
+    month_end_balance: np.ndarray
+    exhaustion_offset: np.ndarray  # Days after as_of the budget runs out, or NO_EXHAUSTION
+
+
+def _cycle_end(budget_start: date) -> date:
+    """Last day of the budget cycle starting on budget_start."""
+    if budget_start.month == 12:
+        next_month_start = date(budget_start.year + 1, 1, 1)
+    else:
+        next_month_start = date(budget_start.year, budget_start.month + 1, 1)
+    return next_month_start - timedelta(days=1)
+
+
+def forecast(
+    spend: np.ndarray,
+    first_weekday: int,
+    active_from: np.ndarray,
+    remaining: np.ndarray,
+    horizon: np.ndarray,
+    halflife_days: float,
+    prior_days: float,
+) -> ForecastArrays:
+    """
+    Project spending for every row of a daily spend matrix.
+
+    Args:
+        spend: (n, D) daily spend; column D-1 is the as-of day
+        first_weekday: weekday (Monday=0) of column 0
+        active_from: (n,) first column with data for each student (days
+            before the account existed are ignored)
+        remaining: (n,) remaining budget at the as-of day
+        horizon: (n,) days left in each student's cycle after the as-of day
+        halflife_days: EWMA half-life
+        prior_days: pseudo-days at the overall mean added to each weekday
+    """
+    n, days = spend.shape
+    columns = np.arange(days)
+    weekday = (first_weekday + columns) % 7
+    weekday_onehot = np.eye(7)[weekday]  # (D, 7)
+
+    active = columns[None, :] >= active_from[:, None]  # (n, D)
+    spend = np.where(active, spend, 0.0)
+    active_days = active.sum(axis=1)
+    overall_mean = np.divide(spend.sum(axis=1), active_days, out=np.zeros(n), where=active_days > 0)
+
+    # Day-of-week factors, shrunk toward the overall mean
+    weekday_sums = spend @ weekday_onehot  # (n, 7)
+    weekday_counts = active @ weekday_onehot  # (n, 7)
+    weekday_mean = (weekday_sums + prior_days * overall_mean[:, None]) / (weekday_counts + prior_days)
+    has_spend = overall_mean > 0
+    factor = np.ones((n, 7))
+    np.divide(weekday_mean, overall_mean[:, None], out=factor, where=has_spend[:, None])
+
+    # Exponentially weighted mean of the deseasonalized daily spend
+    decay = 0.5 ** (1.0 / halflife_days)
+    weights = np.where(active, decay ** (days - 1 - columns)[None, :], 0.0)
+    daily_factor = factor[:, weekday]
+    deseasonalized = np.divide(spend, daily_factor, out=np.zeros_like(spend), where=daily_factor > 0)
+    weight_totals = weights.sum(axis=1)
+    daily_rate = np.divide(
+        (deseasonalized * weights).sum(axis=1),
+        weight_totals,
+        out=np.zeros(n),
+        where=weight_totals > 0,
+    )
+
+    # Expected spend for each remaining day of the cycle
+    max_horizon = int(horizon.max()) if n else 0
+    if max_horizon == 0:
+        # Every cycle ends on the as-of day: nothing left to project
+        projected_spend = np.zeros(n)
+        exhaustion_offset = np.full(n, NO_EXHAUSTION)
+    else:
+        ahead = np.arange(max_horizon)
+        future_weekday = (first_weekday + days + ahead) % 7
+        expected = daily_rate[:, None] * factor[:, future_weekday]
+        expected[ahead[None, :] >= horizon[:, None]] = 0.0
+
+        cumulative = np.cumsum(expected, axis=1)
+        projected_spend = cumulative[:, -1]
+
+        # First future day on which cumulative spend exceeds the remaining budget
+        over = cumulative > remaining[:, None]
+        exhaustion_offset = np.where(over.any(axis=1), over.argmax(axis=1) + 1, NO_EXHAUSTION)
+    exhaustion_offset = np.where(remaining <= 0, 0, exhaustion_offset)
+
+    return ForecastArrays(
+        daily_rate=daily_rate,
+        projected_spend=projected_spend,
+        month_end_balance=remaining - projected_spend,
+        exhaustion_offset=exhaustion_offset,
+    )
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(float(value), 2)))
+
+
+def _forecast_shard(students: Sequence[StudentRow], as_of: date) -> int:
+    """Load one shard's spend matrix, forecast it and upsert the results."""
+    if not students:
+        return 0
+
+    history_days = settings.FORECAST_HISTORY_DAYS
+    history_start = as_of - timedelta(days=history_days - 1)
+    ids = np.array([student[0] for student in students], dtype=np.int64)
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Expense.student_id, Expense.expense_date, func.sum(Expense.amount))
+            .where(and_(
+                Expense.student_id.between(int(ids[0]), int(ids[-1])),
+                Expense.expense_date >= history_start,
+                Expense.expense_date <= as_of,
+            ))
+            .group_by(Expense.student_id, Expense.expense_date)
+        ).all()
+
+        spend = np.zeros((len(ids), history_days))
+        if rows:
+            student_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            positions = np.searchsorted(ids, student_ids)
+            known = (positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == student_ids)
+            offsets = np.fromiter(((row[1] - history_start).days for row in rows), dtype=np.int64, count=len(rows))
+            totals = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+            spend[positions[known], offsets[known]] = totals[known]
+
+        cycle_ends = [_cycle_end(student[1]) for student in students]
+        # A student's history starts when the account was created, or at
+        # their first expense if that is earlier (imported/backdated data)
+        created_from = np.array([
+            max(0, (created - history_start).days) if created else 0
+            for _, _, _, created in students
+        ])
+        has_spend = spend > 0
+        first_spend = np.where(has_spend.any(axis=1), has_spend.argmax(axis=1), history_days)
+        active_from = np.minimum(created_from, first_spend)
+        remaining = np.array([float(student[2] or 0) for student in students])
+        horizon = np.array([max(0, (end - as_of).days) for end in cycle_ends])
+
+        result = forecast(
+            spend,
+            history_start.weekday(),
+            active_from,
+            remaining,
+            horizon,
+            settings.FORECAST_HALFLIFE_DAYS,
+            settings.FORECAST_SEASONALITY_PRIOR_DAYS,
+        )
+
+        values = [
+            {
+                "student_id": int(ids[i]),
+                "as_of": as_of,
+                "cycle_end": cycle_ends[i],
+                "remaining_budget": _money(remaining[i]),
+                "daily_spend_rate": _money(result.daily_rate[i]),
+                "projected_spend": _money(result.projected_spend[i]),
+                "projected_month_end_balance": _money(result.month_end_balance[i]),
+                "exhaustion_date": (
+                    as_of + timedelta(days=int(result.exhaustion_offset[i]))
+                    if result.exhaustion_offset[i] != NO_EXHAUSTION else None
+                ),
+            }
+            for i in range(len(ids))
+        ]
+
+        forecasts_table = BudgetForecast.__table__
+        statement = pg_insert(forecasts_table)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[forecasts_table.c.student_id],
+                set_={
+                    **{column: statement.excluded[column] for column in values[0] if column != "student_id"},
+                    "computed_at": func.now(),
+                },
+            ),
+            values,
+        )
+        db.commit()
+        return len(values)
+    finally:
+        db.close()
+
+
+class ForecastService:
+    """Service for budget forecasts."""
+
+    @staticmethod
+    def run_batch(
+        as_of: date = None,
+        workers: int = None,
+        shard_size: int = None,
+    ) -> int:
+        """
+        Forecast every student and store the results; returns the count.
+
+        as_of defaults to yesterday (the last complete day) for a run
+        shortly after midnight.
+        """
+        if as_of is None:
+            as_of = date.today() - timedelta(days=1)
+        workers = settings.FORECAST_WORKERS if workers is None else workers
+        shard_size = shard_size or settings.FORECAST_SHARD_SIZE
+
+        db = SessionLocal()
+        try:
+            students: List[StudentRow] = [
+                (student_id, budget_start, remaining, created_at.date() if created_at else None)
+                for student_id, budget_start, remaining, created_at in db.execute(
+                    select(Student.id, Student.budget_start_date, Student.remaining_budget, Student.created_at)
+                    .order_by(Student.id)
+                )
+            ]
+        finally:
+            db.close()
+
+        shards = [students[i:i + shard_size] for i in range(0, len(students), shard_size)]
+        if workers <= 1 or len(shards) <= 1:
+            return sum(_forecast_shard(shard, as_of) for shard in shards)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            return sum(executor.map(_forecast_shard, shards, [as_of] * len(shards)))
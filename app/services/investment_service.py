@@ -3,13 +3,16 @@ Investment service for managing student investments and transactions.
 """
 import logging
 from datetime import datetime, timezone
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from decimal import Decimal
-import httpx
-from app.config import settings
+from typing import Optional
 from app.models.investment import Investment, InvestmentTransaction, InvestmentTransactionType
 from app.schemas.investment import InvestmentSummaryResponse, MarketNewsResponse, MarketNewsItemResponse
+from app.services.news_providers import get_news_providers, fetch_from_providers, merge_articles
+from app.services.news_sentiment import score_articles
 
 
 logger = logging.getLogger(__name__)
@@ -18,16 +21,6 @@ logger = logging.getLogger(__name__)
 class InvestmentService:
     """Service for investment-related operations."""
 
-    MARKETAUX_NEWS_URL = "https://api.marketaux.com/v1/news/all"
-
-    MUTUAL_FUND_KEYWORDS = {
-        "mutual fund", "mutual funds", "fund inflow", "sip", "systematic investment plan",
-        "asset management", "amc", "index fund", "etf", "equity fund", "debt fund"
-    }
-    FD_KEYWORDS = {
-        "fixed deposit", "fd rates", "deposit rates", "interest rates", "rate cut", "rate hike",
-        "bond yields", "treasury yield", "fixed income", "safe return", "capital protection"
-    }
     FINANCE_KEYWORDS = {
         "finance", "financial", "market", "markets", "investment", "investing", "bank", "banking",
         "stock", "stocks", "equity", "mutual fund", "fund", "funds", "fixed deposit", "fd",
@@ -42,26 +35,6 @@ class InvestmentService:
         "business", "company", "corporate", "industry", "sector",
     }
 
-    @staticmethod
-    def _build_suggestions(text: str) -> list[str]:
-        """Build conservative investment suggestions from article text."""
-        lower_text = text.lower()
-        suggestions = []
-
-        if any(keyword in lower_text for keyword in InvestmentService.MUTUAL_FUND_KEYWORDS):
-            suggestions.append("Review mutual fund SIP opportunities")
-
-        if any(keyword in lower_text for keyword in InvestmentService.FD_KEYWORDS):
-            suggestions.append("Check fixed deposit options for stable returns")
-
-        if "inflation" in lower_text or "volatility" in lower_text or "risk" in lower_text:
-            suggestions.append("Prefer diversified low-risk allocation")
-
-        if not suggestions:
-            suggestions.append("Track market trend before choosing investment products")
-
-        return suggestions
-
     @staticmethod
     def _is_finance_related(text: str) -> bool:
         """Return True when article text is finance-related."""
@@ -264,133 +237,152 @@ class InvestmentService:
             total_withdrawn=total_withdrawn
         )
 
-    # Simple in-memory cache for news: {cache_key: (timestamp, MarketNewsResponse)}
+    # In-memory cache of scored articles: {"articles": (timestamp, articles, note)}
     _news_cache: dict = {}
     _CACHE_TTL_SECONDS = 300  # 5 minutes
+    _NEWS_POOL_SIZE = 20  # Articles requested from each provider per refresh
+
+    NEWS_SORT_OPTIONS = {"recent", "sentiment", "-sentiment"}
 
     @staticmethod
-    def get_market_news(limit: int = 10) -> MarketNewsResponse:
+    def _refresh_news_pool(providers: list) -> tuple[list[dict], Optional[str]]:
         """
-        Fetch live finance news from MarketAux API and curate investment-focused suggestions.
+        Fetch, merge and score a fresh pool of articles.
 
-        - Fetches financial news for popular symbols (TSLA, AMZN, MSFT, AAPL, GOOGL)
-        - Caches results for 5 minutes to avoid rate-limit issues
-        - Enriches articles with investment suggestions based on content
+        Sentiment and topics are computed here, once per ingested article,
+        and cached alongside it so requests never re-process article text.
         """
-        if not settings.MARKETAUX_API_TOKEN:
-            logger.warning("MARKETAUX_API_TOKEN is empty – cannot fetch market news")
-            return MarketNewsResponse(
-                items=[],
-                fetched_at=datetime.now(timezone.utc),
-                note="MARKETAUX_API_TOKEN is not configured. Add it to .env to fetch live market news."
-            )
+        logger.info(f"Fetching market news from {', '.join(p.name for p in providers)}…")
+        batches, failed = fetch_from_providers(providers, InvestmentService._NEWS_POOL_SIZE)
 
-        # Check cache first
-        cache_key = f"news_{limit}"
-        cached = InvestmentService._news_cache.get(cache_key)
-        if cached:
-            cached_time, cached_response = cached
-            age = (datetime.now(timezone.utc) - cached_time).total_seconds()
-            if age < InvestmentService._CACHE_TTL_SECONDS:
-                logger.info(f"Returning cached market news ({age:.0f}s old)")
-                return cached_response
+        if not batches:
+            logger.warning(f"All market news providers failed: {', '.join(failed)}")
+            return [], "Failed to fetch market news. Please try again shortly."
 
-        try:
-            logger.info("Fetching MarketAux news…")
-            response = httpx.get(
-                InvestmentService.MARKETAUX_NEWS_URL,
-                params={
-                    "symbols": "TSLA,AMZN,MSFT,AAPL,GOOGL",
-                    "filter_entities": "true",
-                    "language": "en",
-                    "api_token": settings.MARKETAUX_API_TOKEN,
-                    "limit": min(limit, 50),
-                },
-                timeout=15.0,
-            )
-            response.raise_for_status()
-            payload = response.json()
-            raw_items = payload.get("data", [])
-            logger.info(f"MarketAux returned {len(raw_items)} articles")
-        except Exception as exc:
-            logger.warning(f"MarketAux request failed: {exc}")
-            result = MarketNewsResponse(
-                items=[],
-                fetched_at=datetime.now(timezone.utc),
-                note="Failed to fetch market news. Please try again shortly."
-            )
-            # Cache failure for 60 seconds to avoid hammering the API
-            InvestmentService._news_cache[cache_key] = (datetime.now(timezone.utc), result)
-            return result
+        articles = score_articles(merge_articles(batches))
+        raw_count = sum(len(batch) for batch in batches)
+        logger.info(f"Scored {len(articles)} unique articles from {raw_count} total")
+        return articles, None
 
-        if not raw_items:
-            logger.warning("MarketAux returned empty results")
-            result = MarketNewsResponse(
+    @staticmethod
+    def get_market_news(
+        limit: int = 10,
+        sentiment: Optional[str] = None,
+        topic: Optional[str] = None,
+        sort: str = "recent",
+    ) -> MarketNewsResponse:
+        """
+        Fetch live finance news from all configured providers and curate
+        investment-focused suggestions.
+
+        - Queries MarketAux and Finnhub concurrently with per-provider timeouts
+        - Merges feeds, de-duplicating by normalized URL and headline hash
+        - Scores sentiment and topics once per article at ingest time
+        - Caches scored articles for 5 minutes to avoid rate-limit issues
+        - Filters by sentiment label / topic and sorts using cached scores only
+        """
+        providers = get_news_providers()
+        if not providers:
+            logger.warning("No market news provider configured – cannot fetch market news")
+            return MarketNewsResponse(
                 items=[],
                 fetched_at=datetime.now(timezone.utc),
-                note="No market news available right now. Try again shortly."
+                note="No market news provider is configured. Add MARKETAUX_API_TOKEN or FINNHUB_API_KEY to .env to fetch live market news."
             )
-            InvestmentService._news_cache[cache_key] = (datetime.now(timezone.utc), result)
-            return result
 
-        # De-duplicate by URL
-        seen_urls: set[str] = set()
-        unique_items = []
-        for item in raw_items:
-            url = item.get("url", "")
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                unique_items.append(item)
+        # Check cache first
+        cached = InvestmentService._news_cache.get("articles")
+        age = (datetime.now(timezone.utc) - cached[0]).total_seconds() if cached else None
+        if age is not None and age < InvestmentService._CACHE_TTL_SECONDS:
+            fetched_at, articles, note = cached
+            logger.info(f"Using cached market news ({age:.0f}s old)")
+        else:
+            articles, note = InvestmentService._refresh_news_pool(providers)
+            fetched_at = datetime.now(timezone.utc)
+            # Failures are cached too, to avoid hammering the APIs
+            InvestmentService._news_cache["articles"] = (fetched_at, articles, note)
 
-        # Build curated response — MarketAux returns finance news,
-        # so we accept all articles and enrich with investment suggestions.
-        curated_items: list[MarketNewsItemResponse] = []
-        for item in unique_items:
-            title = item.get("title") or ""
-            description = item.get("description") or ""
-            url = item.get("url")
-            if not title or not url:
-                continue
+        selected = articles
+        if sentiment:
+            selected = [item for item in selected if item["sentiment_label"] == sentiment]
+        if topic:
+            selected = [item for item in selected if topic in item["topics"]]
+        if sort == "sentiment":
+            selected = sorted(selected, key=lambda item: item["sentiment_score"], reverse=True)
+        elif sort == "-sentiment":
+            selected = sorted(selected, key=lambda item: item["sentiment_score"])
 
-            full_text = f"{title} {description}"
-            suggestions = InvestmentService._build_suggestions(full_text)
+        curated_items = [MarketNewsItemResponse(**item) for item in selected[:limit]]
 
-            # MarketAux published_at is ISO format string
-            published_at_str = item.get("published_at", "")
-            try:
-                published_at = datetime.fromisoformat(published_at_str.replace("Z", "+00:00"))
-            except (ValueError, AttributeError):
-                published_at = datetime.now(timezone.utc)
+        if not curated_items and note is None:
+            note = "No market news available right now. Try again shortly."
 
-            curated_items.append(
-                MarketNewsItemResponse(
-                    headline=title,
-                    summary=description,
-                    url=url,
-                    source=item.get("source"),
-                    published_at=published_at,
-                    image_url=item.get("image_url"),
-                    suggestions=suggestions,
-                )
-            )
+        return MarketNewsResponse(
+            items=curated_items,
+            fetched_at=fetched_at,
+            note=note,
+        )
 
-            if len(curated_items) >= limit:
-                break
 
-        logger.info(f"Curated {len(curated_items)} articles from {len(raw_items)} total")
+class AsyncInvestmentService:
+    """
+    InvestmentService for AsyncSession callers.
 
-        note = None
-        if not curated_items:
-            note = "No market news available right now. Try again shortly."
+    Database work runs through ``AsyncSession.run_sync``; the blocking news
+    provider fan-out runs in the threadpool.
+    """
 
-        result = MarketNewsResponse(
-            items=curated_items,
-            fetched_at=datetime.now(timezone.utc),
-            note=note,
+    @staticmethod
+    async def create_investment(
+        db: AsyncSession,
+        student_id: int,
+        initial_balance: Decimal,
+        monthly_interest_rate: Decimal
+    ) -> Investment:
+        return await db.run_sync(
+            lambda session: InvestmentService.create_investment(
+                session, student_id, initial_balance, monthly_interest_rate
+            )
+        )
+
+    @staticmethod
+    async def deposit(
+        db: AsyncSession,
+        investment: Investment,
+        amount: Decimal,
+        notes: str = None
+    ) -> Investment:
+        return await db.run_sync(
+            lambda session: InvestmentService.deposit(session, investment, amount, notes)
         )
 
-        # Cache successful results
-        InvestmentService._news_cache[cache_key] = (datetime.now(timezone.utc), result)
+    @staticmethod
+    async def withdraw(
+        db: AsyncSession,
+        investment: Investment,
+        amount: Decimal,
+        notes: str = None
+    ) -> Investment:
+        return await db.run_sync(
+            lambda session: InvestmentService.withdraw(session, investment, amount, notes)
+        )
 
-        return result
+    @staticmethod
+    async def get_investment_summary(
+        db: AsyncSession,
+        investment: Investment
+    ) -> InvestmentSummaryResponse:
+        return await db.run_sync(
+            lambda session: InvestmentService.get_investment_summary(session, investment)
+        )
 
+    @staticmethod
+    async def get_market_news(
+        limit: int = 10,
+        sentiment: Optional[str] = None,
+        topic: Optional[str] = None,
+        sort: str = "recent",
+    ) -> MarketNewsResponse:
+        return await run_in_threadpool(
+            InvestmentService.get_market_news, limit, sentiment, topic, sort
+        )
@@ -0,0 +1,232 @@
+"""
+Market news provider adapters.
+
+Each provider fetches articles from one upstream API and normalizes them
+into plain dicts so the investment service can merge feeds from several
+sources without caring where an article came from.
+"""
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from time import monotonic
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import httpx
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only carry tracking information
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid"}
+
+# Shared pool for provider fan-out (one slot per provider is enough)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news-provider")
+
+
+def normalize_url(url: str) -> str:
+    """Normalize an article URL for de-duplication across providers."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def title_hash(title: str) -> str:
+    """Hash a headline after collapsing case, punctuation and whitespace."""
+    collapsed = " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+    return hashlib.sha1(collapsed.encode("utf-8")).hexdigest()
+
+
+class NewsProvider:
+    """Base class for market news providers."""
+
+    name = "base"
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+    def is_configured(self) -> bool:
+        """Return True when the provider has the credentials it needs."""
+        raise NotImplementedError
+
+    def fetch(self, limit: int) -> List[dict]:
+        """
+        Fetch and normalize articles.
+
+        Returns dicts with keys: headline, summary, url, source,
+        published_at (aware datetime), image_url.
+        """
+        raise NotImplementedError
+
+
+class MarketAuxProvider(NewsProvider):
+    """MarketAux news adapter."""
+
+    name = "marketaux"
+    NEWS_URL = "https://api.marketaux.com/v1/news/all"
+
+    def is_configured(self) -> bool:
+        return bool(settings.MARKETAUX_API_TOKEN)
+
+    def fetch(self, limit: int) -> List[dict]:
+        response = httpx.get(
+            self.NEWS_URL,
+            params={
+                "symbols": "TSLA,AMZN,MSFT,AAPL,GOOGL",
+                "filter_entities": "true",
+                "language": "en",
+                "api_token": settings.MARKETAUX_API_TOKEN,
+                "limit": min(limit, 50),
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        items = []
+        for item in response.json().get("data", []):
+            # MarketAux published_at is ISO format string
+            published_at_str = item.get("published_at", "")
+            try:
+                published_at = datetime.fromisoformat(published_at_str.replace("Z", "+00:00"))
+            except (ValueError, AttributeError):
+                published_at = datetime.now(timezone.utc)
+
+            items.append({
+                "headline": item.get("title") or "",
+                "summary": item.get("description") or "",
+                "url": item.get("url") or "",
+                "source": item.get("source"),
+                "published_at": published_at,
+                "image_url": item.get("image_url"),
+            })
+        return items
+
+
+class FinnhubProvider(NewsProvider):
+    """Finnhub general market news adapter."""
+
+    name = "finnhub"
+    NEWS_URL = "https://finnhub.io/api/v1/news"
+
+    def is_configured(self) -> bool:
+        return bool(settings.FINNHUB_API_KEY)
+
+    def fetch(self, limit: int) -> List[dict]:
+        response = httpx.get(
+            self.NEWS_URL,
+            params={"category": "general", "token": settings.FINNHUB_API_KEY},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        items = []
+        for item in response.json()[:50]:
+            # Finnhub datetime is a UNIX timestamp in seconds
+            try:
+                published_at = datetime.fromtimestamp(int(item.get("datetime")), tz=timezone.utc)
+            except (TypeError, ValueError):
+                published_at = datetime.now(timezone.utc)
+
+            items.append({
+                "headline": item.get("headline") or "",
+                "summary": item.get("summary") or "",
+                "url": item.get("url") or "",
+                "source": item.get("source"),
+                "published_at": published_at,
+                "image_url": item.get("image") or None,
+            })
+        return items
+
+
+def get_news_providers() -> List[NewsProvider]:
+    """Return all configured news providers."""
+    timeout = settings.NEWS_PROVIDER_TIMEOUT_SECONDS
+    providers = [MarketAuxProvider(timeout), FinnhubProvider(timeout)]
+    return [provider for provider in providers if provider.is_configured()]
+
+
+def merge_articles(batches: List[List[dict]]) -> List[dict]:
+    """
+    Merge provider batches, de-duplicating by normalized URL and title hash,
+    newest first.
+    """
+    seen_urls: set[str] = set()
+    seen_titles: set[str] = set()
+    merged = []
+    for batch in batches:
+        for item in batch:
+            if not item["headline"] or not item["url"]:
+                continue
+            url_key = normalize_url(item["url"])
+            title_key = title_hash(item["headline"])
+            if url_key in seen_urls or title_key in seen_titles:
+                continue
+            seen_urls.add(url_key)
+            seen_titles.add(title_key)
+            merged.append(item)
+
+    merged.sort(key=lambda item: item["published_at"], reverse=True)
+    return merged
+
+
+def fetch_from_providers(
+    providers: List[NewsProvider],
+    limit: int,
+    deadline_seconds: Optional[float] = None,
+) -> tuple[List[List[dict]], List[str]]:
+    """
+    Query providers concurrently.
+
+    Returns as soon as one provider has delivered at least ``limit``
+    articles, so total latency follows the fastest acceptable provider
+    instead of the slowest. Providers still running at that point (or at
+    the overall deadline) are abandoned.
+
+    Returns:
+        (batches, failed provider names)
+    """
+    if deadline_seconds is None:
+        deadline_seconds = settings.NEWS_PROVIDER_TIMEOUT_SECONDS
+
+    futures = {_executor.submit(provider.fetch, limit): provider for provider in providers}
+    batches: List[List[dict]] = []
+    failed: List[str] = []
+    pending = set(futures)
+    deadline = monotonic() + deadline_seconds
+
+    while pending:
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            provider = futures[future]
+            try:
+                batch = future.result()
+            except Exception as exc:
+                logger.warning(f"{provider.name} request failed: {exc}")
+                failed.append(provider.name)
+                continue
+            logger.info(f"{provider.name} returned {len(batch)} articles")
+            batches.append(batch)
+        if pending and any(len(batch) >= limit for batch in batches):
+            pending_names = ", ".join(futures[f].name for f in pending)
+            logger.info(f"Not waiting for slower providers: {pending_names}")
+            return batches, failed
+
+    for future in pending:
+        future.cancel()
+        logger.warning(f"{futures[future].name} timed out")
+        failed.append(futures[future].name)
+
+    return batches, failed
@@ -0,0 +1,156 @@
+"""
+Lexicon-based sentiment and topic scoring for market news.
+
+Scoring runs once per batch of freshly ingested articles. All articles are
+tokenized into one flat array of vocabulary ids and scored with NumPy
+bincount/add.at passes, so the cost is a single vectorized sweep over the
+batch rather than per-article Python loops over keyword sets.
+"""
+import re
+from typing import List
+
+import numpy as np
+
+
+# Word (and two-word phrase) sentiment weights in [-3, 3]
+SENTIMENT_LEXICON = {
+    # Positive
+    "gain": 2.0, "gains": 2.0, "surge": 2.5, "surges": 2.5, "rally": 2.5, "rallies": 2.5,
+    "rise": 1.5, "rises": 1.5, "jump": 2.0, "jumps": 2.0, "soar": 2.5, "soars": 2.5,
+    "beat": 1.5, "beats": 1.5, "record": 1.0, "growth": 1.5, "profit": 1.5, "profits": 1.5,
+    "strong": 1.5, "upgrade": 2.0, "upgraded": 2.0, "bullish": 2.5, "optimism": 2.0,
+    "recover": 1.5, "recovery": 1.5, "boost": 1.5, "outperform": 2.0, "positive": 1.5,
+    "rate cut": 1.0, "dividend": 1.0, "stable": 1.0, "inflow": 1.0, "inflows": 1.0,
+    # Negative
+    "loss": -2.0, "losses": -2.0, "fall": -1.5, "falls": -1.5, "drop": -1.5, "drops": -1.5,
+    "plunge": -2.5, "plunges": -2.5, "slump": -2.5, "crash": -3.0, "decline": -1.5,
+    "declines": -1.5, "miss": -1.5, "misses": -1.5, "weak": -1.5, "downgrade": -2.0,
+    "downgraded": -2.0, "bearish": -2.5, "fear": -2.0, "fears": -2.0, "recession": -2.5,
+    "layoffs": -2.0, "lawsuit": -1.5, "fraud": -3.0, "default": -2.5, "volatility": -1.0,
+    "uncertainty": -1.5, "selloff": -2.5, "sell off": -2.5, "tariff": -1.0, "tariffs": -1.0,
+    "rate hike": -1.0, "inflation": -1.0, "outflow": -1.0, "outflows": -1.0, "risk": -0.5,
+}
+
+# Topic -> words/phrases that indicate the topic
+TOPIC_LEXICON = {
+    "mutual_funds": [
+        "mutual fund", "mutual funds", "fund inflow", "sip", "systematic investment",
+        "asset management", "amc", "index fund", "etf", "etfs", "equity fund", "debt fund",
+    ],
+    "fixed_income": [
+        "fixed deposit", "fd rates", "deposit rates", "interest rates", "interest rate",
+        "rate cut", "rate hike", "bond", "bonds", "bond yields", "treasury", "yield",
+        "yields", "fixed income",
+    ],
+    "risk": ["inflation", "volatility", "risk", "recession", "uncertainty", "selloff", "sell off"],
+    "equities": [
+        "stock", "stocks", "shares", "equity", "equities", "earnings", "ipo", "nasdaq",
+        "dow", "nifty", "sensex", "wall street",
+    ],
+    "macro": ["gdp", "economy", "economic", "federal reserve", "fed", "central bank", "tariff", "tariffs"],
+    "crypto": ["crypto", "bitcoin", "ethereum", "blockchain"],
+    "commodities": ["oil", "gold", "silver", "commodity", "commodities", "crude"],
+}
+
+TOPICS = list(TOPIC_LEXICON)
+
+# Investment suggestion shown for each topic (in priority order)
+TOPIC_SUGGESTIONS = {
+    "mutual_funds": "Review mutual fund SIP opportunities",
+    "fixed_income": "Check fixed deposit options for stable returns",
+    "risk": "Prefer diversified low-risk allocation",
+}
+DEFAULT_SUGGESTION = "Track market trend before choosing investment products"
+
+# Scores inside (-NEUTRAL_BAND, NEUTRAL_BAND) are labelled neutral
+NEUTRAL_BAND = 0.05
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class LexiconScorer:
+    """Vectorized lexicon sentiment and topic scorer."""
+
+    # Normalization constant (as in VADER): score = sum / sqrt(sum^2 + alpha)
+    ALPHA = 15.0
+
+    def __init__(self):
+        vocabulary = set(SENTIMENT_LEXICON)
+        for terms in TOPIC_LEXICON.values():
+            vocabulary.update(terms)
+
+        # Index 0 is reserved for out-of-vocabulary tokens (zero weight, no topic)
+        self._index = {term: i + 1 for i, term in enumerate(sorted(vocabulary))}
+        size = len(self._index) + 1
+
+        self._weights = np.zeros(size, dtype=np.float64)
+        for term, weight in SENTIMENT_LEXICON.items():
+            self._weights[self._index[term]] = weight
+
+        self._topics = np.zeros((size, len(TOPICS)), dtype=np.int32)
+        for t, topic in enumerate(TOPICS):
+            for term in TOPIC_LEXICON[topic]:
+                self._topics[self._index[term], t] = 1
+
+    def _term_ids(self, text: str) -> List[int]:
+        """Map text to vocabulary ids for every unigram and bigram."""
+        tokens = _TOKEN_RE.findall(text.lower())
+        terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [i for i in (self._index.get(term, 0) for term in terms) if i]
+
+    def score_batch(self, texts: List[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of texts.
+
+        Returns:
+            (sentiment scores in [-1, 1] with shape (n,),
+             topic hit counts with shape (n, len(TOPICS)))
+        """
+        n = len(texts)
+        id_lists = [self._term_ids(text) for text in texts]
+        lengths = np.fromiter((len(ids) for ids in id_lists), dtype=np.int64, count=n)
+        flat = np.fromiter((i for ids in id_lists for i in ids), dtype=np.int64, count=int(lengths.sum()))
+        doc_ids = np.repeat(np.arange(n), lengths)
+
+        raw = np.bincount(doc_ids, weights=self._weights[flat], minlength=n)
+        scores = raw / np.sqrt(raw * raw + self.ALPHA)
+
+        topic_hits = np.zeros((n, len(TOPICS)), dtype=np.int32)
+        np.add.at(topic_hits, doc_ids, self._topics[flat])
+
+        return scores, topic_hits
+
+
+_scorer = LexiconScorer()
+
+
+def sentiment_label(score: float) -> str:
+    """Return "positive", "negative" or "neutral" for a sentiment score."""
+    if score >= NEUTRAL_BAND:
+        return "positive"
+    if score <= -NEUTRAL_BAND:
+        return "negative"
+    return "neutral"
+
+
+def score_articles(articles: List[dict]) -> List[dict]:
+    """
+    Annotate normalized articles in place with sentiment and topics.
+
+    Adds keys: sentiment_score, sentiment_label, topics, suggestions.
+    """
+    if not articles:
+        return articles
+
+    texts = [f"{item['headline']} {item['summary']}" for item in articles]
+    scores, topic_hits = _scorer.score_batch(texts)
+
+    for item, score, hits in zip(articles, scores.tolist(), topic_hits):
+        topics = [TOPICS[t] for t in np.flatnonzero(hits)]
+        suggestions = [TOPIC_SUGGESTIONS[topic] for topic in TOPIC_SUGGESTIONS if topic in topics]
+        item["sentiment_score"] = round(score, 4)
+        item["sentiment_label"] = sentiment_label(score)
+        item["topics"] = topics
+        item["suggestions"] = suggestions or [DEFAULT_SUGGESTION]
+
+    return articles
@@ -0,0 +1,144 @@
+"""
+Derived-data updates that follow a student's writes.
+
+An expense write feeds the remaining budget, spike statistics, percentile
+sketches, daily spend prefix sums, monthly snapshots and the dashboard
+digest. These run as one post-commit task after the write itself is
+committed, on a session of their own. Each step commits on its own; a step
+that fails is rolled back and logged, and the remaining steps still run,
+so a saved write is never answered with a 500.
+
+A step that fails leaves its derived data stale until it is rebuilt:
+
+- spend prefix sums and the dashboard digest are dropped for the student
+  and rebuilt on their next read;
+- spike statistics, sketches, snapshots and digests are rebuilt by the
+  nightly tasks;
+- the stored remaining budget is recomputed on the student's next
+  expense write.
+"""
+import logging
+from datetime import date
+from typing import Callable, Iterable, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.database import AsyncSessionLocal
+from app.models.spend_prefix import DailySpendPrefix
+from app.models.student import Student
+from app.services.budget_history import BudgetHistoryService
+from app.services.budget_service import BudgetService
+from app.services.dashboard_digest import DashboardDigestService
+from app.services.spend_history import SpendHistory
+from app.services.spending_sketches import spending_sketches
+from app.services.spike_detector import SpikeDetector
+
+
+logger = logging.getLogger(__name__)
+
+# (category_id, expense_date) of a written expense
+WrittenKey = Tuple[Optional[int], date]
+
+
+def _step(db: Session, name: str, student_id: int, action: Callable[[], object]) -> bool:
+    """Run one update; on failure roll back, log and report False."""
+    try:
+        action()
+        return True
+    except Exception:
+        db.rollback()
+        logger.exception(f"Post-write {name} update failed for student {student_id}")
+        return False
+
+
+class PostWriteUpdates:
+    """Derived-data updates run after a student's write is committed."""
+
+    @staticmethod
+    def after_expense_write(
+        db: Session,
+        student: Student,
+        written: Iterable[WrittenKey],
+        new_amounts: Iterable[tuple] = (),
+        current_date: date = None,
+    ) -> None:
+        """
+        Update everything derived from expenses.
+
+        ``written`` holds the (category_id, expense_date) of every expense
+        inserted or changed; ``new_amounts`` the (category_id,
+        expense_date, amount) of newly inserted ones, for the sketches.
+        """
+        written = set(written)
+        if not written:
+            return
+        student_id = student.id
+        days = {day for _, day in written}
+
+        _step(db, "remaining budget", student_id,
+              lambda: BudgetService.update_remaining_budget(db, student, current_date))
+        # Raises spike alerts, so runs before the digest is rebuilt
+        _step(db, "spike statistics", student_id,
+              lambda: SpikeDetector.record(db, student_id, SpikeDetector.touched_days(written)))
+        _step(db, "spending sketch", student_id, lambda: spending_sketches.add(new_amounts))
+        if not _step(db, "spend history", student_id, lambda: SpendHistory.record(db, student_id, days)):
+            PostWriteUpdates._drop_spend_history(db, student_id)
+        _step(db, "budget snapshot", student_id, lambda: BudgetHistoryService.refresh(db, student_id, days))
+        if not _step(db, "dashboard digest", student_id, lambda: DashboardDigestService.refresh(db, student_id)):
+            _step(db, "dashboard digest", student_id, lambda: DashboardDigestService.invalidate(db, student_id))
+
+    @staticmethod
+    def after_budget_change(db: Session, student_id: int) -> None:
+        """
+        Update what follows the remaining budget after writes other than
+        expenses (monthly budget, cycle start, investment movements).
+        """
+        _step(db, "budget snapshot", student_id, lambda: BudgetHistoryService.refresh_current(db, student_id))
+        _step(db, "dashboard digest", student_id, lambda: DashboardDigestService.invalidate(db, student_id))
+
+    @staticmethod
+    def after_dashboard_change(db: Session, student_id: int) -> None:
+        """Drop the dashboard digest after other writes it shows (alerts, settings)."""
+        _step(db, "dashboard digest", student_id, lambda: DashboardDigestService.invalidate(db, student_id))
+
+    @staticmethod
+    def _drop_spend_history(db: Session, student_id: int) -> None:
+        """Forget a student's prefix sums so the next read rebuilds them."""
+        def drop():
+            db.execute(delete(DailySpendPrefix).where(DailySpendPrefix.student_id == student_id))
+            db.commit()
+        _step(db, "spend history", student_id, drop)
+
+
+class AsyncPostWriteUpdates:
+    """
+    PostWriteUpdates for async request handlers.
+
+    The updates run on their own session (via ``run_sync``), so rolling
+    back a failed step never expires the ORM objects the handler is about
+    to return. Call after the handler's write is committed.
+    """
+
+    @staticmethod
+    async def after_expense_write(
+        student: Student,
+        written: Iterable[WrittenKey],
+        new_amounts: Iterable[tuple] = (),
+        current_date: date = None,
+    ) -> None:
+        written, new_amounts = list(written), list(new_amounts)
+        if not written:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(lambda session: PostWriteUpdates.after_expense_write(
+                session, session.merge(student, load=False), written, new_amounts, current_date
+            ))
+
+    @staticmethod
+    async def after_budget_change(student_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(lambda session: PostWriteUpdates.after_budget_change(session, student_id))
+
+    @staticmethod
+    async def after_dashboard_change(student_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(lambda session: PostWriteUpdates.after_dashboard_change(session, student_id))
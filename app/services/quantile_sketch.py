@@ -0,0 +1,132 @@
+"""
+Mergeable quantile sketch for positive amounts.
+
+Values are counted in logarithmic buckets: bucket i holds values in
+(gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a), so any quantile is
+returned within relative error a of an actual value (the DDSketch
+construction). Adding values, merging two sketches (adding bucket counts)
+and querying are independent of how many values were added, and the
+bucket counts serialize to a few hundred compressed bytes.
+"""
+import math
+import zlib
+from typing import Iterable, Optional
+import numpy as np
+
+
+# Values at or below this are counted as zero
+MIN_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch (log-bucketed counts)."""
+
+    def __init__(
+        self,
+        relative_accuracy: float,
+        offset: int = 0,
+        counts: Optional[np.ndarray] = None,
+        zero_count: int = 0,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = offset  # Bucket index of counts[0]
+        self.counts = counts if counts is not None else np.zeros(0, dtype=np.int64)
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.zero_count
+
+    def bucket_index(self, values: np.ndarray) -> np.ndarray:
+        """Bucket index for each (positive) value."""
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def _extend(self, low: int, high: int) -> None:
+        """Grow the counts array to cover bucket indexes low..high."""
+        if not len(self.counts):
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_offset = min(self.offset, low)
+        new_end = max(self.offset + len(self.counts) - 1, high)
+        if new_offset == self.offset and new_end == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_end - new_offset + 1, dtype=np.int64)
+        counts[self.offset - new_offset:self.offset - new_offset + len(self.counts)] = self.counts
+        self.offset, self.counts = new_offset, counts
+
+    def add(self, values: Iterable[float]) -> None:
+        """Add values to the sketch."""
+        if isinstance(values, np.ndarray):
+            values = values.astype(np.float64)
+        else:
+            values = np.fromiter(values, dtype=np.float64)
+        if not len(values):
+            return
+        positive = values > MIN_VALUE
+        self.zero_count += int((~positive).sum())
+        if positive.any():
+            self.add_buckets(*np.unique(self.bucket_index(values[positive]), return_counts=True))
+
+    def add_buckets(self, indexes: np.ndarray, counts: np.ndarray) -> None:
+        """Add precomputed bucket counts (e.g. from a GROUP BY)."""
+        indexes = np.asarray(indexes, dtype=np.int64)
+        if not len(indexes):
+            return
+        self._extend(int(indexes.min()), int(indexes.max()))
+        np.add.at(self.counts, indexes - self.offset, np.asarray(counts, dtype=np.int64))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add another sketch's counts into this one (same accuracy)."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._extend(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), or None if empty."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumulative, rank - self.zero_count, side="right"))
+        bucket = min(bucket, len(self.counts) - 1)
+        return 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+
+    def rank(self, value: float) -> Optional[float]:
+        """Approximate fraction of values at or below value, or None if empty."""
+        total = self.count
+        if total == 0:
+            return None
+        if value <= MIN_VALUE:
+            return self.zero_count / total
+        bucket = int(self.bucket_index(np.array([value]))[0]) - self.offset
+        below = int(self.counts[:max(0, min(bucket + 1, len(self.counts)))].sum())
+        return (self.zero_count + below) / total
+
+    def to_bytes(self) -> bytes:
+        """Compressed bucket counts (offset and zero count are stored separately)."""
+        return zlib.compress(self.counts.astype("<i8").tobytes())
+
+    @classmethod
+    def from_bytes(
+        cls,
+        relative_accuracy: float,
+        offset: int,
+        data: Optional[bytes],
+        zero_count: int = 0,
+    ) -> "QuantileSketch":
+        counts = np.frombuffer(zlib.decompress(data), dtype="<i8").astype(np.int64) if data else None
+        return cls(relative_accuracy, offset=offset, counts=counts, zero_count=zero_count)
+
+    def copy(self) -> "QuantileSketch":
+        return QuantileSketch(self.relative_accuracy, self.offset, self.counts.copy(), self.zero_count)
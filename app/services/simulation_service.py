@@ -0,0 +1,215 @@
+"""
+Monte Carlo month-end simulation.
+
+Bootstraps many spending trajectories from a student's own daily spend
+history: each remaining day of the cycle draws the spend of a random past
+day with the same weekday. The trajectories give percentile bands of the
+remaining budget per day and the probability of running out.
+
+Results are memoized per (student, data version), where the version is a
+hash of every simulation input, so repeat requests are free until the
+student's spending or budget changes. Each simulation runs in chunks of
+trajectories under a CPU time budget and stops early when it is spent.
+"""
+import hashlib
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Optional
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.expense import Expense
+from app.models.student import Student
+from app.schemas.student import SimulationBand, SimulationResponse
+from app.services.result_cache import ResultCache
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+PATHS_PER_CHUNK = 500
+MIN_WEEKDAY_SAMPLES = 2  # Fewer same-weekday days than this: sample from all days
+
+
+simulation_cache = ResultCache(settings.SIMULATION_CACHE_SIZE)
+
+
+def _cycle_end(budget_start: date) -> date:
+    """Last day of the budget cycle starting on budget_start."""
+    if budget_start.month == 12:
+        next_month_start = date(budget_start.year + 1, 1, 1)
+    else:
+        next_month_start = date(budget_start.year, budget_start.month + 1, 1)
+    return next_month_start - timedelta(days=1)
+
+
+def simulate(
+    history: np.ndarray,
+    history_start: date,
+    as_of: date,
+    remaining: float,
+    horizon: int,
+    paths: int,
+    seed: int,
+    cpu_budget_seconds: float,
+) -> tuple:
+    """
+    Simulate remaining-budget trajectories for the days after as_of.
+
+    Returns (balances, paths simulated): balances is (paths, horizon).
+    Trajectories are generated in chunks; once the thread's CPU time
+    exceeds the budget no further chunks start.
+    """
+    rng = np.random.default_rng(seed)
+    history_weekdays = (history_start.weekday() + np.arange(len(history))) % 7
+    future_weekdays = (as_of.weekday() + 1 + np.arange(horizon)) % 7
+
+    # Days to sample from for each future day (same weekday when possible)
+    pools = []
+    for weekday in range(7):
+        same_weekday = history[history_weekdays == weekday]
+        pools.append(same_weekday if len(same_weekday) >= MIN_WEEKDAY_SAMPLES else history)
+
+    started = time.thread_time()
+    chunks = []
+    simulated = 0
+    while simulated < paths:
+        size = min(PATHS_PER_CHUNK, paths - simulated)
+        draws = np.empty((size, horizon))
+        for weekday in range(7):
+            columns = np.flatnonzero(future_weekdays == weekday)
+            if len(columns):
+                pool = pools[weekday]
+                draws[:, columns] = pool[rng.integers(0, len(pool), size=(size, len(columns)))]
+        chunks.append(remaining - np.cumsum(draws, axis=1))
+        simulated += size
+        if time.thread_time() - started > cpu_budget_seconds:
+            break
+
+    return np.concatenate(chunks), simulated
+
+
+class SimulationService:
+    """Service for month-end Monte Carlo simulations."""
+
+    @staticmethod
+    def _run(
+        history: np.ndarray,
+        history_start: date,
+        as_of: date,
+        cycle_end: date,
+        remaining: float,
+        paths: int,
+        seed: int,
+    ) -> SimulationResponse:
+        horizon = max(0, (cycle_end - as_of).days)
+        response = dict(
+            as_of=as_of,
+            cycle_end=cycle_end,
+            remaining_budget=remaining,
+            history_days=len(history),
+        )
+
+        if remaining <= 0:
+            return SimulationResponse(**response, paths=0, probability_run_out=1.0, median_exhaustion_date=as_of)
+        if horizon == 0 or len(history) == 0:
+            return SimulationResponse(**response, paths=0, probability_run_out=0.0)
+
+        balances, simulated = simulate(
+            history,
+            history_start,
+            as_of,
+            remaining,
+            horizon,
+            paths,
+            seed,
+            settings.SIMULATION_CPU_BUDGET_MS / 1000,
+        )
+
+        # Day each trajectory runs out (horizon = never within the cycle)
+        runs_out = balances < 0
+        exhausted_on = np.where(runs_out.any(axis=1), runs_out.argmax(axis=1), horizon)
+        median_day = np.sort(exhausted_on)[len(exhausted_on) // 2]
+
+        quantiles = np.percentile(balances, PERCENTILES, axis=0)
+        bands = [
+            SimulationBand(
+                day=as_of + timedelta(days=day + 1),
+                **{f"p{pct}": round(float(value), 2) for pct, value in zip(PERCENTILES, quantiles[:, day])},
+            )
+            for day in range(horizon)
+        ]
+
+        return SimulationResponse(
+            **response,
+            paths=simulated,
+            truncated=simulated < paths,
+            probability_run_out=round(float((exhausted_on < horizon).mean()), 4),
+            median_exhaustion_date=as_of + timedelta(days=int(median_day) + 1) if median_day < horizon else None,
+            month_end=bands[-1],
+            bands=bands,
+        )
+
+    @staticmethod
+    async def simulate_month_end(
+        db: AsyncSession,
+        student: Student,
+        paths: int,
+        as_of: date = None,
+        release: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> SimulationResponse:
+        """
+        Simulate the rest of the student's budget cycle (memoized).
+
+        ``release`` is awaited once the history is loaded, before the
+        simulation runs; handlers that own the session pass its release()
+        to hand the connection back meanwhile.
+        """
+        if as_of is None:
+            as_of = date.today()
+
+        cycle_end = _cycle_end(student.budget_start_date)
+        window_start = as_of - timedelta(days=settings.SIMULATION_HISTORY_DAYS)
+
+        # Daily spend before today (today is still in progress)
+        rows = (await db.execute(
+            select(Expense.expense_date, func.sum(Expense.amount))
+            .where(and_(
+                Expense.student_id == student.id,
+                Expense.expense_date >= window_start,
+                Expense.expense_date < as_of,
+            ))
+            .group_by(Expense.expense_date)
+        )).all()
+        if release is not None:
+            await release()
+
+        # History starts at the first spending day in the window
+        history_start = min((day for day, _ in rows), default=as_of)
+        history = np.zeros((as_of - history_start).days)
+        for day, total in rows:
+            history[(day - history_start).days] = float(total)
+
+        remaining = float(student.remaining_budget)
+        version = hashlib.sha256(b"|".join([
+            history.tobytes(),
+            f"{history_start}|{as_of}|{cycle_end}|{remaining:.2f}|{paths}".encode("utf-8"),
+        ])).digest()
+        key = (student.id, version)
+
+        cached = simulation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await run_in_threadpool(
+            SimulationService._run,
+            history,
+            history_start,
+            as_of,
+            cycle_end,
+            remaining,
+            paths,
+            int.from_bytes(version[:8], "big"),
+        )
+        simulation_cache.put(key, result)
+        return result
@@ -0,0 +1,240 @@
+"""
+As-of budget status from per-student cumulative daily spend.
+
+Each student has one DailySpendPrefix row: a prefix-sum array of daily
+spend in paise. The spend between any two dates is two array lookups, so
+the budget status for any past day needs one primary-key read plus the
+investment movements of that cycle, however much history the student has.
+
+The array is built with one GROUP BY the first time it is needed and then
+kept current by record(), which expense writes call with the days they
+touched: the touched days' totals are re-read and their differences added
+to every later entry, so backdated and updated expenses are reflected
+exactly.
+"""
+import zlib
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+import numpy as np
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.expense import Expense
+from app.models.investment import Investment, InvestmentTransaction, InvestmentTransactionType
+from app.models.spend_prefix import DailySpendPrefix
+from app.models.student import Student
+from app.schemas.student import BudgetStatusResponse
+
+
+def _month_end(day: date) -> date:
+    if day.month == 12:
+        return date(day.year, 12, 31)
+    return date(day.year, day.month + 1, 1) - timedelta(days=1)
+
+
+def _decode(row: DailySpendPrefix) -> np.ndarray:
+    if not row.cumulative:
+        return np.zeros(0, dtype=np.int64)
+    return np.frombuffer(zlib.decompress(row.cumulative), dtype="<i8").astype(np.int64)
+
+
+def _encode(cumulative: np.ndarray) -> bytes:
+    return zlib.compress(cumulative.astype("<i8").tobytes())
+
+
+def _paise(amount) -> int:
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def spent_through(start_date: date, cumulative: np.ndarray, day: date) -> int:
+    """Total paise spent from the first entry through ``day``."""
+    offset = (day - start_date).days
+    if offset < 0 or not len(cumulative):
+        return 0
+    return int(cumulative[min(offset, len(cumulative) - 1)])
+
+
+class SpendHistory:
+    """Service for per-student cumulative spend and as-of budget status."""
+
+    @staticmethod
+    def build(db: Session, student_id: int) -> Tuple[date, np.ndarray]:
+        """Compute a student's prefix sums from the expenses table and store them."""
+        rows = db.execute(
+            select(Expense.expense_date, func.sum(Expense.amount))
+            .where(Expense.student_id == student_id)
+            .group_by(Expense.expense_date)
+        ).all()
+
+        if rows:
+            start_date = min(day for day, _ in rows)
+            daily = np.zeros((max(day for day, _ in rows) - start_date).days + 1, dtype=np.int64)
+            for day, total in rows:
+                daily[(day - start_date).days] = _paise(total)
+        else:
+            start_date = date.today()
+            daily = np.zeros(0, dtype=np.int64)
+        cumulative = np.cumsum(daily)
+
+        db.execute(
+            pg_insert(DailySpendPrefix.__table__).values(
+                student_id=student_id,
+                start_date=start_date,
+                days=len(cumulative),
+                cumulative=_encode(cumulative),
+            ).on_conflict_do_nothing()
+        )
+        db.commit()
+        return start_date, cumulative
+
+    @staticmethod
+    def load(db: Session, student_id: int) -> Tuple[date, np.ndarray]:
+        """Stored prefix sums, built on first use."""
+        row = db.get(DailySpendPrefix, student_id)
+        if row is None:
+            return SpendHistory.build(db, student_id)
+        return row.start_date, _decode(row)
+
+    @staticmethod
+    def record(db: Session, student_id: int, days: Iterable[date]) -> None:
+        """
+        Bring the prefix sums up to date for days whose expenses were just
+        written. Call after the expenses are committed.
+
+        Students without stored prefix sums are skipped; they are built
+        from the committed expenses on first read.
+        """
+        days = sorted(set(days))
+        if not days:
+            return
+
+        row = db.query(DailySpendPrefix).filter(
+            DailySpendPrefix.student_id == student_id
+        ).with_for_update().first()
+        if row is None:
+            db.commit()
+            return
+
+        totals = {
+            day: _paise(total)
+            for day, total in db.execute(
+                select(Expense.expense_date, func.sum(Expense.amount))
+                .where(and_(Expense.student_id == student_id, Expense.expense_date.in_(days)))
+                .group_by(Expense.expense_date)
+            )
+        }
+
+        start_date, cumulative = row.start_date, _decode(row)
+        if not len(cumulative):
+            start_date = days[0]
+
+        # Extend the array to cover the touched days (flat before, carried after)
+        if days[0] < start_date:
+            cumulative = np.concatenate([np.zeros((start_date - days[0]).days, dtype=np.int64), cumulative])
+            start_date = days[0]
+        end_offset = (days[-1] - start_date).days
+        if end_offset >= len(cumulative):
+            last = cumulative[-1] if len(cumulative) else 0
+            cumulative = np.concatenate([
+                cumulative,
+                np.full(end_offset + 1 - len(cumulative), last, dtype=np.int64),
+            ])
+
+        daily = np.diff(cumulative, prepend=0)
+        delta = np.zeros(len(cumulative), dtype=np.int64)
+        for day in days:
+            offset = (day - start_date).days
+            delta[offset] = totals.get(day, 0) - daily[offset]
+        if delta.any() or len(cumulative) != row.days or start_date != row.start_date:
+            row.start_date = start_date
+            row.days = len(cumulative)
+            row.cumulative = _encode(cumulative + np.cumsum(delta))
+        db.commit()
+
+    @staticmethod
+    def _net_investment_outflow(db: Session, student_id: int, start_date: date, end_date: date) -> Decimal:
+        """Invested minus withdrawn between two dates (interest excluded), in one statement."""
+        signed_amount = case(
+            (InvestmentTransaction.transaction_type == InvestmentTransactionType.INVEST, InvestmentTransaction.amount),
+            (InvestmentTransaction.transaction_type == InvestmentTransactionType.WITHDRAW, -InvestmentTransaction.amount),
+            else_=0,
+        )
+        return db.execute(
+            select(func.coalesce(func.sum(signed_amount), 0))
+            .select_from(InvestmentTransaction)
+            .join(Investment, Investment.id == InvestmentTransaction.investment_id)
+            .where(and_(
+                Investment.student_id == student_id,
+                func.date(InvestmentTransaction.created_at) >= start_date,
+                func.date(InvestmentTransaction.created_at) <= end_date,
+            ))
+        ).scalar() or Decimal("0.00")
+
+    @staticmethod
+    def get_budget_status(db: Session, student: Student, as_of: date) -> BudgetStatusResponse:
+        """
+        Budget status as it stood at the end of ``as_of``.
+
+        The cycle is the student's current one if it contains ``as_of``,
+        otherwise the calendar month of ``as_of``. Spending and investment
+        movements dated after ``as_of`` are not counted; the current
+        monthly budget is used for past cycles.
+        """
+        cycle_start = student.budget_start_date
+        if not cycle_start <= as_of <= _month_end(cycle_start):
+            cycle_start = as_of.replace(day=1)
+        cycle_end = _month_end(cycle_start)
+
+        start_date, cumulative = SpendHistory.load(db, student.id)
+        spent_paise = (
+            spent_through(start_date, cumulative, as_of)
+            - spent_through(start_date, cumulative, cycle_start - timedelta(days=1))
+        )
+        total_spent = Decimal(spent_paise) / 100
+        outflow = SpendHistory._net_investment_outflow(db, student.id, cycle_start, as_of)
+
+        remaining_budget = student.monthly_budget - total_spent - outflow
+        days_remaining = (cycle_end - as_of).days + 1
+        daily_allowance = remaining_budget / days_remaining if days_remaining > 0 else Decimal("0.00")
+
+        from app.services.ai_service import AIService
+        budget_health = AIService.calculate_budget_health(
+            remaining_budget,
+            student.monthly_budget,
+            days_remaining
+        )
+
+        return BudgetStatusResponse(
+            student_id=student.id,
+            monthly_budget=student.monthly_budget,
+            remaining_budget=remaining_budget,
+            total_spent=total_spent,
+            budget_start_date=cycle_start,
+            days_elapsed=(as_of - cycle_start).days,
+            days_remaining=days_remaining,
+            daily_budget_allowance=daily_allowance,
+            budget_health=budget_health
+        )
+
+
+class AsyncSpendHistory:
+    """SpendHistory for AsyncSession callers (runs through ``run_sync``)."""
+
+    @staticmethod
+    async def record(db: AsyncSession, student_id: int, days: Iterable[date]) -> None:
+        days = set(days)
+        if not days:
+            return
+        await db.run_sync(lambda session: SpendHistory.record(session, student_id, days))
+
+    @staticmethod
+    async def get_budget_status(
+        db: AsyncSession,
+        student: Student,
+        as_of: Optional[date] = None
+    ) -> BudgetStatusResponse:
+        if as_of is None:
+            as_of = date.today()
+        return await db.run_sync(lambda session: SpendHistory.get_budget_status(session, student, as_of))
@@ -0,0 +1,246 @@
+"""
+Peer spending percentiles from mergeable quantile sketches.
+
+Every (category, month) has one QuantileSketch of all students' expense
+amounts, plus one across all categories (ALL_CATEGORIES_KEY). Sketches
+only hold bucket counts, so they can be added together exactly:
+
+- write path: each worker adds new amounts to small in-memory delta
+  sketches; a background thread merges them into the spending_sketches
+  rows every SKETCH_FLUSH_SECONDS (row lock, add counts, write back);
+- read path: one primary-key read plus the worker's unflushed deltas, then
+  quantiles are answered from the bucket counts regardless of how many
+  expenses the month has;
+- rebuild: the nightly task recomputes every sketch from the expenses
+  table with one GROUP BY over bucket indexes (this also folds in edits
+  and deletions, which the incremental path does not see).
+"""
+import logging
+import math
+import threading
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from sqlalchemy import case, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models.expense import Expense
+from app.models.spending_sketch import SpendingSketch, ALL_CATEGORIES_KEY, UNCATEGORIZED_KEY
+from app.services.quantile_sketch import QuantileSketch, MIN_VALUE
+
+
+logger = logging.getLogger(__name__)
+
+# (category_id, first day of month)
+SketchKey = Tuple[int, date]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _to_sketch(row: Optional[SpendingSketch], relative_accuracy: float) -> QuantileSketch:
+    if row is None:
+        return QuantileSketch(relative_accuracy)
+    return QuantileSketch.from_bytes(relative_accuracy, row.bucket_offset, row.counts, row.zero_count)
+
+
+class SpendingSketchStore:
+    """Per-worker buffer and reader of the persisted spending sketches."""
+
+    def __init__(self, session_factory, relative_accuracy: float, flush_seconds: float):
+        self._session_factory = session_factory
+        self.relative_accuracy = relative_accuracy
+        self.flush_seconds = flush_seconds
+
+        self._pending: Dict[SketchKey, QuantileSketch] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.added = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    # --- Write path ---
+
+    def add(self, expenses: Iterable[Tuple[Optional[int], date, float]]) -> None:
+        """Buffer (category_id, expense_date, amount) for the next flush."""
+        grouped: Dict[SketchKey, list] = {}
+        for category_id, expense_date, amount in expenses:
+            month = month_start(expense_date)
+            amount = float(amount)
+            grouped.setdefault((category_id or UNCATEGORIZED_KEY, month), []).append(amount)
+            grouped.setdefault((ALL_CATEGORIES_KEY, month), []).append(amount)
+        if not grouped:
+            return
+
+        with self._lock:
+            for key, amounts in grouped.items():
+                sketch = self._pending.get(key)
+                if sketch is None:
+                    sketch = self._pending[key] = QuantileSketch(self.relative_accuracy)
+                sketch.add(amounts)
+            self.added += sum(len(amounts) for key, amounts in grouped.items() if key[0] != ALL_CATEGORIES_KEY)
+
+    def flush(self) -> int:
+        """Merge the buffered deltas into the database; returns the sketches written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            sketches_table = SpendingSketch.__table__
+            db = self._session_factory()
+            try:
+                # Create missing rows, then lock them in key order so
+                # concurrent workers cannot deadlock
+                keys = sorted(pending)
+                db.execute(
+                    pg_insert(sketches_table).on_conflict_do_nothing(),
+                    [{"category_id": category_id, "month": month, "count": 0, "zero_count": 0, "bucket_offset": 0}
+                     for category_id, month in keys],
+                )
+                rows = db.execute(
+                    select(SpendingSketch)
+                    .where(tuple_(SpendingSketch.category_id, SpendingSketch.month).in_(keys))
+                    .order_by(SpendingSketch.category_id, SpendingSketch.month)
+                    .with_for_update()
+                ).scalars().all()
+
+                for row in rows:
+                    sketch = _to_sketch(row, self.relative_accuracy).merge(pending[(row.category_id, row.month)])
+                    row.count = sketch.count
+                    row.zero_count = sketch.zero_count
+                    row.bucket_offset = sketch.offset
+                    row.counts = sketch.to_bytes()
+                db.commit()
+                self.flushes += 1
+                return len(rows)
+            except Exception:
+                db.rollback()
+                self.flush_errors += 1
+                # Keep the deltas for the next attempt
+                with self._lock:
+                    for key, sketch in pending.items():
+                        current = self._pending.get(key)
+                        self._pending[key] = sketch if current is None else sketch.merge(current)
+                raise
+            finally:
+                db.close()
+
+    # --- Read path ---
+
+    async def get(self, db: AsyncSession, category_id: int, month: date) -> QuantileSketch:
+        """Persisted sketch for a category and month plus this worker's unflushed amounts."""
+        row = await db.get(SpendingSketch, (category_id, month_start(month)))
+        sketch = _to_sketch(row, self.relative_accuracy)
+        with self._lock:
+            pending = self._pending.get((category_id, month_start(month)))
+            if pending is not None:
+                sketch.merge(pending)
+        return sketch
+
+    # --- Rebuild ---
+
+    def rebuild(self, db, since: Optional[date] = None) -> int:
+        """
+        Recompute the sketches (from ``since``'s month onward, or all) from
+        the expenses table; returns the sketches written.
+
+        Amounts are bucketed in SQL, so only (category, month, bucket)
+        counts leave the database.
+        """
+        log_gamma = math.log((1 + self.relative_accuracy) / (1 - self.relative_accuracy))
+        category = func.coalesce(Expense.category_id, UNCATEGORIZED_KEY)
+        month = func.date_trunc("month", Expense.expense_date).cast(SpendingSketch.month.type)
+        bucket = case(
+            (Expense.amount > MIN_VALUE, func.ceil(func.ln(Expense.amount) / log_gamma)),
+            else_=None,
+        )
+
+        statement = select(category, month, bucket, func.count()).group_by(category, month, bucket)
+        if since is not None:
+            statement = statement.where(Expense.expense_date >= month_start(since))
+
+        sketches: Dict[SketchKey, QuantileSketch] = {}
+        grouped: Dict[SketchKey, Tuple[list, list]] = {}
+        for category_id, month_value, bucket_index, count in db.execute(statement):
+            for key in ((category_id, month_value), (ALL_CATEGORIES_KEY, month_value)):
+                if key not in sketches:
+                    sketches[key] = QuantileSketch(self.relative_accuracy)
+                    grouped[key] = ([], [])
+                if bucket_index is None:
+                    sketches[key].zero_count += count
+                else:
+                    grouped[key][0].append(int(bucket_index))
+                    grouped[key][1].append(count)
+        for key, (indexes, counts) in grouped.items():
+            sketches[key].add_buckets(np.array(indexes, dtype=np.int64), np.array(counts, dtype=np.int64))
+
+        stale = delete(SpendingSketch)
+        if since is not None:
+            stale = stale.where(SpendingSketch.month >= month_start(since))
+        db.execute(stale)
+        if sketches:
+            db.execute(
+                pg_insert(SpendingSketch.__table__),
+                [
+                    {
+                        "category_id": category_id,
+                        "month": month_value,
+                        "count": sketch.count,
+                        "zero_count": sketch.zero_count,
+                        "bucket_offset": sketch.offset,
+                        "counts": sketch.to_bytes(),
+                    }
+                    for (category_id, month_value), sketch in sketches.items()
+                ],
+            )
+        db.commit()
+        return len(sketches)
+
+    # --- Background flushing ---
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sketch-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write out what is still buffered."""
+        self._stop.set()
+        self._thread = None
+        try:
+            self.flush()
+        except Exception as exc:
+            logger.warning(f"Spending sketch flush failed: {exc}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.warning(f"Spending sketch flush failed: {exc}")
+
+    def stats(self) -> dict:
+        """Return buffer metrics."""
+        return {
+            "pending_sketches": len(self._pending),
+            "amounts_added": self.added,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+spending_sketches = SpendingSketchStore(
+    SessionLocal,
+    settings.SKETCH_RELATIVE_ACCURACY,
+    settings.SKETCH_FLUSH_SECONDS,
+)
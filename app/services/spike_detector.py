@@ -0,0 +1,343 @@
+"""
+Spending spike detection with rolling per-category z-scores.
+
+For every (student, category) the daily spend on spending days is
+summarised by Welford's running mean and variance (CategorySpendingStats),
+so checking a new day is O(1). A day whose category total is more than
+SPIKE_Z_THRESHOLD standard deviations above the mean raises a
+SPENDING_PATTERN alert.
+
+Two paths keep the statistics current:
+
+- record(): called after expense writes; updates the touched categories'
+  open day and folds the previous day in when a new day starts.
+- backfill(): nightly; rebuilds all statistics over the trailing
+  SPIKE_WINDOW_DAYS with array operations (which also makes the window
+  rolling) and picks up backdated writes the incremental path skips.
+"""
+import math
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.ai_alert import AIAlert, AlertType, AlertSeverity
+from app.models.expense import Expense
+from app.models.spending_stats import CategorySpendingStats, UNCATEGORIZED_KEY
+from app.models.student import Student
+from app.services.category_registry import category_registry
+
+
+# (category key, expense date) touched by a write
+DayKey = Tuple[int, date]
+
+category_key = func.coalesce(Expense.category_id, UNCATEGORIZED_KEY)
+
+
+def z_score(total: float, day_count: int, mean: float, m2: float) -> Optional[float]:
+    """z-score of a day's total against the statistics, or None with too little history."""
+    if day_count < max(2, settings.SPIKE_MIN_DAYS):
+        return None
+    std = math.sqrt(max(m2, 0.0) / (day_count - 1))
+    std = max(std, settings.SPIKE_STD_FLOOR_RATIO * mean)
+    if std <= 0:
+        return None
+    return (total - mean) / std
+
+
+def _category_label(category_id: int) -> str:
+    if category_id == UNCATEGORIZED_KEY:
+        return "Unplanned Expenses"
+    return category_registry.name(category_id) or f"Category {category_id}"
+
+
+def _spike_alert(student_id: int, category_id: int, day: date, total: float, mean: float, z: float) -> dict:
+    label = _category_label(category_id)
+    return {
+        "student_id": student_id,
+        "alert_type": AlertType.SPENDING_PATTERN,
+        "severity": AlertSeverity.WARNING,
+        "title": f"Spending Spike: {label}",
+        "message": f"You spent ₹{total:.2f} on {label} on {day:%d %b}, well above your usual "
+                   f"₹{mean:.2f} on days you spend in this category (z = {z:.1f}).",
+    }
+
+
+def _alert_window_start(current_date: date) -> date:
+    return current_date - timedelta(days=settings.SPIKE_ALERT_LOOKBACK_DAYS)
+
+
+class SpikeDetector:
+    """Service for per-category spending spike detection."""
+
+    @staticmethod
+    def record(
+        db: Session,
+        student_id: int,
+        touched: Iterable[DayKey],
+        current_date: date = None,
+    ) -> List[AIAlert]:
+        """
+        Update statistics for (category, day) pairs just written and raise
+        alerts for spikes. Call after the expenses are committed.
+
+        Days before a category's open day are left to the nightly backfill.
+        """
+        if current_date is None:
+            current_date = date.today()
+
+        touched = set(touched)
+        if not touched:
+            return []
+
+        categories = {category_id for category_id, _ in touched}
+        states: Dict[int, CategorySpendingStats] = {
+            state.category_id: state
+            for state in db.query(CategorySpendingStats).filter(
+                CategorySpendingStats.student_id == student_id,
+                CategorySpendingStats.category_id.in_(categories),
+            ).with_for_update()
+        }
+
+        pending = sorted(
+            (category_id, day)
+            for category_id, day in touched
+            if category_id not in states or day >= states[category_id].open_date
+        )
+        if not pending:
+            db.commit()
+            return []
+
+        # Current totals of the touched days (they may include earlier writes)
+        totals: Dict[DayKey, Decimal] = {
+            (category_id, day): total
+            for category_id, day, total in db.execute(
+                select(category_key, Expense.expense_date, func.sum(Expense.amount))
+                .where(and_(
+                    Expense.student_id == student_id,
+                    tuple_(category_key, Expense.expense_date).in_(pending),
+                ))
+                .group_by(category_key, Expense.expense_date)
+            )
+        }
+
+        alerts = []
+        for category_id, day in pending:
+            total = totals.get((category_id, day), Decimal("0.00"))
+            state = states.get(category_id)
+
+            if state is None:
+                state = states[category_id] = CategorySpendingStats(
+                    student_id=student_id,
+                    category_id=category_id,
+                    day_count=0,
+                    mean=0.0,
+                    m2=0.0,
+                    open_date=day,
+                    open_total=total,
+                )
+                db.add(state)
+            elif day == state.open_date:
+                state.open_total = total
+            else:
+                # A later day starts: fold the open day in (Welford update)
+                value = float(state.open_total)
+                count = state.day_count + 1
+                delta = value - state.mean
+                mean = state.mean + delta / count
+                state.m2 = state.m2 + delta * (value - mean)
+                state.mean = mean
+                state.day_count = count
+                state.open_date = day
+                state.open_total = total
+
+        for state in states.values():
+            if state.open_date < _alert_window_start(current_date) or state.alerted_date == state.open_date:
+                continue
+            total = float(state.open_total)
+            z = z_score(total, state.day_count, state.mean, state.m2)
+            if z is not None and z > settings.SPIKE_Z_THRESHOLD:
+                alert = AIAlert(**_spike_alert(student_id, state.category_id, state.open_date, total, state.mean, z))
+                db.add(alert)
+                alerts.append(alert)
+                state.alerted_date = state.open_date
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent write created the same category's statistics
+            # first; the next write or the nightly backfill catches up.
+            db.rollback()
+            return []
+        return alerts
+
+    @staticmethod
+    def touched_days(pairs: Iterable[Tuple[Optional[int], date]]) -> Set[DayKey]:
+        """Map (category_id, expense_date) pairs of written expenses to stats keys."""
+        return {(category_id or UNCATEGORIZED_KEY, day) for category_id, day in pairs}
+
+    @staticmethod
+    def get_spikes(db: Session, student_id: int, current_date: date = None) -> List[dict]:
+        """
+        Spike alerts for the student's open days, from the stored statistics.
+
+        Used by the rule evaluation; record() raises the same alerts on writes.
+        Days that record() has already alerted on are skipped, so a spike is
+        reported once however often the rules run.
+        """
+        if current_date is None:
+            current_date = date.today()
+
+        alerts = []
+        for state in db.query(CategorySpendingStats).filter(
+            CategorySpendingStats.student_id == student_id,
+            CategorySpendingStats.open_date >= _alert_window_start(current_date),
+        ):
+            if state.alerted_date == state.open_date:
+                continue
+            total = float(state.open_total)
+            z = z_score(total, state.day_count, state.mean, state.m2)
+            if z is not None and z > settings.SPIKE_Z_THRESHOLD:
+                alerts.append(_spike_alert(student_id, state.category_id, state.open_date, total, state.mean, z))
+        return alerts
+
+    @staticmethod
+    def _backfill_shard(db: Session, first_id: int, last_id: int, current_date: date) -> Tuple[int, int]:
+        """Rebuild statistics for students in [first_id, last_id]; returns (series, alerts)."""
+        window_start = current_date - timedelta(days=settings.SPIKE_WINDOW_DAYS - 1)
+        rows = db.execute(
+            select(Expense.student_id, category_key, Expense.expense_date, func.sum(Expense.amount))
+            .where(and_(
+                Expense.student_id.between(first_id, last_id),
+                Expense.expense_date >= window_start,
+                Expense.expense_date <= current_date,
+            ))
+            .group_by(Expense.student_id, category_key, Expense.expense_date)
+            .order_by(Expense.student_id, category_key, Expense.expense_date)
+        ).all()
+
+        previous_alerts = {
+            (student_id, category_id): alerted_date
+            for student_id, category_id, alerted_date in db.execute(
+                select(
+                    CategorySpendingStats.student_id,
+                    CategorySpendingStats.category_id,
+                    CategorySpendingStats.alerted_date,
+                ).where(CategorySpendingStats.student_id.between(first_id, last_id))
+            )
+        }
+        db.execute(delete(CategorySpendingStats).where(CategorySpendingStats.student_id.between(first_id, last_id)))
+
+        if not rows:
+            db.commit()
+            return 0, 0
+
+        n = len(rows)
+        student_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=n)
+        category_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=n)
+        ordinals = np.fromiter((row[2].toordinal() for row in rows), dtype=np.int64, count=n)
+        values = np.fromiter((row[3] for row in rows), dtype=np.float64, count=n)
+
+        # Series boundaries (rows are sorted by student, category, date)
+        starts_series = np.ones(n, dtype=bool)
+        starts_series[1:] = (student_ids[1:] != student_ids[:-1]) | (category_ids[1:] != category_ids[:-1])
+        series = np.cumsum(starts_series) - 1
+        series_start = np.flatnonzero(starts_series)
+        series_end = np.append(series_start[1:], n) - 1
+
+        # Statistics of each series' earlier days, at every day (prefix sums)
+        day_count = np.arange(n) - series_start[series]
+        sums_before = np.cumsum(values) - values
+        squares_before = np.cumsum(values * values) - values * values
+        prior_sum = sums_before - sums_before[series_start][series]
+        prior_squares = squares_before - squares_before[series_start][series]
+        mean = np.divide(prior_sum, day_count, out=np.zeros(n), where=day_count > 0)
+        m2 = np.maximum(prior_squares - day_count * mean * mean, 0.0)
+
+        # z-scores (same rule as z_score(), for every day at once)
+        std = np.sqrt(np.divide(m2, day_count - 1, out=np.zeros(n), where=day_count > 1))
+        std = np.maximum(std, settings.SPIKE_STD_FLOOR_RATIO * mean)
+        z = np.divide(values - mean, std, out=np.zeros(n), where=std > 0)
+        spikes = (
+            (day_count >= max(2, settings.SPIKE_MIN_DAYS))
+            & (z > settings.SPIKE_Z_THRESHOLD)
+            & (ordinals >= _alert_window_start(current_date).toordinal())
+        )
+
+        # Alert on recent spike days not alerted before
+        alerted = dict(previous_alerts)
+        alerts = []
+        for index in np.flatnonzero(spikes).tolist():
+            key = (int(student_ids[index]), int(category_ids[index]))
+            day = date.fromordinal(int(ordinals[index]))
+            if alerted.get(key) is None or day > alerted[key]:
+                alerts.append(_spike_alert(*key, day, float(values[index]), float(mean[index]), float(z[index])))
+                alerted[key] = day
+
+        # The last day of each series stays open; the rest are its statistics
+        states = []
+        for end in series_end.tolist():
+            key = (int(student_ids[end]), int(category_ids[end]))
+            states.append({
+                "student_id": key[0],
+                "category_id": key[1],
+                "day_count": int(day_count[end]),
+                "mean": float(mean[end]),
+                "m2": float(m2[end]),
+                "open_date": date.fromordinal(int(ordinals[end])),
+                "open_total": Decimal(str(round(float(values[end]), 2))),
+                "alerted_date": alerted.get(key),
+            })
+
+        db.execute(pg_insert(CategorySpendingStats.__table__), states)
+        if alerts:
+            db.execute(pg_insert(AIAlert.__table__), alerts)
+        db.commit()
+        return len(states), len(alerts)
+
+    @staticmethod
+    def backfill(db: Session, current_date: date = None, shard_size: int = None) -> Tuple[int, int]:
+        """
+        Rebuild every student's statistics over the trailing window.
+
+        Returns (series rebuilt, alerts raised).
+        """
+        if current_date is None:
+            current_date = date.today()
+        shard_size = shard_size or settings.SPIKE_BACKFILL_SHARD_SIZE
+
+        # Alert titles use category names; scripts run without the app's startup
+        if not category_registry.snapshot.categories:
+            category_registry.refresh()
+
+        student_ids = db.execute(select(Student.id).order_by(Student.id)).scalars().all()
+        series_total = alerts_total = 0
+        for start in range(0, len(student_ids), shard_size):
+            shard = student_ids[start:start + shard_size]
+            series_count, alert_count = SpikeDetector._backfill_shard(db, shard[0], shard[-1], current_date)
+            series_total += series_count
+            alerts_total += alert_count
+        return series_total, alerts_total
+
+
+class AsyncSpikeDetector:
+    """SpikeDetector for AsyncSession callers (runs via ``run_sync``)."""
+
+    @staticmethod
+    async def record(
+        db: AsyncSession,
+        student_id: int,
+        touched: Iterable[DayKey],
+        current_date: date = None,
+    ) -> List[AIAlert]:
+        touched = set(touched)
+        if not touched:
+            return []
+        return await db.run_sync(
+            lambda session: SpikeDetector.record(session, student_id, touched, current_date)
+        )
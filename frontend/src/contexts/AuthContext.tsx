@@ -3,6 +3,7 @@
  */
 import { createContext, useContext, useEffect, useState, useCallback, ReactNode } from 'react'
 import { api, Student, AuthResponse } from '../lib/api'
+import { AUTH_LOGOUT_EVENT, clearTokens, storeTokens } from '../lib/authFetch'
 
 interface AuthContextType {
   student: Student | null
@@ -31,8 +32,9 @@ export function AuthProvider({ children }: { children: ReactNode }) {
       const data = await api.get<Student>('/auth/me')
       setStudent(data)
     } catch (error) {
+      // The API client has already refreshed and replayed the request on
+      // a 401; a failed refresh clears the tokens and logs out
       console.error('Failed to fetch student data:', error)
-      localStorage.removeItem('token')
       setStudent(null)
     } finally {
       setLoading(false)
@@ -44,20 +46,30 @@ export function AuthProvider({ children }: { children: ReactNode }) {
     refreshStudent()
   }, [refreshStudent])
 
+  // Log out when a token refresh fails anywhere in the app
+  useEffect(() => {
+    const handleLogout = () => setStudent(null)
+    window.addEventListener(AUTH_LOGOUT_EVENT, handleLogout)
+    return () => window.removeEventListener(AUTH_LOGOUT_EVENT, handleLogout)
+  }, [])
+
   const signIn = async (email: string, password: string) => {
     const data = await api.post<AuthResponse>('/auth/login', { email, password })
-    localStorage.setItem('token', data.token)
+    storeTokens(data)
     setStudent(data.student)
   }
 
   const signUp = async (email: string, password: string, name: string) => {
     const data = await api.post<AuthResponse>('/auth/register', { email, password, name })
-    localStorage.setItem('token', data.token)
+    storeTokens(data)
     setStudent(data.student)
   }
 
   const signOut = () => {
-    localStorage.removeItem('token')
+    // Revoke tokens server-side; local sign-out proceeds regardless
+    const refreshToken = localStorage.getItem('refresh_token')
+    api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => undefined)
+    clearTokens()
     setStudent(null)
   }
 
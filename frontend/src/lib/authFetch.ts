@@ -0,0 +1,101 @@
+/**
+ * Authenticated fetch with transparent access-token refresh.
+ *
+ * Access tokens are short-lived. When a request comes back 401, the refresh
+ * token is exchanged for a new pair and the request is replayed once. All
+ * requests that fail together share a single refresh call, because the
+ * backend rotates refresh tokens and a second concurrent refresh with the
+ * same token is rejected. If the refresh fails, the stored tokens are
+ * cleared and an `auth:logout` event is dispatched on `window`.
+ */
+import { config } from '../config'
+
+export const AUTH_LOGOUT_EVENT = 'auth:logout'
+
+// A 401 from these is an answer (bad credentials or refresh token), not an
+// expired access token
+const NO_REFRESH_PATHS = ['/auth/login', '/auth/register', '/auth/refresh']
+
+export interface TokenPair {
+  token: string
+  refresh_token: string
+}
+
+let refreshInFlight: Promise<TokenPair> | null = null
+
+export function storeTokens(data: TokenPair) {
+  localStorage.setItem('token', data.token)
+  localStorage.setItem('refresh_token', data.refresh_token)
+}
+
+export function clearTokens() {
+  localStorage.removeItem('token')
+  localStorage.removeItem('refresh_token')
+}
+
+async function requestRefresh<T extends TokenPair>(): Promise<T> {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) {
+    throw new Error('No refresh token')
+  }
+
+  const response = await fetch(`${config.apiUrl}/auth/refresh`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  })
+  if (!response.ok) {
+    throw new Error(`Token refresh failed: ${response.status}`)
+  }
+
+  const data = (await response.json()) as T
+  storeTokens(data)
+  return data
+}
+
+/**
+ * Exchange the refresh token for a new pair, joining a refresh already in
+ * flight. On failure the tokens are cleared and the user is logged out.
+ */
+export function refreshTokens<T extends TokenPair = TokenPair>(): Promise<T> {
+  if (!refreshInFlight) {
+    refreshInFlight = requestRefresh()
+      .catch((error) => {
+        clearTokens()
+        window.dispatchEvent(new Event(AUTH_LOGOUT_EVENT))
+        throw error
+      })
+      .finally(() => {
+        refreshInFlight = null
+      })
+  }
+  return refreshInFlight as Promise<T>
+}
+
+function withToken(init: RequestInit, token: string | null): RequestInit {
+  const headers = new Headers(init.headers)
+  if (token) {
+    headers.set('Authorization', `Bearer ${token}`)
+  }
+  return { ...init, headers }
+}
+
+/**
+ * fetch() with the stored access token, refreshing and replaying once on 401.
+ *
+ * The shared API client sends every request through this.
+ */
+export async function authFetch(path: string, init: RequestInit = {}): Promise<Response> {
+  const url = `${config.apiUrl}${path}`
+  const response = await fetch(url, withToken(init, localStorage.getItem('token')))
+  if (response.status !== 401 || NO_REFRESH_PATHS.includes(path)) {
+    return response
+  }
+
+  try {
+    const tokens = await refreshTokens()
+    return await fetch(url, withToken(init, tokens.token))
+  } catch {
+    return response
+  }
+}
@@ -0,0 +1,47 @@
+"""
+Benchmark per-request authentication overhead.
+
+Compares full JWT signature verification on every request against the
+verified-token cache plus the in-memory revocation check, for a
+dashboard-style workload where the same token is presented many times.
+
+Usage:
+    python scripts/benchmark_auth.py [requests]
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from jose import jwt
+from app.config import settings
+from app.api.routes.auth import create_access_token
+from app.auth.middleware import authenticate_token, token_cache
+
+
+def benchmark(requests: int = 20000):
+    """Time uncached decode vs cached authentication for one token."""
+    token = create_access_token(1)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    uncached = time.perf_counter() - start
+
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(requests):
+        authenticate_token(token)
+    cached = time.perf_counter() - start
+
+    print(f"Requests:            {requests}")
+    print(f"Full verification:   {uncached / requests * 1e6:8.2f} µs/request")
+    print(f"Cached verification: {cached / requests * 1e6:8.2f} µs/request")
+    print(f"Speed-up:            {uncached / cached:8.1f}x")
+    print(f"Cache stats:         {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
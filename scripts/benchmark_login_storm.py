@@ -0,0 +1,89 @@
+"""
+Benchmark latency of ordinary endpoints during a login storm.
+
+Measures p50/p99 latency of a sync endpoint first on an idle server and then
+while many concurrent clients hammer /auth/login. With password hashing on
+its own bounded pool, the probe latency should stay roughly flat; excess
+logins are rejected with 429/503 instead of starving the request threadpool.
+
+Start the API first (python run_server.py) and create the demo accounts.
+All storm traffic comes from one address, so raise AUTH_IP_ATTEMPTS on the
+server for the run or the per-IP throttle will absorb the storm.
+
+Usage:
+    python scripts/benchmark_login_storm.py [base_url] [storm_clients] [seconds]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+PROBE_PATH = "/expenses/categories"
+LOGIN_BODY = {"email": "healthy@demo.com", "password": "demo123"}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (milliseconds)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+async def probe(client: httpx.AsyncClient, seconds: float) -> list[float]:
+    """Call the probe endpoint sequentially for ``seconds``, recording latency."""
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(PROBE_PATH)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def login_loop(client: httpx.AsyncClient, stop: asyncio.Event, statuses: Counter):
+    """Log in repeatedly until stopped."""
+    while not stop.is_set():
+        try:
+            response = await client.post("/auth/login", json=LOGIN_BODY)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses["error"] += 1
+            continue
+        # Well-behaved clients back off when throttled or shed
+        if response.status_code in (429, 503):
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+
+def report(label: str, samples: list[float]):
+    print(f"{label:<14} n={len(samples):5d}  "
+          f"p50={percentile(samples, 50):7.1f} ms  "
+          f"p99={percentile(samples, 99):7.1f} ms  "
+          f"mean={statistics.mean(samples) * 1000:7.1f} ms")
+
+
+async def main(base_url: str, storm_clients: int, seconds: float):
+    limits = httpx.Limits(max_connections=storm_clients + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+        report("idle", await probe(client, seconds))
+
+        stop = asyncio.Event()
+        statuses: Counter = Counter()
+        storm = [asyncio.create_task(login_loop(client, stop, statuses)) for _ in range(storm_clients)]
+        await asyncio.sleep(1.0)  # let the storm ramp up
+        samples = await probe(client, seconds)
+        stop.set()
+        await asyncio.gather(*storm)
+
+        report("login storm", samples)
+        print(f"Login responses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 10.0,
+    ))
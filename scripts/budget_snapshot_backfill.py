@@ -0,0 +1,34 @@
+"""
+Nightly task that backfills monthly budget snapshots.
+
+Creates the MonthlyBudgetSnapshot rows that are missing for past months
+(for every student, from their first expense) and refreshes each
+student's current month, so /students/me/history is served entirely
+from snapshots. Expense writes keep the touched months current between
+runs.
+
+Usage:
+    python scripts/budget_snapshot_backfill.py
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.budget_history import BudgetHistoryService
+
+
+if __name__ == "__main__":
+    print(f"Running monthly budget snapshot backfill on {date.today()}...")
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        created, refreshed = BudgetHistoryService.backfill(db)
+    finally:
+        db.close()
+    print(f"✅ Created {created} snapshot(s), refreshed {refreshed} current month(s) "
+          f"in {time.perf_counter() - start:.1f} s")
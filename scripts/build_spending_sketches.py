@@ -0,0 +1,34 @@
+"""
+Nightly task that rebuilds the spending percentile sketches.
+
+Recomputes the per-category and per-month quantile sketches behind
+/expenses/percentiles from the expenses table. Workers keep the sketches
+current between runs; the rebuild also accounts for edited and deleted
+expenses, which the incremental updates do not see.
+
+Usage:
+    python scripts/build_spending_sketches.py [since YYYY-MM-DD]
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.spending_sketches import spending_sketches
+
+
+if __name__ == "__main__":
+    since = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print(f"Rebuilding spending sketches{f' from {since:%Y-%m}' if since else ''}...")
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        sketches = spending_sketches.rebuild(db, since)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt {sketches} sketch(es) in {time.perf_counter() - start:.1f} s")
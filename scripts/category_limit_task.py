@@ -0,0 +1,33 @@
+"""
+Daily task that evaluates per-category limit rules for every student.
+
+Compares each student's spend per category with their daily limits
+(daily breach, week-to-date overrun, consistent under-use) and stores new
+alerts. All students and categories are evaluated from one aggregate query.
+
+Usage:
+    python scripts/category_limit_task.py [date YYYY-MM-DD]
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.category_limit_rules import CategoryLimitRules
+
+
+if __name__ == "__main__":
+    current_date = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print(f"Running category limit rules on {date.today()}...")
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        created = CategoryLimitRules.run_batch(db, current_date)
+    finally:
+        db.close()
+    print(f"✅ Created {created} alert(s) in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,78 @@
+"""
+Check the burn-rate forecast model on edge-case inputs.
+
+Runs forecast_service.forecast() on small hand-built spend matrices (no
+database needed) and compares the projections with the expected values:
+an empty batch, cycles that end on the as-of day, budgets already
+exhausted and a flat spender who runs out mid-cycle. Exits with status 1
+if any case fails or raises.
+
+Usage:
+    python scripts/check_forecast_model.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+from app.services.forecast_service import NO_EXHAUSTION, forecast
+
+
+def _run(spend, remaining, horizon):
+    n = len(remaining)
+    return forecast(
+        np.asarray(spend, dtype=np.float64),
+        0,
+        np.zeros(n, dtype=np.int64),
+        np.asarray(remaining, dtype=np.float64),
+        np.asarray(horizon, dtype=np.int64),
+        7.0,
+        2.0,
+    )
+
+
+def check_empty_batch():
+    result = _run(np.zeros((0, 56)), [], [])
+    assert result.projected_spend.shape == (0,)
+    assert result.exhaustion_offset.shape == (0,)
+
+
+def check_cycles_ending_today():
+    # Every horizon is 0 (the nightly run on the last day of every cycle)
+    result = _run(np.full((2, 56), 100.0), [1000.0, -5.0], [0, 0])
+    assert np.array_equal(result.projected_spend, [0.0, 0.0])
+    assert np.array_equal(result.month_end_balance, [1000.0, -5.0])
+    assert np.array_equal(result.exhaustion_offset, [NO_EXHAUSTION, 0])
+
+
+def check_mixed_horizons():
+    result = _run(np.full((2, 56), 100.0), [250.0, 1000.0], [0, 5])
+    assert np.allclose(result.projected_spend, [0.0, 500.0])
+    assert np.array_equal(result.exhaustion_offset, [NO_EXHAUSTION, NO_EXHAUSTION])
+
+
+def check_runs_out_mid_cycle():
+    result = _run(np.full((1, 56), 100.0), [250.0], [10])
+    assert np.allclose(result.daily_rate, [100.0])
+    assert np.array_equal(result.exhaustion_offset, [3])
+
+
+CHECKS = [check_empty_batch, check_cycles_ending_today, check_mixed_horizons, check_runs_out_mid_cycle]
+
+
+if __name__ == "__main__":
+    failed = []
+    for check in CHECKS:
+        try:
+            check()
+            print(f"  ok    {check.__name__}")
+        except Exception as exc:
+            failed.append(check.__name__)
+            print(f"  FAIL  {check.__name__}: {exc!r}")
+
+    if failed:
+        print(f"\n{len(failed)} forecast check(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"\nAll {len(CHECKS)} forecast checks passed")
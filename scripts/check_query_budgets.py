@@ -0,0 +1,107 @@
+"""
+Check the number of SQL statements each read endpoint issues.
+
+Runs the app in-process against the configured database, logs in as a
+demo account and calls every list/dashboard endpoint, counting statements
+on all engines. Each endpoint has a fixed query budget; a lazy load per
+row (N+1) or any other regression pushes it over budget and the script
+exits with status 1.
+
+Endpoints are called once to warm per-worker caches (token, student id,
+category registry) and then measured, so budgets reflect steady state.
+
+Seed the database first (python scripts/create_demo_accounts.py, then
+python scripts/nightly_forecast_task.py).
+
+Usage:
+    python scripts/check_query_budgets.py [email] [password]
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+# Maximum statements per request, independent of how much data the student has
+QUERY_BUDGETS = {
+    "/expenses/categories": 0,
+    "/expenses/": 1,
+    "/expenses/today": 1,
+    "/expenses/analytics": 1,
+    "/expenses/analytics?group_by=week": 1,
+    "/expenses/heatmap": 2,
+    "/expenses/percentiles?amount=250": 1,
+    "/expenses/daily-checklist": 2,
+    "/students/me": 6,
+    "/students/me/budget-status": 6,
+    "/students/me/budget-status?as_of=2025-06-15": 3,
+    "/students/me/category-budgets": 1,
+    "/students/me/forecast": 1,
+    "/students/me/history": 1,
+    "/students/me/dashboard": 1,
+    "/ai/alerts": 1,
+    "/ai/alerts/unread": 1,
+    "/investments/me": 1,
+    "/investments/me/summary": 5,
+}
+
+
+class StatementCounter:
+    """Counts statements executed on a set of engines."""
+
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def main(email: str, password: str) -> int:
+    from app.main import app
+    from app.database import api_engine, analytics_engine, engine
+
+    counter = StatementCounter([api_engine.sync_engine, analytics_engine.sync_engine, engine])
+    failures = []
+
+    with TestClient(app) as client:
+        response = client.post("/auth/login", json={"email": email, "password": password})
+        if response.status_code != 200:
+            print(f"Login failed ({response.status_code}); seed the demo accounts first.")
+            return 1
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        print(f"{'endpoint':<44} {'status':>6} {'rows':>6} {'queries':>8} {'budget':>7}")
+        for path, budget in QUERY_BUDGETS.items():
+            client.get(path, headers=headers)  # warm caches
+            counter.count = 0
+            response = client.get(path, headers=headers)
+            queries = counter.count
+
+            body = response.json() if response.content else None
+            rows = len(body) if isinstance(body, list) else "-"
+            flag = ""
+            if response.status_code != 200:
+                flag = "  FAILED"
+            elif queries > budget:
+                flag = "  OVER BUDGET"
+            print(f"{path:<44} {response.status_code:>6} {rows:>6} {queries:>8} {budget:>7}{flag}")
+            if flag:
+                failures.append(path)
+
+    if failures:
+        print(f"\n{len(failures)} endpoint(s) failed or over their query budget: {', '.join(failures)}")
+        return 1
+    print("\nAll endpoints within their query budgets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(
+        sys.argv[1] if len(sys.argv) > 1 else "investor@demo.com",
+        sys.argv[2] if len(sys.argv) > 2 else "demo123",
+    ))
@@ -0,0 +1,30 @@
+"""
+Nightly task that rebuilds every student's dashboard digest.
+
+Recomputes the DashboardDigest rows in shards of DIGEST_SHARD_SIZE
+students, with a fixed number of grouped queries per shard, so each
+dashboard's first read of the day is one primary-key lookup. Expense
+writes refresh a student's digest between runs; other writes drop it and
+the next read rebuilds it.
+
+Usage:
+    python scripts/dashboard_digest_task.py [date YYYY-MM-DD]
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.dashboard_digest import DashboardDigestService
+
+
+if __name__ == "__main__":
+    current_date = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print(f"Running dashboard digest rebuild on {date.today()}...")
+    start = time.perf_counter()
+    students = DashboardDigestService.run_batch(current_date)
+    print(f"✅ Rebuilt {students} dashboard digest(s) in {time.perf_counter() - start:.1f} s")
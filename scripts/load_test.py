@@ -0,0 +1,97 @@
+"""
+Load test the dashboard endpoints with many concurrent clients.
+
+One demo account is logged in once and every client replays the dashboard's
+read requests with that token for the given duration. Reports throughput,
+latency percentiles and status codes, so the async (asyncpg) stack can be
+compared against an older sync build by running the same command against
+each server.
+
+Start the API first (python run_server.py) and create the demo accounts.
+
+Usage:
+    python scripts/load_test.py [base_url] [clients] [seconds]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+LOGIN_BODY = {"email": "healthy@demo.com", "password": "demo123"}
+
+DASHBOARD_PATHS = [
+    "/students/me",
+    "/students/me/budget-status",
+    "/expenses/daily-checklist",
+    "/expenses/today",
+    "/ai/alerts/unread",
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (milliseconds)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    headers: dict,
+    deadline: float,
+    offset: int,
+    samples: list[float],
+    statuses: Counter,
+):
+    """Cycle through the dashboard requests until the deadline."""
+    i = offset
+    while time.perf_counter() < deadline:
+        path = DASHBOARD_PATHS[i % len(DASHBOARD_PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses["error"] += 1
+            continue
+        samples.append(time.perf_counter() - start)
+
+
+async def main(base_url: str, clients: int, seconds: float):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        response = await client.post("/auth/login", json=LOGIN_BODY)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        samples: list[float] = []
+        statuses: Counter = Counter()
+        start = time.perf_counter()
+        deadline = start + seconds
+        await asyncio.gather(*(
+            client_loop(client, headers, deadline, offset, samples, statuses)
+            for offset in range(clients)
+        ))
+        elapsed = time.perf_counter() - start
+
+    print(f"Clients:     {clients}")
+    print(f"Duration:    {elapsed:.1f} s")
+    print(f"Requests:    {len(samples)}  ({len(samples) / elapsed:.1f} req/s)")
+    if samples:
+        print(f"Latency:     p50={percentile(samples, 50):.1f} ms  "
+              f"p95={percentile(samples, 95):.1f} ms  "
+              f"p99={percentile(samples, 99):.1f} ms  "
+              f"mean={statistics.mean(samples) * 1000:.1f} ms")
+    print(f"Responses:   {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 30.0,
+    ))
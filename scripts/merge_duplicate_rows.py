@@ -0,0 +1,88 @@
+"""
+One-off migration that merges rows blocking the unique indexes.
+
+Databases created before these indexes can hold duplicates, and app
+startup fails until the indexes exist:
+
+- uq_expenses_checklist_entry: several non-additional expenses for the
+  same student, category and day. Each group is folded into its oldest
+  row, whose amount becomes the group's total, so daily and monthly spend
+  are unchanged.
+- uq_monthly_budget_snapshot_student_month: several snapshots of the same
+  student and month (budget resets repeated within a month). The latest
+  one is kept.
+
+Each table is locked against writes while its rows are merged and its
+index is created, all in one transaction.
+
+Usage:
+    python scripts/merge_duplicate_rows.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import and_, delete, func, select, text, update
+from app.database import engine
+from app.models.expense import Expense, MonthlyBudgetSnapshot
+
+
+def merge_checklist_entries(connection) -> int:
+    """Fold duplicate checklist rows into the oldest of each group; returns rows removed."""
+    groups = (
+        select(
+            Expense.student_id,
+            Expense.category_id,
+            Expense.expense_date,
+            func.min(Expense.id).label("keep_id"),
+            func.sum(Expense.amount).label("total"),
+        )
+        .where(and_(Expense.is_additional == False, Expense.category_id.isnot(None)))
+        .group_by(Expense.student_id, Expense.category_id, Expense.expense_date)
+        .having(func.count() > 1)
+        .subquery("duplicate_groups")
+    )
+
+    connection.execute(
+        update(Expense)
+        .where(Expense.id == groups.c.keep_id)
+        .values(amount=groups.c.total)
+    )
+    return connection.execute(
+        delete(Expense).where(and_(
+            Expense.is_additional == False,
+            Expense.student_id == groups.c.student_id,
+            Expense.category_id == groups.c.category_id,
+            Expense.expense_date == groups.c.expense_date,
+            Expense.id != groups.c.keep_id,
+        ))
+    ).rowcount
+
+
+def merge_budget_snapshots(connection) -> int:
+    """Keep the latest snapshot of each student and month; returns rows removed."""
+    latest = (
+        select(func.max(MonthlyBudgetSnapshot.id))
+        .group_by(MonthlyBudgetSnapshot.student_id, MonthlyBudgetSnapshot.year, MonthlyBudgetSnapshot.month)
+    )
+    return connection.execute(
+        delete(MonthlyBudgetSnapshot).where(MonthlyBudgetSnapshot.id.not_in(latest))
+    ).rowcount
+
+
+MIGRATIONS = [
+    (Expense, "uq_expenses_checklist_entry", merge_checklist_entries),
+    (MonthlyBudgetSnapshot, "uq_monthly_budget_snapshot_student_month", merge_budget_snapshots),
+]
+
+
+if __name__ == "__main__":
+    for model, index_name, merge in MIGRATIONS:
+        index = next(index for index in model.__table__.indexes if index.name == index_name)
+        with engine.begin() as connection:
+            connection.execute(text(f"LOCK TABLE {model.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+            removed = merge(connection)
+            index.create(bind=connection, checkfirst=True)
+        print(f"✅ {index_name}: merged away {removed} duplicate row(s), index in place")
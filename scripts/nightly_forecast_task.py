@@ -0,0 +1,33 @@
+"""
+Nightly task that forecasts every student's month-end budget.
+
+Projects each student's spending to the end of their budget cycle
+(exponentially weighted daily spend with day-of-week seasonality) and
+stores the month-end balance and expected exhaustion date in
+budget_forecasts. Students are processed in shards on a process pool.
+
+Run shortly after midnight (e.g. via cron); by default the forecast uses
+history up to yesterday.
+
+Usage:
+    python scripts/nightly_forecast_task.py [as_of YYYY-MM-DD] [workers]
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.forecast_service import ForecastService
+
+
+if __name__ == "__main__":
+    as_of = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print(f"Running nightly forecast task on {date.today()}...")
+    start = time.perf_counter()
+    count = ForecastService.run_batch(as_of=as_of, workers=workers)
+    print(f"✅ Forecast {count} student(s) in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,35 @@
+"""
+Nightly task that rebuilds per-category spending statistics.
+
+Recomputes every student's rolling per-category daily-spend statistics
+(used for spending spike alerts) over the trailing SPIKE_WINDOW_DAYS, and
+raises alerts for recent spikes. This keeps the window rolling and picks up
+backdated expenses that the write-time updates skip.
+
+Usage:
+    python scripts/spike_backfill_task.py [date YYYY-MM-DD]
+"""
+import sys
+import os
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.spike_detector import SpikeDetector
+
+
+if __name__ == "__main__":
+    current_date = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print(f"Running spending statistics backfill on {date.today()}...")
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        series, alerts = SpikeDetector.backfill(db, current_date)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt {series} category series, raised {alerts} spike alert(s) "
+          f"in {time.perf_counter() - start:.1f} s")